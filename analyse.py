@@ -23,14 +23,10 @@ from multiprocessing import Pool
 from pathlib import Path
 from typing import Any, Optional
 
-from numpy import imag
-import pytesseract
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader
 
 from repositories import ai_ocr_content_repository
 from repositories.ai_separation_repository import AiSeparationRepository
-from repositories.ai_separation_setting_repository import AiSeparationSettingRepository
 from repositories.categorie_repositorie import CategorieRepositorie
 from repositories.decoupage_niveau1_controle_repository import DecoupageNiveau1ControleRepositorie
 from repositories.decoupage_niveau2_controle_repository import DecoupageNiveau2ControleRepositorie
@@ -40,12 +36,15 @@ from repositories.logs_repository import LogsRepository
 from repositories.lot_repository import LotRepositorie
 from repositories.panier_reception_resipository import PanierReceptionRepository
 from services import constant
+from services.claim_service import ClaimScope, ClaimService
 from services.constant import CategorieId, OcrLibrary, StatusNew
 from services.easy_ocr_service import EasyOcrService
 from services.image_service import ImageService
+from services.lazy_import import lazy_import
 from services.logger import Logger
 from services.ocr_service import OCRService
 from services.openai_service import OpenAIService
+from services.settings_service import SettingsService
 from services.openai_service_vision import OpenAIServiceVision
 from services.utils_service import UtilsService
 from services.validation_service import ValidationService
@@ -58,15 +57,15 @@ import json
 load_dotenv()
 logger = Logger.get_logger()
 
+PyPDF2 = lazy_import("PyPDF2")
+pytesseract = lazy_import("pytesseract")
+
 IMAGE_BASE = os.getenv("IMAGE_BASE", r"//NAS/intranet images/IMAGES_V2/images")
 IMAGE_COMPTABILISEE_BASE = os.getenv(
     "IMAGE_COMPTABILISEE_BASE",
     r"//NAS/images/Images comptabilisées"
 )
 
-# Service OCR global (pour éviter la réinitialisation)
-easy_ocr_service = EasyOcrService()
-
 
 class TerminatePoolException(Exception):
     """Exception levée pour arrêter le pool de workers."""
@@ -201,11 +200,8 @@ class ImageProcessor:
             )
 
     def _check_service_power(self) -> None:
-        """Vérifie si le service est actif."""
-        settings_repo = AiSeparationSettingRepository()
-        current_settings = settings_repo.get_ai_separation_setting(setting_id=2)
-        
-        if current_settings.get('power', 1) != 1:
+        """Vérifie si le service est actif (paramètres en cache, voir SettingsService)."""
+        if not SettingsService.get_instance(setting_id=2).is_active():
             logger.warning("Service désactivé - arrêt du traitement")
             raise TerminatePoolException("Service désactivé")
 
@@ -266,7 +262,7 @@ class ImageProcessor:
 
     def _get_page_count(self, path: str, name: str) -> int:
         """Compte le nombre de pages du PDF."""
-        reader = PdfReader(path)
+        reader = PyPDF2.PdfReader(path)
         num_pages = len(reader.pages)
         
         logger.info(f"Nombre de pages: {num_pages}")
@@ -289,7 +285,7 @@ class ImageProcessor:
         # Extraction selon la bibliothèque configurée
         if ocr_library == OcrLibrary.EASYOCR.value:
             logger.info(f"Extraction EasyOCR pour {name}")
-            text = easy_ocr_service.extract_text(converted_path)
+            text = EasyOcrService.get_instance().extract_text(converted_path)
             
         elif ocr_library == OcrLibrary.DOCUMENT_AI.value:
             logger.info(f"Extraction Document AI pour {name}")
@@ -304,6 +300,11 @@ class ImageProcessor:
             logger.info(f"Extraction Pytesseract personnalisé pour {name}")
             text = self.ocr_service.extract_from_image(converted_path)
             
+        elif ocr_library == OcrLibrary.CUSTOM_PYTESSERACT_MULTI.value:
+            logger.info(f"Extraction Pytesseract multi-stratégies pour {name}")
+            text, confidence = self.ocr_service.extract_from_image_multi(converted_path)
+            logger.info(f"Confiance OCR: {confidence:.1f}")
+            
         else:
             logger.info(f"Extraction Pytesseract standard pour {name}")
             text = pytesseract.image_to_string(converted_path, lang='fra')
@@ -459,31 +460,34 @@ def main() -> None:
     try:
         # Initialisation des repositories
         image_repo = ImageRepositorie()
-        settings_repo = AiSeparationSettingRepository()
         
         # Récupération des paramètres
-        ai_settings = settings_repo.get_ai_separation_setting(setting_id=3)
+        ai_settings = SettingsService.get_instance(setting_id=3).get_settings(force_refresh=True)
         
         if not ai_settings or ai_settings.get('power', 1) != 1:
             logger.warning("Service IA désactivé ou non configuré")
             return
         
-        # Récupération des images à traiter
-        images = image_repo.get_image_to_process(for_analyse=True)
+        # Récupération des images à traiter, hors images réservées par un autre worker
+        claims = ClaimService(ClaimScope.ANALYSE)
+        images = image_repo.get_image_to_process(for_analyse=True, claim_scope=claims.scope)
        
         num_processes = ai_settings.get('thread_number', 1)
         
-        logger.info(f"Démarrage du traitement avec {num_processes} processus")
-        logger.info(f"Images à traiter: {len(images)}")
-        
-        # Traitement parallèle
-        with Pool(processes=num_processes) as pool:
-            process_func = partial(
-                process_single_image,
-                ai_separation_setting=ai_settings,
-                prompt=ai_settings.get('prompt_systeme')
-            )
-            results = pool.map(process_func, images)
+        with claims:
+            images = claims.claim(images)
+            
+            logger.info(f"Démarrage du traitement avec {num_processes} processus")
+            logger.info(f"Images à traiter: {len(images)}")
+            
+            # Traitement parallèle
+            with Pool(processes=num_processes) as pool:
+                process_func = partial(
+                    process_single_image,
+                    ai_separation_setting=ai_settings,
+                    prompt=ai_settings.get('prompt_systeme')
+                )
+                results = pool.map(process_func, images)
         
         # Analyse des résultats
         successful = len(results)
@@ -11,14 +11,22 @@ Utilisation:
 """
 
 import asyncio
+import time
+from functools import partial
 from typing import Any, Optional
 
+_IMPORT_STARTED_AT = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, status
 from pydantic import BaseModel, Field
 
 from main import process_single_image
-from repositories.ai_separation_setting_repository import AiSeparationSettingRepository
 from repositories.image_repository import ImageRepositorie
+from services.claim_service import ClaimScope, ClaimService
+from services.logger import Logger
+from services.settings_service import SettingsService
+
+logger = Logger.get_logger()
 
 
 # =============================================================================
@@ -109,6 +117,8 @@ app = FastAPI(
     }
 )
 
+logger.info(f"API chargée en {time.perf_counter() - _IMPORT_STARTED_AT:.2f}s")
+
 
 # =============================================================================
 # Endpoints
@@ -167,8 +177,7 @@ async def process_image(payload: ImageIdPayload) -> ProcessResponse:
     """
     try:
         # Vérification de l'état du service
-        settings_repo = AiSeparationSettingRepository()
-        ai_settings = settings_repo.get_ai_separation_setting()
+        ai_settings = SettingsService.get_instance().get_settings()
         
         if not ai_settings or ai_settings.get("power", 1) != 1:
             raise HTTPException(
@@ -188,18 +197,45 @@ async def process_image(payload: ImageIdPayload) -> ProcessResponse:
 
         
         
-        # Traitement asynchrone
+        # Réservation de l'image: refusée si un autre worker la traite déjà
+        claims = ClaimService(ClaimScope.SEPARATION)
+        images = claims.claim(images)
+        if not images:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Image en cours de traitement par un autre worker: {payload.id}"
+            )
+
+        # Traitement asynchrone (les images enfants sont traitées en parallèle)
         loop = asyncio.get_running_loop()
-        for image_data in images:   
-            await loop.run_in_executor(
+        cancelled = []
+
+        async def run(image_data: dict) -> None:
+            result = await loop.run_in_executor(
                 None,
-                lambda: process_single_image(
+                partial(
+                    process_single_image,
                     image_data,
                     ai_settings,
                     prompt='',
                     is_decoupage=True,
                 )
             )
+            if result.get('cancelled'):
+                cancelled.append(image_data['id'])
+            await asyncio.gather(*(run(child) for child in result.get('child_images', [])))
+
+        with claims:
+            for image_data in images:
+                await run(image_data)
+
+        if cancelled:
+            # Service désactivé en cours de traitement: image laissée en attente
+            return ProcessResponse(
+                success=False,
+                image_id=payload.id,
+                message="Traitement annulé: le service de classification IA a été désactivé"
+            )
 
         return ProcessResponse(
             success=True,
@@ -229,8 +265,7 @@ async def get_settings() -> dict[str, Any]:
     Returns:
         Dictionnaire contenant les paramètres actuels.
     """
-    settings_repo = AiSeparationSettingRepository()
-    settings = settings_repo.get_ai_separation_setting()
+    settings = SettingsService.get_instance().get_settings() or {}
     
     return {
         "power": settings.get("power", 0),
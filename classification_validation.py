@@ -23,14 +23,10 @@ from multiprocessing import Pool
 from pathlib import Path
 from typing import Any, Optional
 
-from numpy import imag
-import pytesseract
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader
 
 from repositories import ai_ocr_content_repository
 from repositories.ai_separation_repository import AiSeparationRepository
-from repositories.ai_separation_setting_repository import AiSeparationSettingRepository
 from repositories.categorie_repositorie import CategorieRepositorie
 from repositories.decoupage_niveau1_controle_repository import DecoupageNiveau1ControleRepositorie
 from repositories.decoupage_niveau2_controle_repository import DecoupageNiveau2ControleRepositorie
@@ -40,13 +36,18 @@ from repositories.logs_repository import LogsRepository
 from repositories.lot_repository import LotRepositorie
 from repositories.panier_reception_resipository import PanierReceptionRepository
 from services import constant
+from services.claim_service import ClaimScope, ClaimService
 from services.constant import CategorieId, OcrLibrary, StatusNew
 from services.easy_ocr_service import EasyOcrService
+from services.image_budget_service import BudgetedImage
 from services.image_service import ImageService
+from services.lazy_import import lazy_import
 from services.logger import Logger
 from services.ocr_service import OCRService
 from services.openai_service import OpenAIService
+from services.settings_service import SettingsService
 from services.openai_service_vision import OpenAIServiceVision
+from services.prompt_registry import PromptRegistry
 from services.utils_service import UtilsService
 from services.validation_service import ValidationService
 from repositories.ai_ocr_prompts_repository import AiOcrPromptsRepository
@@ -57,14 +58,17 @@ import json
 load_dotenv()
 logger = Logger.get_logger()
 
+PyPDF2 = lazy_import("PyPDF2")
+pytesseract = lazy_import("pytesseract")
+
 IMAGE_BASE = os.getenv("IMAGE_BASE", r"//NAS/intranet images/IMAGES_V2/images")
 IMAGE_COMPTABILISEE_BASE = os.getenv(
     "IMAGE_COMPTABILISEE_BASE",
     r"//NAS/images/Images comptabilisées"
 )
 
-# Service OCR global (pour éviter la réinitialisation)
-easy_ocr_service = EasyOcrService()
+# Classification et extraction en un seul appel Vision
+COMBINED_VISION = os.getenv("AI_VISION_COMBINED", "0") == "1"
 
 
 class TerminatePoolException(Exception):
@@ -180,18 +184,36 @@ class ImageProcessor:
             num_pages = image_data.get('nbpage', 1)
             # Extraction du texte
             # text = self._extract_text(local_path, image_data['name'])
-            # Validation de la classification
-            classification = self._validate_classify_document("", image_data, prompts['ai_prompt_classification'])
+            # Image Vision préparée une seule fois pour tous les appels du document
+            vision_image = self.openai_vision_service.prepare_image(image_data['path'])
+            invoice_content = None
+            if COMBINED_VISION:
+                # Classification et extraction (catégorie supposée) en un appel
+                classification, invoice_content = self._classify_and_extract(
+                    image_data, prompts, vision_image
+                )
+            else:
+                # Validation de la classification
+                classification = self._validate_classify_document(
+                    "", image_data, prompts['ai_prompt_classification'], vision_image
+                )
 
             # Construction des données de résultat
             data = self._build_classification_data(classification, image_data)
-            prompt_extract_content = prompts['ai_prompt_extract_content']
+            prompt_extract_content = self._get_extract_prompt(prompts, data.get('categorie_id'))
 
-            if data.get('categorie_id') == CategorieId.BANQUE:
-                with open('services/prompts/banque.md', 'r', encoding='utf-8') as f:
-                    prompt_extract_content = f.read()
+            if invoice_content is not None and data.get('categorie_id') != image_data['categorie_id']:
+                logger.info(
+                    f"Catégorie {data.get('categorie_id')} différente de la catégorie supposée "
+                    f"{image_data['categorie_id']}, extraction dédiée"
+                )
+                invoice_content = None
+            
             # Extraction du contenu de la facture
-            invoice_content = self._extract_invoice_content("", image_data, prompt_extract_content)
+            if invoice_content is None:
+                invoice_content = self._extract_invoice_content(
+                    "", image_data, prompt_extract_content, vision_image
+                )
                 
             if data.get('categorie_id') == CategorieId.FOURNISSEUR:
                 invoice_content = self.validation_service.content_validation(invoice_content, image_data)
@@ -234,11 +256,8 @@ class ImageProcessor:
             )
 
     def _check_service_power(self) -> None:
-        """Vérifie si le service est actif."""
-        settings_repo = AiSeparationSettingRepository()
-        current_settings = settings_repo.get_ai_separation_setting(setting_id=2)
-        
-        if current_settings.get('power', 1) != 1:
+        """Vérifie si le service est actif (paramètres en cache, voir SettingsService)."""
+        if not SettingsService.get_instance(setting_id=2).is_active():
             logger.warning("Service désactivé - arrêt du traitement")
             raise TerminatePoolException("Service désactivé")
 
@@ -299,7 +318,7 @@ class ImageProcessor:
 
     def _get_page_count(self, path: str, name: str) -> int:
         """Compte le nombre de pages du PDF."""
-        reader = PdfReader(path)
+        reader = PyPDF2.PdfReader(path)
         num_pages = len(reader.pages)
         
         logger.info(f"Nombre de pages: {num_pages}")
@@ -322,7 +341,7 @@ class ImageProcessor:
         # Extraction selon la bibliothèque configurée
         if ocr_library == OcrLibrary.EASYOCR.value:
             logger.info(f"Extraction EasyOCR pour {name}")
-            text = easy_ocr_service.extract_text(converted_path)
+            text = EasyOcrService.get_instance().extract_text(converted_path)
             
         elif ocr_library == OcrLibrary.DOCUMENT_AI.value:
             logger.info(f"Extraction Document AI pour {name}")
@@ -337,6 +356,11 @@ class ImageProcessor:
             logger.info(f"Extraction Pytesseract personnalisé pour {name}")
             text = self.ocr_service.extract_from_image(converted_path)
             
+        elif ocr_library == OcrLibrary.CUSTOM_PYTESSERACT_MULTI.value:
+            logger.info(f"Extraction Pytesseract multi-stratégies pour {name}")
+            text, confidence = self.ocr_service.extract_from_image_multi(converted_path)
+            logger.info(f"Confiance OCR: {confidence:.1f}")
+            
         else:
             logger.info(f"Extraction Pytesseract standard pour {name}")
             text = pytesseract.image_to_string(converted_path, lang='fra')
@@ -348,7 +372,8 @@ class ImageProcessor:
         self,
         text: str,
         image_data: dict,
-        prompt: str
+        prompt: str,
+        vision_image: Optional[BudgetedImage] = None
     ) -> dict:
         """Classifie le document via OpenAI."""
         logger.info(f"Classification IA pour {image_data['name']}")
@@ -359,16 +384,58 @@ class ImageProcessor:
             image_path=image_data['path'],
             image=image_data,
             model=self.ai_settings.get('model', 'gpt-4o-mini'),
+            vision_image=vision_image,
         )
         
         logger.info(f"Classification terminée pour {image_data['name']}")
         return response
 
+    def _classify_and_extract(
+        self,
+        image_data: dict,
+        prompts: dict,
+        vision_image: Optional[BudgetedImage] = None
+    ) -> tuple[dict, Optional[dict]]:
+        """
+        Classifie le document et extrait son contenu en un seul appel,
+        l'extraction étant demandée pour la catégorie actuelle de l'image.
+        
+        Returns:
+            La classification et le contenu extrait (None si le modèle
+            retient une autre catégorie).
+        """
+        logger.info(f"Classification et extraction IA pour {image_data['name']}")
+        logger.info(f"Modèle utilisé: {self.ai_settings.get('model')}")
+        
+        classification, invoice_content = self.openai_vision_service.categorisation_with_extraction(
+            image_path=image_data['path'],
+            image=image_data,
+            model=self.ai_settings.get('model', 'gpt-4o-mini'),
+            prompt_classification=prompts['ai_prompt_classification'] or self.ai_settings.get('prompt_systeme'),
+            prompt_extraction=(
+                self._get_extract_prompt(prompts, image_data['categorie_id'])
+                or self.ai_settings.get('prompt_details')
+            ),
+            expected_categorie_id=image_data['categorie_id'],
+            vision_image=vision_image,
+        )
+        
+        logger.info(f"Classification et extraction terminées pour {image_data['name']}")
+        return classification, invoice_content
+
+    @staticmethod
+    def _get_extract_prompt(prompts: dict, categorie_id: Optional[int]) -> str:
+        """Retourne le prompt d'extraction de la catégorie (prompt dédié pour la banque)."""
+        if categorie_id == CategorieId.BANQUE:
+            return PromptRegistry.get_instance().load('services/prompts/banque.md').text
+        return prompts['ai_prompt_extract_content']
+
     def _extract_invoice_content( 
         self,
         text: str,
         image_data: dict,
-        prompt: str
+        prompt: str,
+        vision_image: Optional[BudgetedImage] = None
     ) -> dict:
         """Extrait le contenu de la facture via OpenAI."""
         logger.info(f"Extraction du contenu de la facture pour {image_data['name']}")
@@ -379,6 +446,7 @@ class ImageProcessor:
             image_path=image_data['path'],
             image=image_data,
             model=self.ai_settings.get('model', 'gpt-4o-mini'),
+            vision_image=vision_image,
         )
         
         logger.info(f"Extraction du contenu de la facture terminée pour {image_data['name']}")
@@ -549,31 +617,34 @@ def main() -> None:
     try:
         # Initialisation des repositories
         image_repo = ImageRepositorie()
-        settings_repo = AiSeparationSettingRepository()
         
         # Récupération des paramètres
-        ai_settings = settings_repo.get_ai_separation_setting(setting_id=2)
+        ai_settings = SettingsService.get_instance(setting_id=2).get_settings(force_refresh=True)
         
         if not ai_settings or ai_settings.get('power', 1) != 1:
             logger.warning("Service IA désactivé ou non configuré")
             return
         
-        # Récupération des images à traiter
-        images = image_repo.get_image_to_process(for_validation=True)
+        # Récupération des images à traiter, hors images réservées par un autre worker
+        claims = ClaimService(ClaimScope.VALIDATION)
+        images = image_repo.get_image_to_process(for_validation=True, claim_scope=claims.scope)
        
         num_processes = ai_settings.get('thread_number', 1)
         
-        logger.info(f"Démarrage du traitement avec {num_processes} processus")
-        logger.info(f"Images à traiter: {len(images)}")
-        
-        # Traitement parallèle
-        with Pool(processes=num_processes) as pool:
-            process_func = partial(
-                process_single_image,
-                ai_separation_setting=ai_settings,
-                prompt=ai_settings.get('prompt_systeme')
-            )
-            results = pool.map(process_func, images)
+        with claims:
+            images = claims.claim(images)
+            
+            logger.info(f"Démarrage du traitement avec {num_processes} processus")
+            logger.info(f"Images à traiter: {len(images)}")
+            
+            # Traitement parallèle
+            with Pool(processes=num_processes) as pool:
+                process_func = partial(
+                    process_single_image,
+                    ai_separation_setting=ai_settings,
+                    prompt=ai_settings.get('prompt_systeme')
+                )
+                results = pool.map(process_func, images)
         
         # Analyse des résultats
         successful = len(results)
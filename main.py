@@ -13,39 +13,48 @@ import argparse
 import asyncio
 import multiprocessing
 import os
-import shutil
+import queue
 import sys
+import threading
 import time
-from collections import defaultdict
-from dataclasses import dataclass
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from functools import partial
+from itertools import islice
 from multiprocessing import Pool
 from pathlib import Path
 from typing import Any, Optional
 
-from numpy import imag
-import pytesseract
+# Début du chargement du module (durée des imports journalisée au démarrage)
+_IMPORT_STARTED_AT = time.perf_counter()
+
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader
 
-from repositories.ai_separation_repository import AiSeparationRepository
-from repositories.ai_separation_setting_repository import AiSeparationSettingRepository
 from repositories.categorie_repositorie import CategorieRepositorie
 from repositories.decoupage_niveau1_controle_repository import DecoupageNiveau1ControleRepositorie
 from repositories.decoupage_niveau2_controle_repository import DecoupageNiveau2ControleRepositorie
-from repositories.decoupage_niveau2_repositorie import DecoupageNiveau2Repositorie
 from repositories.image_repository import ImageRepositorie
+from repositories.image_result_repository import ImageResultWrite
 from repositories.logs_repository import LogsRepository
 from repositories.lot_repository import LotRepositorie
 from repositories.panier_reception_resipository import PanierReceptionRepository
 from services import constant
+from services.claim_service import ClaimScope, ClaimService
 from services.constant import CategorieId, OcrLibrary, StatusNew
+from services.easy_ocr_batch_service import EasyOcrBatchClient, EasyOcrBatchService
 from services.easy_ocr_service import EasyOcrService
+from services.file_staging_service import FileStagingService, StagedFile
 from services.image_service import ImageService
+from services.lazy_import import lazy_import
 from services.logger import Logger
 from services.ocr_service import OCRService
 from services.openai_service import OpenAIService
+from services.persistence_service import PersistenceService
+from services.prefetch_service import PrefetchService
+from services.publish_service import PublishService
+from services.settings_service import SettingsService
 from services.utils_service import UtilsService
 from services.validation_service import ValidationService
 
@@ -53,18 +62,51 @@ from services.validation_service import ValidationService
 load_dotenv()
 logger = Logger.get_logger()
 
+PyPDF2 = lazy_import("PyPDF2")
+
+IMPORT_DURATION = time.perf_counter() - _IMPORT_STARTED_AT
+
 IMAGE_BASE = os.getenv("IMAGE_BASE", r"//NAS/intranet images/IMAGES_V2/images")
 IMAGE_COMPTABILISEE_BASE = os.getenv(
     "IMAGE_COMPTABILISEE_BASE",
     r"//NAS/images/Images comptabilisées"
 )
 
-# Service OCR global (pour éviter la réinitialisation)
-easy_ocr_service = EasyOcrService()
+# Attente maximale des publications NAS en fin de traitement (secondes)
+PUBLISH_DRAIN_TIMEOUT = float(os.getenv("AI_PUBLISH_DRAIN_TIMEOUT", 120))
+
+# Classification sur l'en-tête, sur la page entière si l'en-tête est trop
+# pauvre ou mal lu (le texte de la page entière est toujours conservé)
+HEADER_FIRST = os.getenv("AI_OCR_HEADER_FIRST", "0") == "1"
+HEADER_FRACTION = float(os.getenv("AI_OCR_HEADER_FRACTION", 0.3))
+HEADER_MIN_WORDS = int(os.getenv("AI_OCR_HEADER_MIN_WORDS", 30))
+HEADER_MIN_CONFIDENCE = float(os.getenv("AI_OCR_HEADER_MIN_CONFIDENCE", 70))
+
+# Rendu à résolution réduite, nouveau rendu haute résolution si la confiance OCR est faible
+OCR_DPI = int(os.getenv("AI_OCR_DPI", 200))
+OCR_HIGH_DPI = int(os.getenv("AI_OCR_HIGH_DPI", 300))
+OCR_RERENDER_CONFIDENCE = float(os.getenv("AI_OCR_RERENDER_CONFIDENCE", 60))
+
+# Couche texte des PDF natifs utilisée sans OCR lorsqu'elle est exploitable
+TEXT_LAYER_FIRST = os.getenv("AI_TEXT_LAYER", "1") == "1"
+
+# Démarrage des workers: forkserver sous Linux, spawn ailleurs
+START_METHOD = os.getenv(
+    "AI_START_METHOD",
+    "forkserver" if sys.platform.startswith("linux") else "spawn"
+)
+# Modules chargés une seule fois dans le forkserver, hérités par chaque worker
+# (bibliothèques avant "__main__", dont les imports sont différés)
+FORKSERVER_PRELOAD = [
+    "cv2", "numpy", "pytesseract", "PyPDF2", "openai", "Levenshtein",
+    "mysql.connector", "__main__",
+]
+# Pool de workers conservé d'un cycle à l'autre
+PERSISTENT_POOL = os.getenv("AI_PERSISTENT_POOL", "1") == "1"
 
 
 class TerminatePoolException(Exception):
-    """Exception levée pour arrêter le pool de workers."""
+    """Exception levée pour annuler un traitement lorsque le service est désactivé."""
     pass
 
 
@@ -77,6 +119,9 @@ class ProcessingResult:
     status_new: int
     success: bool = True
     error_message: Optional[str] = None
+    child_images: list[dict] = field(default_factory=list)
+    cancelled: bool = False
+    pending_write: Optional[dict] = None
 
 
 @dataclass
@@ -101,10 +146,6 @@ class ImageProcessor:
     # Limites de traitement
     MAX_PAGES: int = 10
     MAX_CHILD_IMAGES: int = 2
-    
-    # Paramètres de copie
-    MAX_COPY_ATTEMPTS: int = 5
-    COPY_RETRY_DELAY: float = 0.6
 
     def __init__(self, ai_settings: dict):
         """
@@ -121,87 +162,126 @@ class ImageProcessor:
         """Initialise les services nécessaires."""
         self.image_service = ImageService()
         self.openai_service = OpenAIService()
-        self.ocr_service = OCRService()
+        self.ocr_service = OCRService(worker_processes=self.ai_settings.get('thread_number', 1))
         self.utils_service = UtilsService()
         self.validation_service = ValidationService()
+        self.persistence_service = PersistenceService(batch_size=1)
+        self.file_staging_service = FileStagingService()
+        self.publish_service = PublishService.get_instance()
 
     def _init_repositories(self) -> None:
         """Initialise les repositories nécessaires."""
-        self.ai_separation_repo = AiSeparationRepository()
         self.image_repo = ImageRepositorie()
-        self.decoupage_niveau2_repo = DecoupageNiveau2Repositorie()
         self.decoupage_niveau1_controle_repo = DecoupageNiveau1ControleRepositorie()
         self.decoupage_niveau2_controle_repo = DecoupageNiveau2ControleRepositorie()
 
+    def _reset_transactions(self) -> None:
+        """
+        Termine la transaction en cours de chaque repository.
+        
+        Le processeur est conservé d'une image à l'autre (voir
+        ``get_processor``): sans autocommit et en REPEATABLE READ, une
+        connexion relirait sinon l'instantané de sa première lecture
+        (lignes de découpage ajoutées depuis invisibles).
+        """
+        for repository in (
+            self.image_repo,
+            self.decoupage_niveau1_controle_repo,
+            self.decoupage_niveau2_controle_repo,
+        ):
+            try:
+                repository.connection.commit()
+            except Exception as e:
+                logger.warning(f"Réinitialisation de la transaction impossible: {e}")
+
     def process(
         self,
         image_data: dict,
         prompt: Optional[str] = None,
-        is_decoupage: bool = False
+        is_decoupage: bool = False,
+        defer_persistence: bool = False
     ) -> ProcessingResult:
         """
         Traite une image et retourne le résultat.
         
+        Les images enfants (découpage) ne sont pas traitées ici: elles sont
+        renvoyées dans ``child_images`` pour être réinjectées dans
+        l'ordonnanceur comme des unités de travail indépendantes.
+        
+        L'état du service est vérifié entre chaque étape coûteuse: si le
+        service est désactivé avant la persistance, le traitement est
+        annulé (``cancelled``) sans modifier la base; une fois la
+        persistance commencée, l'image est menée à son terme.
+        
         Args:
             image_data: Métadonnées de l'image à traiter.
             prompt: Prompt personnalisé (optionnel).
+            defer_persistence: Retourne les écritures en base dans
+                ``pending_write`` au lieu de les exécuter.
             
         Returns:
             Résultat du traitement.
         """
+        staged: Optional[StagedFile] = None
+
         try:
+            self._reset_transactions()
             # Vérification du statut du service
             self._check_service_power()
             # Vérification des images enfants
             child_images = self._check_child_images(image_data)
-        
-            for child_image in child_images:
-                self.process(child_image, prompt=prompt, is_decoupage=is_decoupage)
 
             if (image_data.get('decouper', 0) == 1 or not image_data.get('is_child', False)) and len(child_images) > 0:
                 return ProcessingResult(
                     image_id=image_data['id'],
                     categorie_id=image_data['categorie_id'],
                     lot_id=image_data['lot_id'],
-                    status_new=image_data['status_new']
+                    status_new=image_data['status_new'],
+                    child_images=child_images
                 )
 
             # Préparation des chemins
             paths = self._prepare_paths(image_data)
 
-            # Localisation et copie du fichier
-            local_path, is_local = self._prepare_image_file(image_data, paths)
+            # Localisation et préparation du fichier
+            staged = self._prepare_image_file(image_data, paths)
             
             # Vérification du nombre de pages
-            num_pages = self._get_page_count(local_path, image_data['name'])
+            reader = PyPDF2.PdfReader(str(staged.path))
+            num_pages = self._get_page_count(reader)
                 
-            # Extraction du texte
-            text = self._extract_text(local_path, image_data['name'])
-                
-            # Classification IA
-            classification = self._classify_document(text, image_data, prompt)
+            # Extraction du texte et classification IA
+            self._check_service_power()
+            text, classification, ocr_metrics = self._extract_and_classify(
+                staged, image_data, prompt, reader
+            )
                 
             # Construction des données de résultat
             data = self._build_classification_data(classification, image_data)
+            data.update(ocr_metrics)
                 
             # Validation et affinement
             data = self._validate_classification(data, image_data, text)
             
+            # Dernier point d'annulation avant écriture
+            self._check_service_power()
+
             # Sauvegarde OCR
             self._save_ocr_content(text, paths.output_path, image_data['name'])
                 
             # Persistance en base de données
-            image_updated = self._persist_results(data, image_data, num_pages, paths)
+            image_updated, pending_write = self._persist_results(
+                data, image_data, num_pages, paths, defer=defer_persistence
+            )
 
             try:
                 # Copie des fichiers
-                self._copy_files(image_data, paths)
+                self._copy_files(staged, paths)
             except Exception as e:
                 logger.error(e)
                 
             # Nettoyage
-            if is_local:
-                self._cleanup_local_files(local_path)
+            self.file_staging_service.cleanup(staged)
                 
             logger.info(f"Image traitée avec succès: {image_data['name']}")
             logger.info("=" * 80)
@@ -210,13 +290,28 @@ class ImageProcessor:
                 image_id=image_updated['id'],
                 categorie_id=image_updated['categorie_id'],
                 lot_id=image_updated['lot_id'],
-                status_new=image_updated['status_new']
+                status_new=image_updated['status_new'],
+                pending_write=pending_write.to_dict() if pending_write else None
             )
             
-        except TerminatePoolException:
-            raise
+        except TerminatePoolException as e:
+            logger.warning(f"Traitement annulé pour {image_data['name']}: {e}")
+            if staged:
+                self.file_staging_service.cleanup(staged)
+
+            return ProcessingResult(
+                image_id=image_data['id'],
+                categorie_id=image_data.get('categorie_id'),
+                lot_id=image_data['lot_id'],
+                status_new=image_data['status_new'],
+                success=False,
+                error_message=str(e),
+                cancelled=True
+            )
         except Exception as e:
             logger.critical(f"Erreur critique pour {image_data['name']}: {e}")
+            if staged:
+                self.file_staging_service.cleanup(staged)
             
             return ProcessingResult(
                 image_id=image_data['id'],
@@ -228,11 +323,13 @@ class ImageProcessor:
             )
 
     def _check_service_power(self) -> None:
-        """Vérifie si le service est actif."""
-        settings_repo = AiSeparationSettingRepository()
-        current_settings = settings_repo.get_ai_separation_setting()
+        """
+        Vérifie si le service est actif (paramètres en cache, voir SettingsService).
         
-        if current_settings.get('power', 1) != 1:
+        Raises:
+            TerminatePoolException: Si le service est désactivé.
+        """
+        if not SettingsService.get_instance().is_active():
             logger.warning("Service désactivé - arrêt du traitement")
             raise TerminatePoolException("Service désactivé")
 
@@ -302,13 +399,7 @@ class ImageProcessor:
 
     def _prepare_paths(self, image_data: dict) -> ProcessingPaths:
         """Prépare les chemins de sortie."""
-        date_scan = self._parse_date(image_data['date_scan'])
-        
-        year = str(date_scan.year)
-        month = str(date_scan.month).zfill(2)
-        day = str(date_scan.day).zfill(2)
-        
-        output_path = f"{IMAGE_BASE}/{year}/{month}/{day}"
+        output_path = self.get_output_path(image_data)
         
         comptabiliser_output_path = (
             f"{IMAGE_COMPTABILISEE_BASE}/"
@@ -332,8 +423,8 @@ class ImageProcessor:
         self,
         image_data: dict,
         paths: ProcessingPaths
-    ) -> tuple[str, bool]:
-        """Prépare le fichier image pour le traitement."""
+    ) -> StagedFile:
+        """Prépare le fichier image pour le traitement (copie locale ou lecture directe)."""
         # Localisation du fichier source
         image_data['path'] = self.image_service.get_image_path(
             image_data, "pdf", paths.output_path
@@ -341,53 +432,203 @@ class ImageProcessor:
         
         logger.info(f"Traitement de l'image: {image_data['name']}")
         
-        # Copie locale
-        local_path, is_local = self.image_service.copy_the_image(
-            image_data, paths.local_output_path
+        name_key = 'nom' if image_data.get('is_child', False) else 'name'
+        staged = self.file_staging_service.stage(
+            image_data['path'],
+            paths.local_output_path,
+            filename=f"{image_data.get(name_key, '')}.{image_data.get('ext_image', 'pdf')}",
+            prefetched=PrefetchService.prefetched_path(image_data['id'])
         )
         
-        logger.info(f"Chemin local: {local_path}")
-        image_data["path"] = local_path
+        logger.info(f"Chemin de lecture: {staged.path}")
+        image_data["path"] = staged.path
         
-        return str(local_path), is_local
+        return staged
 
-    def _get_page_count(self, path: str, name: str) -> int:
+    def _get_page_count(self, reader: "PyPDF2.PdfReader") -> int:
         """Compte le nombre de pages du PDF."""
-        reader = PdfReader(path)
         num_pages = len(reader.pages)
         
         logger.info(f"Nombre de pages: {num_pages}")
         return num_pages
 
-    def _extract_text(self, image_path: str, name: str) -> str:
-        """Extrait le texte du document via OCR."""
-        ocr_library = self.ai_settings.get('ocr_library', 'tesseract')
+    def _extract_text_layer(self, reader: "PyPDF2.PdfReader", name: str) -> Optional[str]:
+        """
+        Extrait la couche texte de la première page d'un PDF natif.
+        
+        Returns:
+            Le texte s'il est jugé exploitable, sinon None (OCR nécessaire).
+        """
+        try:
+            text = reader.pages[0].extract_text() or ""
+        except Exception as e:
+            logger.debug(f"Couche texte illisible pour {name}: {e}")
+            return None
         
-        # Conversion PDF -> Image
+        if not self.validation_service.is_text_layer_usable(text):
+            return None
+        
+        logger.info(f"Couche texte utilisée sans OCR pour {name}")
+        return text
+
+    def _convert_to_image(
+        self,
+        image_path: str,
+        work_dir: Optional[str] = None,
+        dpi: int = OCR_DPI
+    ) -> str:
+        """Convertit la première page du PDF en image (dans le répertoire de travail local)."""
         converted_path, _ = asyncio.run(
             self.utils_service.convert_pdf_to_images(
                 image_path,
-                os.path.dirname(image_path)
+                work_dir or os.path.dirname(image_path),
+                {'density': dpi}
             )
         )
         
-        logger.info(f"Image convertie: {converted_path}")
+        logger.info(f"Image convertie ({dpi} DPI): {converted_path}")
+        return converted_path
+
+    def _ocr_image(self, converted_path: str, name: str) -> tuple[str, Optional[float]]:
+        """
+        Extrait le texte d'une image selon la bibliothèque OCR configurée.
+        
+        Returns:
+            Le texte et la confiance moyenne des mots (None si la
+            bibliothèque ne la fournit pas).
+        """
+        ocr_library = self.ai_settings.get('ocr_library', 'tesseract')
+        confidence = None
         
         # Extraction selon la bibliothèque configurée
         if ocr_library == OcrLibrary.EASYOCR.value:
             logger.info(f"Extraction EasyOCR pour {name}")
-            text = easy_ocr_service.extract_text(converted_path)
+            if EasyOcrBatchClient.is_available():
+                text = EasyOcrBatchClient.extract_text(converted_path)
+            else:
+                text = EasyOcrService.get_instance().extract_text(converted_path)
             
         elif ocr_library == OcrLibrary.CUSTOM_PYTESSERACT.value:
             logger.info(f"Extraction Pytesseract personnalisé pour {name}")
-            text = self.ocr_service.extract_from_image(converted_path)
+            text, confidence = self.ocr_service.extract_from_image_with_confidence(converted_path)
+            
+        elif ocr_library == OcrLibrary.CUSTOM_PYTESSERACT_MULTI.value:
+            logger.info(f"Extraction Pytesseract multi-stratégies pour {name}")
+            text, confidence = self.ocr_service.extract_from_image_multi(converted_path)
             
         else:
             logger.info(f"Extraction Pytesseract standard pour {name}")
-            text = pytesseract.image_to_string(converted_path, lang='fra')
+            text, confidence = self.ocr_service.extract_data_with_config(
+                converted_path, lang='fra', psm=3, oem=3
+            )
         
+        if confidence is not None:
+            logger.info(f"Confiance OCR: {confidence:.1f}")
         logger.info(f"Extraction terminée pour {name}")
-        return text
+        return text, confidence
+
+    def _ocr_page(self, staged: StagedFile, converted_path: str, name: str) -> tuple[str, dict]:
+        """
+        Lit la page entière, avec un nouveau rendu à ``OCR_HIGH_DPI`` si la
+        confiance obtenue au rendu par défaut est inférieure à
+        ``OCR_RERENDER_CONFIDENCE``. Une page sans aucun mot reconnu (page
+        blanche) n'est pas relue.
+        
+        Returns:
+            Le texte retenu et les métriques OCR (``ocr_dpi``, ``ocr_confidence``).
+        """
+        text, confidence = self._ocr_image(converted_path, name)
+        dpi = OCR_DPI
+        
+        if (
+            confidence is not None
+            and confidence < OCR_RERENDER_CONFIDENCE
+            and OCR_HIGH_DPI > OCR_DPI
+            and text.strip()
+        ):
+            logger.info(
+                f"Confiance {confidence:.1f} < {OCR_RERENDER_CONFIDENCE}, "
+                f"nouveau rendu à {OCR_HIGH_DPI} DPI"
+            )
+            self._check_service_power()
+            high_path = self._convert_to_image(str(staged.path), staged.work_dir, dpi=OCR_HIGH_DPI)
+            if high_path:
+                high_text, high_confidence = self._ocr_image(high_path, name)
+                if high_confidence is not None and high_confidence > confidence:
+                    text, confidence, dpi = high_text, high_confidence, OCR_HIGH_DPI
+        
+        return text, {
+            'ocr_dpi': dpi,
+            'ocr_confidence': round(confidence, 2) if confidence is not None else None,
+        }
+
+    def _extract_and_classify(
+        self,
+        staged: StagedFile,
+        image_data: dict,
+        prompt: Optional[str],
+        reader: Optional["PyPDF2.PdfReader"] = None
+    ) -> tuple[str, dict, dict]:
+        """
+        Extrait le texte puis classifie le document.
+        
+        Si la couche texte de la première page est exploitable
+        (``AI_TEXT_LAYER``), elle est utilisée directement, sans rendu ni OCR.
+        
+        En mode en-tête (``AI_OCR_HEADER_FIRST=1``), seule la partie haute
+        de la page (``AI_OCR_HEADER_FRACTION``) est d'abord lue; elle est
+        classifiée seule si elle compte au moins ``AI_OCR_HEADER_MIN_WORDS``
+        mots et, lorsque la bibliothèque OCR la fournit, une confiance
+        moyenne d'au moins ``AI_OCR_HEADER_MIN_CONFIDENCE`` (un seul appel de
+        classification dans les deux cas). La page entière est toujours lue
+        et son texte retenu (fichier OCR, validation): lorsque l'en-tête
+        suffit, elle est lue pendant sa classification.
+        
+        La page est rendue à ``AI_OCR_DPI``; voir ``_ocr_page`` pour le
+        nouveau rendu haute résolution.
+        
+        Returns:
+            Le texte retenu, la réponse de classification et les métriques OCR.
+        """
+        if TEXT_LAYER_FIRST and reader is not None:
+            text = self._extract_text_layer(reader, image_data['name'])
+            if text is not None:
+                self._check_service_power()
+                classification = self._classify_document(text, image_data, prompt)
+                return text, classification, {'ocr_dpi': None, 'ocr_confidence': None}
+        
+        converted_path = self._convert_to_image(str(staged.path), staged.work_dir)
+        
+        if HEADER_FIRST and converted_path:
+            header_path = self.utils_service.crop_top(converted_path, HEADER_FRACTION)
+            try:
+                text, confidence = self._ocr_image(header_path, image_data['name'])
+            finally:
+                os.remove(header_path)
+            
+            words = len(text.split())
+            if words >= HEADER_MIN_WORDS and (confidence is None or confidence >= HEADER_MIN_CONFIDENCE):
+                logger.info(f"Classification sur l'en-tête ({words} mots)")
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr-page") as executor:
+                    full_page = executor.submit(
+                        self._ocr_page, staged, converted_path, image_data['name']
+                    )
+                    self._check_service_power()
+                    classification = self._classify_document(text, image_data, prompt)
+                    text, ocr_metrics = full_page.result()
+                return text, classification, ocr_metrics
+            
+            logger.info(
+                f"En-tête insuffisant ({words} mots, confiance {confidence}), "
+                f"lecture de la page entière"
+            )
+            self._check_service_power()
+        
+        text, ocr_metrics = self._ocr_page(staged, converted_path, image_data['name'])
+        
+        self._check_service_power()
+        classification = self._classify_document(text, image_data, prompt)
+        return text, classification, ocr_metrics
 
     def _classify_document(
         self,
@@ -492,29 +733,45 @@ class ImageProcessor:
         output_path: str,
         name: str
     ) -> None:
-        """Sauvegarde le contenu OCR dans un fichier."""
+        """Sauvegarde le contenu OCR dans un fichier (publication asynchrone, voir PublishService)."""
         prefix = self.ai_settings.get('prefix', '')
-        ocr_path = f"{output_path}/{name}{prefix}.ocr"
-        
-        with open(ocr_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        self.publish_service.publish_text(text, f"{name}{prefix}.ocr", [output_path])
 
     def _persist_results(
         self,
         data: dict,
         image_data: dict,
         num_pages: int,
-        paths: ProcessingPaths
-    ) -> dict:
-        """Persiste les résultats en base de données."""
-        # Insertion du découpage niveau 2
+        paths: ProcessingPaths,
+        defer: bool = False
+    ) -> tuple[dict, Optional[ImageResultWrite]]:
+        """
+        Persiste les résultats en base de données.
+        
+        Toutes les écritures de l'image (découpage, séparation IA, mise à
+        jour de l'image, logs) sont faites dans une seule transaction.
+        
+        Args:
+            data: Données de classification.
+            image_data: Métadonnées de l'image.
+            num_pages: Nombre de pages du document.
+            paths: Chemins de traitement.
+            defer: Si True, les écritures sont retournées au lieu d'être
+                exécutées, pour être groupées par l'ordonnanceur.
+            
+        Returns:
+            Tuple contenant l'image mise à jour (prévisionnelle si ``defer``)
+            et les écritures différées (None si déjà persistées).
+        """
         image_id = image_data.get('parent_id', '') if image_data.get('parent_id', '') else image_data.get('id', '')
         nomdecoupee = image_data.get('name', '') if image_data.get('parent_name', '') else None
         mere = image_data.get('mere', None)
-   
-        decoupage_niveau2 = self.decoupage_niveau2_repo.insert_decoupage_niveau2(
-            image_id,
-            {
+
+        write = ImageResultWrite(
+            image_id=image_data['id'],
+            name=image_data['name'],
+            decoupage_image_id=image_id,
+            decoupage={
                 "num_page": num_pages,
                 "image_id": image_id,
                 "nomdecoupee": nomdecoupee,
@@ -523,97 +780,46 @@ class ImageProcessor:
                 "categorie_id": data.get('categorie_id'),
                 "sous_categorie_id": data.get('sous_categorie_id'),
                 "sous_sous_categorie_id": data.get('sous_sous_categorie_id')
-            }
+            },
+            separation=data,
+            status=StatusNew.FINISHED
         )
 
-        data['explication'] += decoupage_niveau2.get('explication', "")
-        
-        # Insertion de la séparation IA
-        ai_separation = self.ai_separation_repo.add_ai_separation(data)
-        if not ai_separation:
-            raise ValueError(f"Échec d'insertion ai_separation pour {image_data['name']}")
-        
-        # Mise à jour de l'image
-        image_updated = {
-            "id": image_data.get('id'),
-            "categorie_id": image_data.get('categorie_id'),
-            "lot_id": image_data.get('lot_id'),
-            "status_new": image_data.get('status_new')
-        }
-        
-        image_updated = self.image_repo.update_image(
-            image_data['id'],
-            data,
-            status=StatusNew.FINISHED
-        )       
-            
-        if not image_updated:
-            raise ValueError(f"Échec de mise à jour image pour {image_data['name']}")
-            
-        # Logging et contrôle
-        self._log_image_action(image_updated)
-        
-        return image_updated
+        if defer:
+            image_updated = {
+                "id": image_data['id'],
+                "categorie_id": data.get('categorie_id'),
+                "lot_id": image_data['lot_id'],
+                "status_new": StatusNew.FINISHED
+            }
+            return image_updated, write
 
-    def _log_image_action(self, image_updated: dict) -> None:
-        """Log l'action sur l'image."""
-        try:
-            log_repo = LogsRepository()
-            log_repo.log_action(
-                utilisateur_id=constant.GENZ_USER_ID,
-                image_id=image_updated['id']
-            )
-        except Exception as e:
-            logger.warning(f"Erreur de logging pour image {image_updated['id']}: {e}")
+        return self.persistence_service.save(write), None
 
     def _copy_files(
         self,
-        image_data: dict,
+        staged: StagedFile,
         paths: ProcessingPaths
     ) -> None:
-        """Copie les fichiers vers les destinations finales."""
-        last_error: Optional[Exception] = None
+        """Publie le fichier source vers les destinations finales (publication asynchrone, voir PublishService)."""
+        logger.info("copy image")
+        self.publish_service.publish_file(
+            staged.source,
+            staged.name,
+            [paths.output_path, paths.comptabiliser_output_path],
+            local_copy=staged.path if staged.is_local else None
+        )
+
+    @classmethod
+    def get_output_path(cls, image_data: dict) -> str:
+        """Répertoire de sortie d'une image (par date de scan)."""
+        date_scan = cls._parse_date(image_data['date_scan'])
         
-        for attempt in range(self.MAX_COPY_ATTEMPTS):
-            try:
-                logger.info("copy image")
-                shutil.copy2(image_data['path'], paths.output_path)
-                
-                # Copie vers comptabilisé si nécessaire
-      
-                os.makedirs(paths.comptabiliser_output_path, exist_ok=True)
-                shutil.copy2(image_data['path'], paths.comptabiliser_output_path)
-                
-                return
-                
-            except PermissionError as e:
-                last_error = e
-            except OSError as e:
-                if getattr(e, 'winerror', None) == 32 or "used by another process" in str(e):
-                    last_error = e
-                else:
-                    raise
-            
-            time.sleep(self.COPY_RETRY_DELAY)
+        year = str(date_scan.year)
+        month = str(date_scan.month).zfill(2)
+        day = str(date_scan.day).zfill(2)
         
-        if last_error:
-            logger.warning(
-                f"Échec de copie après {self.MAX_COPY_ATTEMPTS} tentatives: {last_error}"
-            )
-
-    def _cleanup_local_files(self, local_path: str) -> None:
-        """Nettoie les fichiers locaux temporaires."""
-        try:
-            if os.path.exists(local_path):
-                os.remove(local_path)
-            
-            # Suppression de l'image convertie
-            base_path = Path(local_path)
-            converted_path = base_path.parent / f"{base_path.stem}.ia.jpeg"
-            if converted_path.exists():
-                os.remove(converted_path)
-        except Exception as e:
-            logger.warning(f"Erreur lors du nettoyage: {e}")
+        return f"{IMAGE_BASE}/{year}/{month}/{day}"
 
     @staticmethod
     def _parse_date(date_value) -> datetime:
@@ -623,11 +829,94 @@ class ImageProcessor:
         return date_value
 
 
+def resolve_image_source(image_data: dict) -> Path:
+    """
+    Localise le fichier source d'une image (utilisé par le préchargement).
+    
+    Raises:
+        FileNotFoundError: Si le fichier n'est trouvé dans aucun emplacement.
+    """
+    return ImageService().get_image_path(
+        image_data, "pdf", ImageProcessor.get_output_path(image_data)
+    )
+
+
+def log_worker_startup() -> None:
+    """Journalise la durée de chargement du module dans un worker."""
+    logger.info(f"Worker {os.getpid()} prêt (imports: {IMPORT_DURATION:.2f}s)")
+
+
+def configure_start_method() -> None:
+    """
+    Configure le démarrage des workers.
+    
+    En mode ``forkserver``, les workers sont créés par fork d'un serveur
+    démarré à neuf, qui a préchargé ``FORKSERVER_PRELOAD``: ils démarrent
+    sans réimporter les bibliothèques et n'héritent ni des connexions
+    MySQL ni des threads du processus principal.
+    """
+    method = START_METHOD
+    if method not in multiprocessing.get_all_start_methods():
+        logger.warning(f"Méthode de démarrage {method} indisponible, utilisation de spawn")
+        method = "spawn"
+    
+    multiprocessing.set_start_method(method, force=True)
+    if method == "forkserver":
+        multiprocessing.set_forkserver_preload(FORKSERVER_PRELOAD)
+    logger.info(f"Démarrage des workers: {method}")
+
+
+# Pool persistant du processus principal (PERSISTENT_POOL)
+_worker_pool: Optional[Pool] = None
+_worker_pool_size: int = 0
+
+
+def get_worker_pool(num_processes: int) -> Pool:
+    """
+    Retourne le pool de workers, créé au premier appel et conservé entre
+    les cycles; il est recréé si le nombre de processus change.
+    """
+    global _worker_pool, _worker_pool_size
+    
+    if _worker_pool is not None and _worker_pool_size != num_processes:
+        close_worker_pool()
+    if _worker_pool is None:
+        _worker_pool = Pool(processes=num_processes, initializer=log_worker_startup)
+        _worker_pool_size = num_processes
+    return _worker_pool
+
+
+def close_worker_pool() -> None:
+    """Arrête le pool persistant."""
+    global _worker_pool, _worker_pool_size
+    
+    if _worker_pool is not None:
+        _worker_pool.close()
+        _worker_pool.join()
+        _worker_pool = None
+        _worker_pool_size = 0
+
+
+# Processeur de chaque thread d'un worker, réutilisé d'une image à l'autre
+_processor_state = threading.local()
+
+
+def get_processor(ai_settings: dict) -> "ImageProcessor":
+    """Retourne le processeur du thread courant, recréé si les paramètres IA ont changé."""
+    processor = getattr(_processor_state, 'processor', None)
+    if processor is None or processor.ai_settings != ai_settings:
+        processor = ImageProcessor(ai_settings)
+        _processor_state.processor = processor
+    return processor
+
+
 def process_single_image(
     image_data: dict,
     ai_separation_setting: dict,
     prompt: Optional[str] = None,
-    is_decoupage: bool = False
+    is_decoupage: bool = False,
+    defer_persistence: bool = False,
+    easyocr_batch: Optional[tuple[str, str]] = None
 ) -> dict:
     """
     Fonction de traitement d'une image unique (point d'entrée pour le multiprocessing).
@@ -637,21 +926,271 @@ def process_single_image(
         ai_separation_setting: Configuration IA.
         prompt: Prompt personnalisé (optionnel).
         is_training: Mode entraînement (non utilisé actuellement).
+        defer_persistence: Retourne les écritures en base dans
+            ``pending_write`` pour une écriture groupée.
+        easyocr_batch: Adresse du processus EasyOCR par lots
+            (``EasyOcrBatchService.address``), None pour une lecture locale.
         
     Returns:
-        Dictionnaire contenant le résultat du traitement.
+        Dictionnaire contenant le résultat du traitement. La clé
+        ``child_images`` liste les images enfants restant à traiter.
     """
-    processor = ImageProcessor(ai_separation_setting)
-    result = processor.process(image_data=image_data, prompt=prompt, is_decoupage=is_decoupage)
+    EasyOcrBatchClient.configure(easyocr_batch)
+    processor = get_processor(ai_separation_setting)
+    result = processor.process(
+        image_data=image_data,
+        prompt=prompt,
+        is_decoupage=is_decoupage,
+        defer_persistence=defer_persistence
+    )
 
     return {
         "image_id": result.image_id,
         "categorie_id": result.categorie_id,
         "lot_id": result.lot_id,
-        "status_new": result.status_new
+        "status_new": result.status_new,
+        "child_images": result.child_images,
+        "cancelled": result.cancelled,
+        "pending_write": result.pending_write
     }
 
 
+class ImageScheduler:
+    """
+    Ordonnanceur des images sur le pool de workers.
+    
+    Les images enfants renvoyées par un worker sont réinjectées dans le
+    pool comme des unités de travail indépendantes, afin d'être traitées
+    en parallèle par tous les workers. Une image mère n'est considérée
+    comme terminée qu'une fois tous ses enfants traités.
+    
+    Les images sont distribuées par fenêtre bornée: lorsque le service est
+    désactivé (``power`` à 0), plus aucune image n'est distribuée, les
+    images en cours se terminent ou s'annulent entre deux étapes, et les
+    images non distribuées sont listées dans ``skipped``.
+    
+    Si un service de persistance en tampon est fourni, les écritures
+    différées renvoyées par les workers (``pending_write``) y sont
+    accumulées et écrites par lots.
+    
+    Si un service de préchargement est fourni, les fichiers des prochaines
+    images en attente sont copiés localement pendant le traitement des
+    images en cours.
+    
+    Si un service de réservation est fourni, les images sont réservées par
+    tranches de la taille de la fenêtre, au fil de la distribution: les
+    images non encore réservées restent disponibles pour les autres
+    workers, et celles réservées entre-temps par un autre worker sont
+    écartées.
+    """
+
+    # Nombre d'images distribuées en avance par worker
+    DISPATCH_AHEAD: int = 2
+
+    def __init__(
+        self,
+        pool: Pool,
+        process_func,
+        num_processes: int = 1,
+        is_active=None,
+        persistence: Optional[PersistenceService] = None,
+        prefetcher: Optional[PrefetchService] = None,
+        claims: Optional[ClaimService] = None
+    ):
+        """
+        Initialise l'ordonnanceur.
+        
+        Args:
+            pool: Pool de workers.
+            process_func: Fonction de traitement d'une image.
+            num_processes: Nombre de workers du pool.
+            is_active: Fonction indiquant si le service est actif
+                (toujours actif si None).
+            persistence: Tampon des écritures différées (optionnel).
+            prefetcher: Préchargement des prochaines images (optionnel).
+            claims: Réservation des images entre workers (optionnel,
+                toutes les images sont traitées si None).
+        """
+        self.pool = pool
+        self.process_func = process_func
+        self.max_in_flight = max(1, num_processes) * self.DISPATCH_AHEAD
+        self.is_active = is_active or (lambda: True)
+        self.persistence = persistence
+        self.prefetcher = prefetcher
+        self.claims = claims
+        self.stopped = False
+        self.skipped: list[dict] = []
+        self._completed: queue.Queue = queue.Queue()
+        self._pending: deque = deque()
+        self._parents: dict[int, dict] = {}
+        self._image_ids: dict[int, int] = {}
+        self._claimed: set[int] = set()
+        self._in_flight = 0
+        self._next_key = 0
+
+    def run(self, images: list[dict]) -> list[dict]:
+        """
+        Traite toutes les images et leurs enfants.
+        
+        Args:
+            images: Images à traiter.
+            
+        Returns:
+            Résultats de traitement (enfants puis mère pour un découpage).
+        """
+        results: list[dict] = []
+        self._pending.extend((image_data, None) for image_data in images)
+
+        try:
+            self._dispatch(results)
+            self._wait(results)
+        finally:
+            if self.persistence:
+                self.persistence.flush()
+            if self.prefetcher:
+                self.prefetcher.close()
+
+        return results
+
+    def _wait(self, results: list[dict]) -> None:
+        """Collecte les résultats jusqu'à la fin du traitement."""
+        while self._in_flight > 0:
+            timeout = self.persistence.seconds_until_flush() if self.persistence else None
+            try:
+                key, parent_key, result, error = self._completed.get(timeout=timeout)
+            except queue.Empty:
+                self.persistence.flush_if_due()
+                continue
+            self._in_flight -= 1
+            if self.prefetcher:
+                self.prefetcher.release(self._image_ids.pop(key))
+
+            if error is not None:
+                raise error
+
+            pending_write = result.pop('pending_write', None)
+            if pending_write:
+                self.persistence.add(ImageResultWrite.from_dict(pending_write), result)
+
+            child_images = result.pop('child_images', None) or []
+            if child_images:
+                logger.info(
+                    f"Image {result['image_id']}: {len(child_images)} images enfants planifiées"
+                )
+                self._parents[key] = {
+                    'result': result,
+                    'remaining': len(child_images),
+                    'parent_key': parent_key
+                }
+                # Les enfants passent en priorité pour terminer la mère au plus tôt
+                self._pending.extendleft(
+                    (child_image, key) for child_image in reversed(child_images)
+                )
+            else:
+                self._complete(parent_key, result, results)
+
+            self._dispatch(results)
+
+    def _dispatch(self, results: list[dict]) -> None:
+        """Distribue les images en attente dans la limite de la fenêtre."""
+        while self._pending and self._in_flight < self.max_in_flight:
+            if not self.stopped and not self.is_active():
+                logger.warning("Service désactivé - arrêt de la distribution des images")
+                self.stopped = True
+
+            if not self.stopped and not self._claim_pending():
+                continue
+
+            image_data, parent_key = self._pending.popleft()
+
+            if self.stopped:
+                self.skipped.append(image_data)
+                self._complete(parent_key, None, results)
+                continue
+
+            self._submit(image_data, parent_key)
+
+        if self.prefetcher and not self.stopped:
+            self.prefetcher.schedule([
+                image_data
+                for image_data, parent_key in islice(self._pending, self.prefetcher.max_files)
+                if self._is_claimed(image_data, parent_key)
+            ])
+
+    def _is_claimed(self, image_data: dict, parent_key: Optional[int]) -> bool:
+        """Indique si une image en attente peut être distribuée par ce worker."""
+        return self.claims is None or parent_key is not None or image_data['id'] in self._claimed
+
+    def _claim_pending(self) -> bool:
+        """
+        Réserve la prochaine tranche d'images en attente si nécessaire.
+        
+        Les enfants d'une image réservée n'ont pas de réservation propre.
+        
+        Returns:
+            True si l'image en tête de file peut être distribuée, False si
+            la tranche a été écartée (réservée par un autre worker).
+        """
+        image_data, parent_key = self._pending[0]
+        if self._is_claimed(image_data, parent_key):
+            return True
+
+        batch = []
+        while self._pending and len(batch) < self.max_in_flight:
+            image_data, parent_key = self._pending[0]
+            if self._is_claimed(image_data, parent_key):
+                break
+            batch.append(self._pending.popleft()[0])
+
+        claimed = self.claims.claim(batch)
+        self._claimed.update(image_data['id'] for image_data in claimed)
+        self._pending.extendleft((image_data, None) for image_data in reversed(claimed))
+        return bool(claimed)
+
+    def _submit(self, image_data: dict, parent_key: Optional[int] = None) -> None:
+        """Soumet une image au pool."""
+        key = self._next_key
+        self._next_key += 1
+        self._in_flight += 1
+        self._image_ids[key] = image_data['id']
+
+        self.pool.apply_async(
+            self.process_func,
+            (image_data,),
+            callback=lambda result: self._completed.put((key, parent_key, result, None)),
+            error_callback=lambda error: self._completed.put((key, parent_key, None, error))
+        )
+
+    def _complete(
+        self,
+        parent_key: Optional[int],
+        result: Optional[dict],
+        results: list[dict]
+    ) -> None:
+        """
+        Enregistre un résultat et termine les images mères complétées.
+        
+        Un résultat None correspond à une image non distribuée; la mère
+        d'une image annulée ou non distribuée est marquée annulée.
+        """
+        cancelled = result is None or result.get('cancelled', False)
+        if result is not None:
+            results.append(result)
+
+        while parent_key is not None:
+            parent = self._parents[parent_key]
+            parent['remaining'] -= 1
+            if cancelled:
+                parent['result']['cancelled'] = True
+            if parent['remaining'] > 0:
+                return
+
+            del self._parents[parent_key]
+            results.append(parent['result'])
+            cancelled = parent['result'].get('cancelled', False)
+            parent_key = parent['parent_key']
+
+
 def main(image_id: Optional[int] = None, lot_id: Optional[int] = None, lot_ids: Optional[list[int]] = None, client_id: Optional[int] = None, dossier_id: Optional[int] = None, image_name: Optional[str] = None) -> None:
     """
     Point d'entrée principal pour le traitement par lots.
@@ -664,6 +1203,7 @@ def main(image_id: Optional[int] = None, lot_id: Optional[int] = None, lot_ids:
         lot_ids: Liste d'IDs de lots à traiter (optionnel).
     """
     pool: Optional[Pool] = None
+    logger.info(f"Imports du module principal: {IMPORT_DURATION:.2f}s")
     
     try:
         # Initialisation des repositories
@@ -671,10 +1211,9 @@ def main(image_id: Optional[int] = None, lot_id: Optional[int] = None, lot_ids:
         lot_repo = LotRepositorie()
         logs_repo = LogsRepository()
         panier_reception_repo = PanierReceptionRepository()
-        settings_repo = AiSeparationSettingRepository()
         
         # Récupération des paramètres
-        ai_settings = settings_repo.get_ai_separation_setting()
+        ai_settings = SettingsService.get_instance().get_settings(force_refresh=True)
         
         if not ai_settings or ai_settings.get('power', 1) != 1:
             logger.warning("Service IA désactivé ou non configuré")
@@ -689,42 +1228,103 @@ def main(image_id: Optional[int] = None, lot_id: Optional[int] = None, lot_ids:
             elif isinstance(lot_ids, list):
                 lot_ids_list = lot_ids
         
-        # Récupération des images à traiter
+        # Récupération des images à traiter, hors images réservées par un autre worker
+        claims = ClaimService(ClaimScope.SEPARATION)
         images = image_repo.get_image_to_process(
             image_id=image_id,
             lot_id=lot_id,
             lot_ids=lot_ids_list,
             client_id=client_id,
-            dossier_id=dossier_id
+            dossier_id=dossier_id,
+            claim_scope=claims.scope
         )
         num_processes = ai_settings.get('thread_number', 1)
         
-        logger.info(f"Démarrage du traitement avec {num_processes} processus")
-        logger.info(f"Images à traiter: {len(images)}")
+        # Lecture EasyOCR par lots (adresse transmise aux workers avec chaque image)
+        easyocr_batch = None
+        if (
+            ai_settings.get('ocr_library') == OcrLibrary.EASYOCR.value
+            and EasyOcrBatchService.is_enabled()
+        ):
+            batch_service = EasyOcrBatchService.get_instance()
+            batch_service.start()
+            easyocr_batch = batch_service.address
         
-        # Traitement parallèle
-        with Pool(processes=num_processes) as pool:
-            process_func = partial(
-                process_single_image,
-                ai_separation_setting=ai_settings,
-                prompt=ai_settings.get('prompt_systeme')
-            )
-            results = pool.map(process_func, images)
+        # Écritures groupées si AI_PERSIST_BATCH_SIZE > 1
+        persistence = PersistenceService()
+        
+        # Publications interrompues lors d'une exécution précédente ou par
+        # l'arrêt brutal d'un worker (les workers du pool persistant
+        # peuvent publier encore: seules les demandes abandonnées sont reprises)
+        publisher = PublishService.get_instance()
+        publisher.recover(stale_only=_worker_pool is not None)
+        
+        with claims:
+            logger.info(f"Démarrage du traitement avec {num_processes} processus")
+            logger.info(f"Images à traiter: {len(images)} (réservées au fil du traitement)")
+            
+            # Traitement parallèle
+            if PERSISTENT_POOL:
+                pool = get_worker_pool(num_processes)
+            else:
+                pool = Pool(processes=num_processes, initializer=log_worker_startup)
+            try:
+                process_func = partial(
+                    process_single_image,
+                    ai_separation_setting=ai_settings,
+                    prompt=ai_settings.get('prompt_systeme'),
+                    defer_persistence=persistence.buffered,
+                    easyocr_batch=easyocr_batch
+                )
+                scheduler = ImageScheduler(
+                    pool,
+                    process_func,
+                    num_processes=num_processes,
+                    is_active=SettingsService.get_instance().is_active,
+                    persistence=persistence if persistence.buffered else None,
+                    prefetcher=PrefetchService(resolve_image_source),
+                    claims=claims
+                )
+                results = scheduler.run(images)
+            finally:
+                if not PERSISTENT_POOL:
+                    pool.terminate()
+        
+        # Publications laissées par les workers à l'arrêt du pool
+        # (un pool persistant poursuit ses publications en arrière-plan)
+        if not PERSISTENT_POOL:
+            publisher.recover()
+        publisher.drain(timeout=PUBLISH_DRAIN_TIMEOUT)
         
         # Analyse des résultats
         successful = 0
         failed = 0
+        cancelled = len(scheduler.skipped)
         lot_success: dict[int, int] = defaultdict(int)
+        # Lots dont une image a été annulée: laissés en l'état pour le prochain cycle
+        lot_incomplete: set[int] = {image['lot_id'] for image in scheduler.skipped}
         
         for result in results:
-            if result and result.get('status_new') == StatusNew.FINISHED:
+            if result and result.get('cancelled'):
+                cancelled += 1
+                lot_incomplete.add(result['lot_id'])
+            elif result and result.get('status_new') == StatusNew.FINISHED:
                 successful += 1
                 lot_success[result['lot_id']] += 1
             else:
                 failed += 1
         
+        # Lots dont des images sont encore traitées par un autre worker: clôturés par celui-ci
+        lot_elsewhere = claims.lots_claimed_elsewhere(list(lot_success.keys()))
+        
         # Mise à jour des lots terminés
         for lot_id, count in lot_success.items():
+            if lot_id in lot_incomplete:
+                logger.info(f"Lot {lot_id} incomplet (arrêt du service), non clôturé")
+                continue
+            if lot_id in lot_elsewhere:
+                logger.info(f"Lot {lot_id} en cours sur un autre worker, non clôturé")
+                continue
             try:
                 lot_repo.update_lot(lot_id, {"status_new": StatusNew.FINISHED})
                 logs_repo.log_action(
@@ -742,6 +1342,10 @@ def main(image_id: Optional[int] = None, lot_id: Optional[int] = None, lot_ids:
         logger.info("TRAITEMENT TERMINÉ")
         logger.info(f"Succès: {successful}")
         logger.info(f"Échecs: {failed}")
+        if scheduler.stopped or cancelled:
+            logger.info(f"Annulées (service désactivé): {cancelled}")
+        if publisher.failed_count():
+            logger.info(f"Publications en échec (voir {publisher.outbox / 'failed'}): {publisher.failed_count()}")
         logger.info("=" * 50)
 
     except Exception as e:
@@ -757,8 +1361,8 @@ def main(image_id: Optional[int] = None, lot_id: Optional[int] = None, lot_ids:
 
 
 if __name__ == "__main__":
-    # Configuration du multiprocessing pour Windows
-    multiprocessing.set_start_method('spawn', force=True)
+    # Configuration du démarrage des workers
+    configure_start_method()
     
     # Configuration des arguments en ligne de commande
     parser = argparse.ArgumentParser(
@@ -815,6 +1419,7 @@ if __name__ == "__main__":
             dossier_id=args.dossier_id
         )
         if args.image_id or args.lot_id or args.lot_ids or args.client_id or args.dossier_id or args.image_name:
+            close_worker_pool()
             sys.exit(0)
         logger.info("Sleeping for 2 minutes...")
 
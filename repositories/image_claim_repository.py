@@ -0,0 +1,122 @@
+from repositories.base_repo import BaseRepo
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class ImageClaimRepository(BaseRepo):
+    """
+    Réservations d'images (table ``image_claim``).
+
+    Une image est réservée pour un traitement (``scope``) par un worker
+    (``claimed_by``) jusqu'à ``claimed_until``. La clé primaire
+    (image_id, scope) garantit qu'un seul worker détient la réservation.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    def table_exists(self) -> bool:
+        """Indique si la table ``image_claim`` existe (migration ``sql/image_claim.sql``)."""
+        self.cursor.execute(
+            "SELECT COUNT(*) AS n FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = 'image_claim'"
+        )
+        row = self.cursor.fetchone()
+        self.connection.commit()
+        return bool(row and row['n'])
+
+    def claim(self, image_ids: list[int], scope: str, owner: str, lease_seconds: int) -> list[int]:
+        """
+        Réserve les images libres ou dont la réservation a expiré.
+
+        Args:
+            image_ids: Images à réserver.
+            scope: Traitement concerné.
+            owner: Identifiant du worker.
+            lease_seconds: Durée de la réservation.
+
+        Returns:
+            Les identifiants effectivement réservés par ``owner``.
+        """
+        if not image_ids:
+            return []
+
+        placeholders = ', '.join(['%s'] * len(image_ids))
+        try:
+            # Libère les réservations expirées des autres workers
+            self.cursor.execute(
+                f"DELETE FROM image_claim WHERE scope = %s AND claimed_until < NOW() AND image_id IN ({placeholders})",
+                [scope, *image_ids]
+            )
+            self.cursor.executemany(
+                "INSERT IGNORE INTO image_claim (image_id, scope, claimed_by, claimed_until) VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)",
+                [[image_id, scope, owner, lease_seconds] for image_id in image_ids]
+            )
+            self.connection.commit()
+
+            self.cursor.execute(
+                f"SELECT image_id FROM image_claim WHERE scope = %s AND claimed_by = %s AND image_id IN ({placeholders})",
+                [scope, owner, *image_ids]
+            )
+            return [row['image_id'] for row in self.cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"Error claiming images: {e}")
+            self.connection.rollback()
+            return []
+
+    def renew(self, scope: str, owner: str, lease_seconds: int) -> int:
+        """
+        Prolonge toutes les réservations d'un worker.
+
+        Returns:
+            Le nombre de réservations prolongées.
+        """
+        try:
+            self.cursor.execute(
+                "UPDATE image_claim SET claimed_until = NOW() + INTERVAL %s SECOND WHERE scope = %s AND claimed_by = %s",
+                [lease_seconds, scope, owner]
+            )
+            self.connection.commit()
+            return self.cursor.rowcount
+        except Exception as e:
+            logger.error(f"Error renewing image claims: {e}")
+            self.connection.rollback()
+            return 0
+
+    def get_lots_claimed_by_others(self, lot_ids: list[int], scope: str, owner: str) -> list[int]:
+        """
+        Retourne les lots ayant des images réservées par un autre worker.
+        """
+        if not lot_ids:
+            return []
+        try:
+            self.cursor.execute(
+                f"""SELECT DISTINCT i.lot_id FROM image_claim ic
+                JOIN image i ON i.id = ic.image_id
+                WHERE ic.scope = %s AND ic.claimed_by <> %s AND ic.claimed_until > NOW()
+                AND i.lot_id IN ({', '.join(['%s'] * len(lot_ids))})""",
+                [scope, owner, *lot_ids]
+            )
+            return [row['lot_id'] for row in self.cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error fetching lots claimed by others: {e}")
+            return []
+
+    def release(self, scope: str, owner: str, image_ids: list[int] = None) -> bool:
+        """
+        Libère les réservations d'un worker (toutes si ``image_ids`` est vide).
+        """
+        try:
+            query = "DELETE FROM image_claim WHERE scope = %s AND claimed_by = %s"
+            params = [scope, owner]
+            if image_ids:
+                query += f" AND image_id IN ({', '.join(['%s'] * len(image_ids))})"
+                params.extend(image_ids)
+            self.cursor.execute(query, params)
+            self.connection.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error releasing image claims: {e}")
+            self.connection.rollback()
+            return False
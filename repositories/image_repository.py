@@ -1,8 +1,93 @@
+import os
+from typing import Optional
+
 from services.database_service import DatabaseService
 from services.logger import Logger
 from services.constant import StatusNew, CategorieId, SousCategorieId
 logger = Logger.get_logger()
 
+# Source des images traitées par la validation et l'analyse
+SOURCE_IMAGE_VALIDATION = 29
+
+# Catégorie exclue de la séparation et de l'analyse
+EXCLUDED_CATEGORIE_ID = 27
+
+# Statuts (status_new) des lots à séparer
+LOT_STATUS_TO_PROCESS = [4, 5]
+
+# Date de scan minimale des lots à traiter (surchargée par AI_DATE_SCAN_FROM)
+DEFAULT_DATE_SCAN_FROM = '2026-01-05'
+
+
+class PendingImageQuery:
+    """
+    Construction de la requête de sélection des identifiants d'images.
+
+    Toutes les valeurs sont passées en paramètres et les jointures ne sont
+    ajoutées que si un filtre les utilise.
+    """
+
+    def __init__(self):
+        self.joins: list[str] = []
+        self.conditions: list[str] = []
+        self.params: list = []
+        self.order_by: Optional[str] = None
+        self.limit: Optional[int] = None
+
+    def where(self, condition: str, *params) -> "PendingImageQuery":
+        """Ajoute une condition et ses paramètres."""
+        self.conditions.append(condition)
+        self.params.extend(params)
+        return self
+
+    def where_in(self, column: str, values: list) -> "PendingImageQuery":
+        """Ajoute une condition ``column IN (...)``."""
+        return self.where(f"{column} IN ({', '.join(['%s'] * len(values))})", *values)
+
+    def join_lot(self) -> "PendingImageQuery":
+        """Joint le lot de l'image."""
+        if "lot" not in self.joins:
+            self.joins.append("lot")
+        return self
+
+    def join_dossier(self) -> "PendingImageQuery":
+        """Joint le lot et le dossier de l'image."""
+        self.join_lot()
+        if "dossier" not in self.joins:
+            self.joins.append("dossier")
+        return self
+
+    def filter_owner(self, client_id=None, dossier_id=None) -> "PendingImageQuery":
+        """Restreint la sélection à un client ou, à défaut, à un dossier."""
+        if client_id:
+            self.join_dossier()
+            self.where("d.site_id IN (SELECT s.id FROM site s WHERE s.client_id = %s)", client_id)
+        elif dossier_id:
+            self.join_lot()
+            self.where("l.dossier_id = %s", dossier_id)
+        return self
+
+    def build(self) -> tuple[str, list]:
+        """
+        Assemble la requête.
+
+        Returns:
+            La requête et ses paramètres.
+        """
+        query = "SELECT i.id FROM image i"
+        if "lot" in self.joins:
+            query += " JOIN lot l ON l.id = i.lot_id"
+        if "dossier" in self.joins:
+            query += " JOIN dossier d ON d.id = l.dossier_id"
+        if self.conditions:
+            query += " WHERE " + " AND ".join(self.conditions)
+        if self.order_by:
+            query += f" ORDER BY {self.order_by}"
+        if self.limit:
+            query += f" LIMIT {int(self.limit)}"
+        return query, list(self.params)
+
+
 class ImageRepositorie:
     def __init__(self):
         self.databse = DatabaseService()
@@ -32,105 +117,151 @@ class ImageRepositorie:
             logger.error(f"Error fetching image by lot_id: {e}")
             return []
     
-    def get_image_to_process(self, image_id=None, lot_id=None, for_validation=False, lot_ids=[], client_id=None, dossier_id=None, for_analyse=False):
+    def get_image_to_process(self, image_id=None, lot_id=None, for_validation=False, lot_ids=[], client_id=None, dossier_id=None, for_analyse=False, claim_scope=None):
+        """
+        Récupère les images à traiter avec leur contexte (lot, dossier, client, activité).
+
+        La recherche se fait en deux temps: sélection des identifiants à
+        traiter (requête courte, paramétrée et indexable), puis chargement
+        du contexte pour ces seuls identifiants.
+
+        Args:
+            claim_scope: Si renseigné, écarte les images réservées par un
+                autre worker pour ce traitement (table ``image_claim``).
+
+        Returns:
+            Liste des images, dans l'ordre de sélection.
+        """
         try:
-            #query = "select i.nom, l.date_scan, l.id lot_id, d.id dossier_id, d.nom dossier_name, d.site from image i join lot l on l.id = i.lot_id join dossier d on d.id = l.dossier_id where (l.status_new = 4 or l.status = 2) and date(l.date_scan) = date('2025-05-13')"
-            print(image_id)
-            select_clause = """
-                SELECT 
-                    distinct i.id, 
-                    i.nom name, 
-                    i.originale originale,
-                    i2.nom parent_name,
-                    l.date_scan, 
-                    i.ext_image ext_image,
-                    c.nom client_nom, 
-                    i.categorie_id, 
-                    i.exercice, 
-                    d.nom dossier_nom, 
-                    l.lot lot_num, 
-                    l.id lot_id,
-                    d.id dossier_id, 
-                    d.siren_ste, 
-                    d.rs_ste, 
-                    s.client_id client_id, 
-                    d.site_id site_id, 
-                    i.status, 
-                    i.status_new, 
-                    l.status lot_status, 
-                    l.status_new lot_status_new,
-                    act.code_ape ape,
-                    act.libelle activite_3,
-                    act_2.libelle activite_2,
-                    act_1.libelle activite_1,
-                    act_0.libelle activite_0
-                FROM image i
-            """
-            from_clause = """
-                JOIN lot l ON i.lot_id = l.id
-                JOIN dossier d ON l.dossier_id = d.id
-                LEFT JOIN image_image ii ON ii.image_id_autre = i.id
-                LEFT JOIN image i2 ON i2.id = ii.image_id
-                JOIN site s ON s.id = d.site_id
-                JOIN client c ON c.id = s.client_id
-                LEFT JOIN activite_com_cat_3 act on act.id = d.activite_com_cat_3_id
-                LEFT JOIN activite_com_cat_2 act_2 on act_2.id = act.activite_com_cat_2_id
-                LEFT JOIN activite_com_cat_1 act_1 on act_1.id = act_2.activite_com_cat_1_id
-                LEFT JOIN activite_com_cat act_0 on act_0.id = act_1.activite_com_cat_id
-            """
+            query, params = self._build_pending_query(
+                image_id=image_id,
+                lot_id=lot_id,
+                for_validation=for_validation,
+                lot_ids=lot_ids,
+                client_id=client_id,
+                dossier_id=dossier_id,
+                for_analyse=for_analyse,
+                claim_scope=claim_scope
+            )
+            self.cursor.execute(query, params)
+            # Une image peut apparaître plusieurs fois selon les jointures
+            image_ids = list(dict.fromkeys(row['id'] for row in self.cursor.fetchall()))
+            return self._hydrate_images(image_ids)
 
-            if image_id:
-                where_clause = f"""
-                WHERE i.id = {image_id}"""
-            elif lot_id:
-                where_clause = f"""
-                WHERE l.id = {lot_id}"""
-            elif for_validation:
-                where_clause = f"""
-                LEFT JOIN ai_ocr_content ai_ocr ON ai_ocr.image_id = i.id
-                WHERE i.supprimer = 0 and i.source_image_id = 29 and ai_ocr.image_id is null """
-                if client_id:
-                    where_clause += f"and s.client_id = {client_id} "
-                elif dossier_id:
-                    where_clause += f"and d.id = {dossier_id} "
-                where_clause += " limit 50 """
-            elif for_analyse:
-                where_clause = f"""
-                LEFT JOIN ai_ocr_content_docs ai_ocr ON ai_ocr.image_id = i.id
-                WHERE i.supprimer = 0 and i.source_image_id = 29 and ai_ocr.image_id is null and i.categorie_id <> 27 """
-                if client_id:
-                    where_clause += f"and s.client_id = {client_id} "
-                elif dossier_id:
-                    where_clause += f"and d.id = {dossier_id} "
-                where_clause += " order by d.nom asc limit 50 """
-            elif len(lot_ids) > 0:
-                where_clause = f"""
-                WHERE l.id IN ({','.join(map(str, lot_ids))})"""
-            else:
-                where_clause = f"""
-                LEFT JOIN decoupage_niveau2 dc ON dc.image_id = i.id
-                LEFT JOIN ai_separation ai_s ON ai_s.image_id = i.id
-                WHERE ((((l.status_new = 4 or l.status_new = 5))))
-                and date(l.date_scan) >= DATE('2026-01-05') 
-                and i.categorie_id != 27
-                and ai_s.image_id is null """
-                if client_id:
-                    where_clause += f"and s.client_id = {client_id} "
-                elif dossier_id:
-                    where_clause += f"and d.id = {dossier_id} "
-                where_clause += "and i.decouper=0 order by  l.id, l.date_scan asc"
-                
-            #or (l.status = 2 and EXISTS (SELECT 1 from panier_reception pr where pr.operateur_id is not null and lot_id = l.id))
-            query = select_clause + from_clause + where_clause
-            print(query)
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            return rows
-        
         except Exception as e:
             logger.error(f"Error fetching image to process: {e}")
             return []
-    
+
+    def _build_pending_query(self, image_id=None, lot_id=None, for_validation=False, lot_ids=[], client_id=None, dossier_id=None, for_analyse=False, claim_scope=None) -> tuple[str, list]:
+        """
+        Construit la requête de sélection des identifiants d'images à traiter.
+
+        Returns:
+            La requête et ses paramètres.
+        """
+        query = PendingImageQuery()
+
+        if image_id:
+            query.where("i.id = %s", image_id)
+        elif lot_id:
+            query.where("i.lot_id = %s", lot_id)
+        elif for_validation:
+            query.where("i.supprimer = 0")
+            query.where("i.source_image_id = %s", SOURCE_IMAGE_VALIDATION)
+            query.where("NOT EXISTS (SELECT 1 FROM ai_ocr_content ai_ocr WHERE ai_ocr.image_id = i.id)")
+            query.filter_owner(client_id, dossier_id)
+            query.limit = 50
+        elif for_analyse:
+            query.where("i.supprimer = 0")
+            query.where("i.source_image_id = %s", SOURCE_IMAGE_VALIDATION)
+            query.where("i.categorie_id <> %s", EXCLUDED_CATEGORIE_ID)
+            query.where("NOT EXISTS (SELECT 1 FROM ai_ocr_content_docs ai_ocr WHERE ai_ocr.image_id = i.id)")
+            query.filter_owner(client_id, dossier_id)
+            query.join_dossier()
+            query.order_by = "d.nom ASC"
+            query.limit = 50
+        elif len(lot_ids) > 0:
+            query.where_in("i.lot_id", lot_ids)
+        else:
+            query.join_lot()
+            query.where_in("l.status_new", LOT_STATUS_TO_PROCESS)
+            # Comparaison directe sur la colonne pour rester indexable
+            query.where("l.date_scan >= %s", os.getenv('AI_DATE_SCAN_FROM', DEFAULT_DATE_SCAN_FROM))
+            query.where("i.categorie_id <> %s", EXCLUDED_CATEGORIE_ID)
+            query.where("i.decouper = 0")
+            query.where("NOT EXISTS (SELECT 1 FROM ai_separation ai_s WHERE ai_s.image_id = i.id)")
+            query.filter_owner(client_id, dossier_id)
+            query.order_by = "l.id, l.date_scan ASC"
+
+        if claim_scope:
+            query.where(
+                "NOT EXISTS (SELECT 1 FROM image_claim ic WHERE ic.image_id = i.id AND ic.scope = %s AND ic.claimed_until > NOW())",
+                claim_scope
+            )
+
+        return query.build()
+
+    def _hydrate_images(self, image_ids: list[int]) -> list[dict]:
+        """
+        Charge le contexte complet des images sélectionnées.
+
+        Args:
+            image_ids: Identifiants des images, dans l'ordre voulu.
+
+        Returns:
+            Une ligne par image, dans l'ordre de ``image_ids``.
+        """
+        if not image_ids:
+            return []
+
+        query = f"""
+            SELECT
+                i.id,
+                i.nom name,
+                i.originale originale,
+                i2.nom parent_name,
+                l.date_scan,
+                i.ext_image ext_image,
+                c.nom client_nom,
+                i.categorie_id,
+                i.exercice,
+                d.nom dossier_nom,
+                l.lot lot_num,
+                l.id lot_id,
+                d.id dossier_id,
+                d.siren_ste,
+                d.rs_ste,
+                s.client_id client_id,
+                d.site_id site_id,
+                i.status,
+                i.status_new,
+                l.status lot_status,
+                l.status_new lot_status_new,
+                act.code_ape ape,
+                act.libelle activite_3,
+                act_2.libelle activite_2,
+                act_1.libelle activite_1,
+                act_0.libelle activite_0
+            FROM image i
+            JOIN lot l ON i.lot_id = l.id
+            JOIN dossier d ON l.dossier_id = d.id
+            LEFT JOIN image_image ii ON ii.image_id_autre = i.id
+            LEFT JOIN image i2 ON i2.id = ii.image_id
+            JOIN site s ON s.id = d.site_id
+            JOIN client c ON c.id = s.client_id
+            LEFT JOIN activite_com_cat_3 act on act.id = d.activite_com_cat_3_id
+            LEFT JOIN activite_com_cat_2 act_2 on act_2.id = act.activite_com_cat_2_id
+            LEFT JOIN activite_com_cat_1 act_1 on act_1.id = act_2.activite_com_cat_1_id
+            LEFT JOIN activite_com_cat act_0 on act_0.id = act_1.activite_com_cat_id
+            WHERE i.id IN ({', '.join(['%s'] * len(image_ids))})
+        """
+        self.cursor.execute(query, image_ids)
+
+        rows_by_id = {}
+        for row in self.cursor.fetchall():
+            rows_by_id.setdefault(row['id'], row)
+        return [rows_by_id[image_id] for image_id in image_ids if image_id in rows_by_id]
+
     def get_image_by_id(self, image_id: int) -> dict:
         try:
             query = "select * from image where id = %s"
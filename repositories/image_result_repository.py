@@ -0,0 +1,335 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from repositories.base_repo import BaseRepo
+from services import constant
+from services.constant import CategorieId, SousCategorieId, StatusNew
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+@dataclass
+class ImageResultWrite:
+    """Écritures à effectuer en base pour le résultat d'une image."""
+    image_id: int
+    name: str
+    decoupage_image_id: int
+    decoupage: dict
+    separation: dict
+    status: int = StatusNew.FINISHED
+    utilisateur_id: int = constant.GENZ_USER_ID
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ImageResultWrite":
+        return cls(**data)
+
+
+@dataclass
+class _BatchState:
+    """État lu en base au début d'une transaction."""
+    images: dict = field(default_factory=dict)
+    decoupages: dict = field(default_factory=dict)
+    controles: dict = field(default_factory=dict)
+
+
+class ImageResultRepository(BaseRepo):
+    """
+    Unité de travail pour la persistance des résultats de classification.
+
+    Écrit dans une seule transaction, sur une seule connexion, les lignes
+    decoupage_niveau2 / decoupage_niveau2_controle, ai_separation, la mise
+    à jour de l'image et la ligne de logs, pour une ou plusieurs images.
+    Les insertions sont groupées en INSERT multi-lignes et les mises à jour
+    d'images en un seul UPDATE.
+
+    Reprend les règles de DecoupageNiveau2Repositorie.insert_decoupage_niveau2,
+    AiSeparationRepository.add_ai_separation, ImageRepositorie.update_image et
+    LogsRepository.log_action.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Colonnes ocr_dpi / ocr_confidence (migration sql/ai_separation_ocr_metrics.sql)
+        self.store_ocr_metrics = os.getenv('AI_STORE_OCR_METRICS', '0') == '1'
+
+    def save_result(self, write: ImageResultWrite) -> dict:
+        """
+        Persiste le résultat d'une image.
+
+        Returns:
+            L'image mise à jour.
+
+        Raises:
+            ValueError: Si l'image n'existe pas ou si l'écriture échoue.
+        """
+        return self.save_results([write])[0]
+
+    def save_results(self, writes: list[ImageResultWrite]) -> list[dict]:
+        """
+        Persiste les résultats de plusieurs images dans une même transaction.
+
+        Args:
+            writes: Écritures à effectuer, dans l'ordre de traitement.
+
+        Returns:
+            Les images mises à jour, dans le même ordre que ``writes``.
+
+        Raises:
+            ValueError: Si une image n'existe pas ou si l'écriture échoue
+                (la transaction est alors annulée).
+        """
+        if not writes:
+            return []
+
+        try:
+            state = self._load_state(writes)
+
+            decoupage_rows = []
+            controle_rows = []
+            controle_copy_rows = []
+            separation_rows = []
+            image_updates = []
+            log_rows = []
+            updated_images = []
+
+            for write in writes:
+                decoupage_explication = self._plan_decoupage(
+                    write, state, decoupage_rows, controle_rows, controle_copy_rows
+                )
+
+                separation = write.separation
+                separation_row = [
+                    write.image_id,
+                    separation.get('categorie_id', None),
+                    separation.get('sous_categorie_id', None),
+                    separation.get('sous_sous_categorie_id', None),
+                    separation.get('explication', '') + decoupage_explication,
+                    separation.get('ocr_content', json.dumps(separation.get('data', None))),
+                    separation.get('ratio', 0),
+                ]
+                if self.store_ocr_metrics:
+                    separation_row += [
+                        separation.get('ocr_dpi', None),
+                        separation.get('ocr_confidence', None),
+                    ]
+                separation_rows.append(separation_row)
+
+                image = self._plan_image_update(write, state, image_updates)
+                log_rows.append([write.utilisateur_id, write.image_id])
+                updated_images.append(image)
+
+            if decoupage_rows:
+                self.cursor.executemany(
+                    "INSERT INTO `decoupage_niveau2` (`image_id`, `nomdecoupee`, `lot_id`, `date_creation`, `categorie_id`, `nbpage`, `mere`) VALUES (%s, %s, %s, NOW(), %s, %s, %s)",
+                    decoupage_rows
+                )
+                self.cursor.executemany(
+                    "INSERT INTO `decoupage_niveau2_controle` (`image_id`, `nomdecoupee`, `lot_id`, `date_creation`, `categorie_id`, `nbpage`, `mere`) VALUES (%s, %s, %s, NOW(), %s, %s, %s)",
+                    controle_rows
+                )
+            if controle_copy_rows:
+                self.cursor.executemany(
+                    """INSERT INTO `decoupage_niveau2_controle` (
+                    `image_id`, `nomdecoupee`, `categorie_id`, `nbpage`,
+                    `page_assembler`, `operateur_id`, `facturette`,
+                    `mere`, `mere_assembler`, `lot_id`, `soussouscategorie_id`, `utilisateur_id`,
+                    `date_creation`
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())""",
+                    controle_copy_rows
+                )
+            if self.store_ocr_metrics:
+                self.cursor.executemany(
+                    "INSERT INTO ai_separation (image_id, categorie_id, sous_categorie_id, sous_sous_categorie_id, explication, created_at, ocr_content, ratio, ocr_dpi, ocr_confidence) VALUES (%s, %s, %s, %s, %s, NOW(), %s, %s, %s, %s)",
+                    separation_rows
+                )
+            else:
+                self.cursor.executemany(
+                    "INSERT INTO ai_separation (image_id, categorie_id, sous_categorie_id, sous_sous_categorie_id, explication, created_at, ocr_content, ratio) VALUES (%s, %s, %s, %s, %s, NOW(), %s, %s)",
+                    separation_rows
+                )
+            if image_updates:
+                self._update_images(image_updates)
+            self.cursor.executemany(
+                "INSERT INTO logs (date_debut, date_fin, etape_traitement_id, remarque, utilisateur_id, image_id) VALUES (NOW(), NOW(), 2, 'SEPARATION AVEC GENZIA', %s, %s)",
+                log_rows
+            )
+
+            self.connection.commit()
+            logger.info(f"Résultats persistés pour {len(writes)} image(s)")
+            return updated_images
+
+        except Exception as e:
+            logger.error(f"Error saving image results: {e}")
+            self.connection.rollback()
+            raise ValueError(f"Échec de persistance pour {', '.join(w.name for w in writes)}: {e}") from e
+
+    def _load_state(self, writes: list[ImageResultWrite]) -> _BatchState:
+        """
+        Lit les images, découpages et contrôles existants en trois requêtes au plus.
+
+        Les images enfants d'une même mère sont traitées par des workers
+        différents et partagent sa ligne de découpage: les lignes ``image``
+        des images écrites et de leurs mères sont verrouillées (dans l'ordre
+        des identifiants) jusqu'à la fin de la transaction, pour qu'une seule
+        écriture à la fois lise puis insère le découpage d'une mère. La
+        lecture du découpage a lieu après le verrou, sur une transaction
+        neuve: elle voit les insertions validées entre-temps.
+        """
+        state = _BatchState()
+
+        image_ids = list(dict.fromkeys(write.image_id for write in writes))
+        decoupage_ids = list(dict.fromkeys(write.decoupage_image_id for write in writes))
+        locked_ids = sorted(set(image_ids) | set(decoupage_ids))
+
+        # Termine la transaction précédente: l'instantané est pris à la lecture suivant le verrou
+        self.connection.commit()
+        self.cursor.execute(
+            f"select * from image where id in ({', '.join(['%s'] * len(locked_ids))}) order by id for update",
+            locked_ids
+        )
+        rows = {row['id']: row for row in self.cursor.fetchall()}
+        state.images = {image_id: rows[image_id] for image_id in image_ids if image_id in rows}
+
+        self.cursor.execute(
+            f"select * from decoupage_niveau2 where image_id in ({', '.join(['%s'] * len(decoupage_ids))})",
+            decoupage_ids
+        )
+        for row in self.cursor.fetchall():
+            state.decoupages.setdefault(row['image_id'], []).append(row)
+
+        if state.decoupages:
+            existing_ids = list(state.decoupages.keys())
+            self.cursor.execute(
+                f"select image_id, count(*) nb from decoupage_niveau2_controle where image_id in ({', '.join(['%s'] * len(existing_ids))}) group by image_id",
+                existing_ids
+            )
+            state.controles = {row['image_id']: row['nb'] for row in self.cursor.fetchall()}
+
+        return state
+
+    @staticmethod
+    def _plan_decoupage(
+        write: ImageResultWrite,
+        state: _BatchState,
+        decoupage_rows: list,
+        controle_rows: list,
+        controle_copy_rows: list
+    ) -> str:
+        """Prépare les lignes de découpage et retourne le complément d'explication."""
+        data = write.decoupage
+        existing = state.decoupages.get(write.decoupage_image_id, [])
+
+        if not existing:
+            row = [
+                write.decoupage_image_id,
+                data.get('nomdecoupee'),
+                data.get('lot_id'),
+                data.get('categorie_id'),
+                data.get('num_page'),
+                data.get('mere'),
+            ]
+            decoupage_rows.append(row)
+            controle_rows.append(row)
+            # Visible par les images suivantes du même lot d'écriture
+            state.decoupages[write.decoupage_image_id] = [{
+                'image_id': write.decoupage_image_id,
+                'nomdecoupee': data.get('nomdecoupee'),
+                'categorie_id': data.get('categorie_id'),
+                'nbpage': data.get('num_page'),
+                'page_assembler': None,
+                'operateur_id': None,
+                'facturette': None,
+                'mere': data.get('mere'),
+                'mere_assembler': None,
+                'lot_id': data.get('lot_id'),
+                'soussouscategorie_id': None,
+                'utilisateur_id': None,
+            }]
+            state.controles[write.decoupage_image_id] = state.controles.get(write.decoupage_image_id, 0) + 1
+            return ""
+
+        for decoupage in existing:
+            nb_controles = state.controles.get(decoupage.get('image_id'), 0)
+            if nb_controles > 0 and len(existing) == nb_controles:
+                continue
+            controle_copy_rows.append([
+                decoupage.get('image_id', None),
+                decoupage.get('nomdecoupee', None),
+                decoupage.get('categorie_id', None),
+                decoupage.get('nbpage', None),
+                decoupage.get('page_assembler', None),
+                decoupage.get('operateur_id', None),
+                decoupage.get('facturette', None),
+                decoupage.get('mere', None),
+                decoupage.get('mere_assembler', None),
+                decoupage.get('lot_id', None),
+                decoupage.get('soussouscategorie_id', None),
+                decoupage.get('utilisateur_id', None),
+            ])
+            state.controles[decoupage.get('image_id')] = nb_controles + 1
+
+        return "l'image a déjà été classée"
+
+    @staticmethod
+    def _plan_image_update(
+        write: ImageResultWrite,
+        state: _BatchState,
+        image_updates: list
+    ) -> dict:
+        """Prépare la mise à jour de l'image et retourne l'image telle qu'elle sera en base."""
+        image = state.images.get(write.image_id)
+        if not image:
+            raise ValueError(f"Image not found for id: {write.image_id}")
+
+        image = dict(image)
+        if image.get('categorie_id', None):
+            image['explication'] = f"l'image a déjà été classée"
+            return image
+
+        status = write.status
+        if image.get('status_new', None) >= StatusNew.FINISHED:
+            status = image.get('status_new', None)
+
+        data = write.separation
+        if data.get('categorie_id', None) == CategorieId.BANQUE:
+            data['sous_categorie_id'] = SousCategorieId.RELEVER_BANCAIRE
+        else:
+            data['souscategorie_id'] = None
+
+        values = {
+            'categorie_id': data.get('categorie_id', None),
+            'status_new': status,
+            'decouper': data.get('decouper', 0),
+            'souscategorie_id': data.get('souscategorie_id', None),
+        }
+        image_updates.append((write.image_id, values))
+        image.update(values)
+        # Les images suivantes du même lot d'écriture voient l'image classée
+        state.images[write.image_id] = image
+        return image
+
+    def _update_images(self, image_updates: list[tuple[int, dict]]) -> None:
+        """Met à jour toutes les images en un seul UPDATE."""
+        columns = ['categorie_id', 'status_new', 'decouper', 'souscategorie_id']
+        assignments = []
+        params: list = []
+
+        for column in columns:
+            cases = ' '.join(['WHEN %s THEN %s'] * len(image_updates))
+            assignments.append(f"`{column}` = CASE `id` {cases} END")
+            for image_id, values in image_updates:
+                params.extend([image_id, values[column]])
+
+        image_ids = [image_id for image_id, _ in image_updates]
+        params.extend(image_ids)
+        query = (
+            f"UPDATE `image` SET {', '.join(assignments)} "
+            f"WHERE `id` IN ({', '.join(['%s'] * len(image_ids))})"
+        )
+        self.cursor.execute(query, params)
@@ -0,0 +1,159 @@
+"""
+Service de réservation des images entre workers.
+
+Plusieurs conteneurs (séparation, validation, analyse, API) lisent les
+mêmes images en attente. Chaque worker réserve les images qu'il va
+traiter pour une durée limitée (bail), prolongée tant qu'il tourne;
+un worker arrêté brutalement laisse expirer ses réservations, qui
+redeviennent disponibles pour les autres.
+"""
+
+import os
+import socket
+import threading
+import uuid
+from typing import Optional
+
+from repositories.image_claim_repository import ImageClaimRepository
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class ClaimScope:
+    """Traitements pour lesquels une image peut être réservée."""
+    SEPARATION = "separation"
+    VALIDATION = "validation"
+    ANALYSE = "analyse"
+
+
+class ClaimService:
+    """
+    Réservation des images d'un worker avec renouvellement du bail.
+
+    S'utilise comme gestionnaire de contexte: le renouvellement démarre
+    à l'entrée et toutes les réservations sont libérées à la sortie.
+
+    Attributes:
+        scope: Traitement concerné (voir ``ClaimScope``).
+        owner: Identifiant unique du worker.
+        lease_seconds: Durée du bail en secondes.
+    """
+
+    DEFAULT_LEASE_SECONDS: int = 300
+
+    # Présence de la table image_claim vérifiée une fois par processus
+    _schema_checked: bool = False
+    _schema_lock = threading.Lock()
+
+    def __init__(self, scope: str, lease_seconds: Optional[int] = None):
+        """
+        Initialise le service.
+
+        Args:
+            scope: Traitement concerné.
+            lease_seconds: Durée du bail (variable ``AI_CLAIM_LEASE_SECONDS`` par défaut).
+
+        Raises:
+            RuntimeError: Si la table ``image_claim`` n'existe pas.
+        """
+        self.scope = scope
+        self.lease_seconds = lease_seconds or int(
+            os.getenv('AI_CLAIM_LEASE_SECONDS', self.DEFAULT_LEASE_SECONDS)
+        )
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._repository: Optional[ImageClaimRepository] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._check_schema()
+
+    def _check_schema(self) -> None:
+        """
+        Vérifie la présence de la table ``image_claim``.
+
+        Sans elle, la sélection des images et les réservations échouent
+        (erreur journalisée, liste vide): le worker ne traiterait plus rien
+        sans autre signe. L'absence de la migration arrête donc le worker.
+        """
+        with self._schema_lock:
+            if ClaimService._schema_checked:
+                return
+            if not self.repository.table_exists():
+                raise RuntimeError(
+                    "Table image_claim absente: appliquer la migration sql/image_claim.sql"
+                )
+            ClaimService._schema_checked = True
+
+    @property
+    def repository(self) -> ImageClaimRepository:
+        """Repository créé à la première utilisation."""
+        if self._repository is None:
+            self._repository = ImageClaimRepository()
+        return self._repository
+
+    def __enter__(self) -> "ClaimService":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def claim(self, images: list[dict]) -> list[dict]:
+        """
+        Réserve les images et retourne celles obtenues.
+
+        Args:
+            images: Images candidates (clé ``id``).
+
+        Returns:
+            Les images réservées par ce worker, dans l'ordre d'origine.
+        """
+        if not images:
+            return []
+
+        claimed = set(self.repository.claim(
+            [image['id'] for image in images], self.scope, self.owner, self.lease_seconds
+        ))
+        if len(claimed) < len(images):
+            logger.info(f"{len(images) - len(claimed)} image(s) déjà réservée(s) par un autre worker")
+        return [image for image in images if image['id'] in claimed]
+
+    def release(self, image_ids: Optional[list[int]] = None) -> None:
+        """Libère des réservations (toutes si ``image_ids`` est vide)."""
+        self.repository.release(self.scope, self.owner, image_ids)
+
+    def lots_claimed_elsewhere(self, lot_ids: list[int]) -> set[int]:
+        """
+        Lots dont des images sont réservées par un autre worker.
+
+        Permet de ne clôturer un lot que par le dernier worker qui y travaille.
+        """
+        return set(self.repository.get_lots_claimed_by_others(lot_ids, self.scope, self.owner))
+
+    def start(self) -> None:
+        """Démarre le renouvellement périodique du bail."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._renew_loop, name="claim-renewal", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Arrête le renouvellement et libère toutes les réservations."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.release()
+
+    def _renew_loop(self) -> None:
+        """Prolonge le bail au tiers de sa durée, sur une connexion dédiée."""
+        repository: Optional[ImageClaimRepository] = None
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if repository is None:
+                    repository = ImageClaimRepository()
+                repository.renew(self.scope, self.owner, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Erreur de renouvellement des réservations: {e}")
+                repository = None
@@ -52,10 +52,12 @@ class OcrLibrary(str, Enum):
         TESSERACT: OCR Tesseract standard
         EASYOCR: Bibliothèque EasyOCR
         CUSTOM_PYTESSERACT: Version personnalisée de Pytesseract
+        CUSTOM_PYTESSERACT_MULTI: Pytesseract personnalisé, plusieurs stratégies en parallèle
     """
     TESSERACT = "pytesseract"
     EASYOCR = "easy_ocr"
     CUSTOM_PYTESSERACT = "custom_pytesseract"
+    CUSTOM_PYTESSERACT_MULTI = "custom_pytesseract_multi"
 
 
 class OpenAIModel(str, Enum):
@@ -128,6 +130,7 @@ ocr_library = {
     "tesseract": OcrLibrary.TESSERACT.value,
     "easyocr": OcrLibrary.EASYOCR.value,
     "custom_pytesseract": OcrLibrary.CUSTOM_PYTESSERACT.value,
+    "custom_pytesseract_multi": OcrLibrary.CUSTOM_PYTESSERACT_MULTI.value,
 }
 
 model = {
@@ -14,6 +14,7 @@ from pdf2image import convert_from_path
 from PIL import Image
 from PyPDF2 import PdfReader, PdfWriter
 
+from services.image_budget_service import ImageBudgetService
 from services.logger import Logger
 
 logger = Logger.get_logger()
@@ -33,6 +34,9 @@ class DocumentConverterService:
     # Formats d'images supportés
     IMAGE_FORMATS = ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'tif', 'webp']
     
+    # Résolution de rendu des PDF (l'image est ensuite ramenée au budget Vision)
+    RENDER_DPI = 150
+    
     def __init__(self, upload_dir: str = "./uploads", converted_dir: str = "./converted"):
         """
         Initialise le service de conversion.
@@ -43,6 +47,7 @@ class DocumentConverterService:
         """
         self.upload_dir = upload_dir
         self.converted_dir = converted_dir
+        self.image_budget_service = ImageBudgetService()
         
         # Création des répertoires si nécessaire
         os.makedirs(upload_dir, exist_ok=True)
@@ -245,9 +250,9 @@ class DocumentConverterService:
                 if num_pages > 1:
                     # PDF multipage: extraction de première et dernière page
                     # Conversion de la première page
-                    first_page_images = convert_from_path(file_path, dpi=300, first_page=1, last_page=1)
+                    first_page_images = convert_from_path(file_path, dpi=self.RENDER_DPI, first_page=1, last_page=1)
                     # Conversion de la dernière page
-                    last_page_images = convert_from_path(file_path, dpi=300, first_page=num_pages, last_page=num_pages)
+                    last_page_images = convert_from_path(file_path, dpi=self.RENDER_DPI, first_page=num_pages, last_page=num_pages)
                     
                     if not first_page_images or not last_page_images:
                         raise ValueError("Impossible d'extraire les pages du PDF")
@@ -271,6 +276,8 @@ class DocumentConverterService:
                     combined_image.paste(first_image, (0, 0))
                     combined_image.paste(last_image, (0, first_image.height))
                     
+                    # Redimensionnement au budget Vision
+                    combined_image, _ = self.image_budget_service.fit(combined_image)
                     combined_image.save(output_path, 'JPEG', quality=quality)
                     
                     # Nettoyage
@@ -281,7 +288,7 @@ class DocumentConverterService:
                     logger.info(f"PDF multipage converti en JPG (première et dernière page): {output_path}")
                 else:
                     # PDF d'une seule page
-                    images = convert_from_path(file_path, dpi=300, first_page=1, last_page=1)
+                    images = convert_from_path(file_path, dpi=self.RENDER_DPI, first_page=1, last_page=1)
                     
                     if not images:
                         raise ValueError("Aucune page extraite du PDF")
@@ -291,6 +298,8 @@ class DocumentConverterService:
                     if image.mode != 'RGB':
                         image = image.convert('RGB')
                     
+                    # Redimensionnement au budget Vision
+                    image, _ = self.image_budget_service.fit(image)
                     image.save(output_path, 'JPEG', quality=quality)
                     image.close()
                     
@@ -0,0 +1,299 @@
+"""
+Service EasyOCR par lots, partagé entre les workers.
+
+Un processus dédié charge le modèle EasyOCR une seule fois et reçoit les
+pages à lire des workers via une connexion locale. Les pages arrivées
+pendant ``max_wait`` secondes (jusqu'à ``batch_size``) sont lues ensemble
+par ``readtext_batched``, avec un nombre de threads torch maîtrisé, ce qui
+réduit le coût par page sur CPU. Le débit (pages/s) est journalisé.
+
+Activation: ``AI_EASYOCR_BATCH=1`` (le processus est démarré par
+``main``, qui transmet son adresse aux workers avec chaque image: en
+mode ``forkserver`` les workers n'héritent pas de l'environnement du
+processus principal modifié après le démarrage du serveur).
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Optional
+
+from services.easy_ocr_service import EasyOcrService
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class EasyOcrBatchService:
+    """
+    Processus de lecture EasyOCR par lots (côté processus principal).
+
+    Attributes:
+        batch_size: Nombre maximal de pages par lot.
+        max_wait: Attente maximale pour compléter un lot (secondes).
+        torch_threads: Nombre de threads torch du processus de lecture.
+    """
+
+    DEFAULT_BATCH_SIZE: int = 8
+    DEFAULT_MAX_WAIT: float = 0.2
+
+    # Délai de démarrage du processus de lecture (hors chargement du modèle)
+    START_TIMEOUT: float = 30.0
+
+    _instance: Optional["EasyOcrBatchService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        torch_threads: Optional[int] = None
+    ):
+        """
+        Initialise le service.
+
+        Args:
+            batch_size: Pages par lot (``AI_EASYOCR_BATCH_SIZE`` par défaut).
+            max_wait: Attente maximale (``AI_EASYOCR_BATCH_WAIT`` par défaut).
+            torch_threads: Threads torch (``AI_EASYOCR_TORCH_THREADS``, nombre de CPU par défaut).
+        """
+        self.batch_size = batch_size or int(
+            os.getenv('AI_EASYOCR_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)
+        )
+        self.max_wait = max_wait if max_wait is not None else float(
+            os.getenv('AI_EASYOCR_BATCH_WAIT', self.DEFAULT_MAX_WAIT)
+        )
+        self.torch_threads = torch_threads or int(
+            os.getenv('AI_EASYOCR_TORCH_THREADS', os.cpu_count() or 1)
+        )
+        self._process: Optional[multiprocessing.Process] = None
+        self._address: Optional[tuple[str, str]] = None
+
+    @classmethod
+    def get_instance(cls) -> "EasyOcrBatchService":
+        """Retourne l'instance du processus courant."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Indique si la lecture par lots est demandée (``AI_EASYOCR_BATCH``)."""
+        return os.getenv('AI_EASYOCR_BATCH', '0') == '1'
+
+    @property
+    def address(self) -> Optional[tuple[str, str]]:
+        """
+        Adresse et clé (hexadécimale) du processus de lecture, à passer à
+        ``EasyOcrBatchClient.configure`` dans les workers; None s'il est arrêté.
+        """
+        if self._process is None or not self._process.is_alive():
+            return None
+        return self._address
+
+    def start(self) -> None:
+        """Démarre le processus de lecture s'il ne tourne pas."""
+        if self._process is not None and self._process.is_alive():
+            return
+
+        authkey = os.urandom(16)
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_serve,
+            args=(child_conn, authkey, self.batch_size, self.max_wait, self.torch_threads),
+            name="easyocr-batch",
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+
+        if not parent_conn.poll(self.START_TIMEOUT):
+            self.stop()
+            raise RuntimeError("Le processus EasyOCR par lots n'a pas démarré")
+        address = parent_conn.recv()
+        parent_conn.close()
+
+        self._address = (address, authkey.hex())
+        logger.info(
+            f"EasyOCR par lots démarré (lots de {self.batch_size}, "
+            f"{self.torch_threads} threads torch)"
+        )
+
+    def stop(self) -> None:
+        """Arrête le processus de lecture."""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+        self._address = None
+
+
+class EasyOcrBatchClient:
+    """
+    Client du processus de lecture par lots (côté workers).
+
+    Une connexion est ouverte par thread; l'appel est bloquant jusqu'à la
+    lecture du lot contenant la page. Si le processus de lecture est
+    injoignable, la page est lue localement (``EasyOcrService``).
+    """
+
+    _address: Optional[tuple[str, str]] = None
+    _local = threading.local()
+
+    @classmethod
+    def configure(cls, address: Optional[tuple[str, str]]) -> None:
+        """
+        Enregistre l'adresse du processus de lecture (``EasyOcrBatchService.address``).
+
+        Args:
+            address: Adresse et clé hexadécimale, ou None pour une lecture locale.
+        """
+        cls._address = address
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Indique si un processus de lecture par lots est configuré."""
+        return cls._address is not None
+
+    @classmethod
+    def extract_text(cls, image_path: str) -> str:
+        """
+        Lit une image via le processus de lecture par lots.
+
+        Args:
+            image_path: Chemin de l'image.
+
+        Returns:
+            Le texte extrait, une ligne par zone détectée.
+        """
+        try:
+            conn = cls._connection()
+            conn.send(os.path.abspath(image_path))
+            status, payload = conn.recv()
+        except (EOFError, OSError) as e:
+            # Processus arrêté ou redémarré: lecture locale jusqu'à la
+            # prochaine adresse transmise par le processus principal
+            logger.warning(f"EasyOCR par lots injoignable, lecture locale: {e}")
+            cls._local.conn = None
+            cls._address = None
+            return EasyOcrService.get_instance().extract_text(image_path)
+        if status != 'ok':
+            raise RuntimeError(f"Erreur EasyOCR par lots: {payload}")
+        return payload
+
+    @classmethod
+    def _connection(cls) -> Connection:
+        """Retourne la connexion du thread courant, rouverte si l'adresse a changé."""
+        address = cls._address
+        conn = getattr(cls._local, 'conn', None)
+        if conn is not None and getattr(cls._local, 'address', None) != address:
+            conn.close()
+            conn = None
+        if conn is None:
+            if address is None:
+                raise OSError("EasyOCR par lots non configuré")
+            conn = Client(address[0], authkey=bytes.fromhex(address[1]))
+            cls._local.conn = conn
+            cls._local.address = address
+        return conn
+
+
+def _serve(
+    ready: Connection,
+    authkey: bytes,
+    batch_size: int,
+    max_wait: float,
+    torch_threads: int
+) -> None:
+    """Boucle du processus de lecture par lots."""
+    listener = Listener(authkey=authkey)
+    ready.send(listener.address)
+    ready.close()
+
+    requests: queue.Queue = queue.Queue()
+    threading.Thread(target=_accept, args=(listener, requests), daemon=True).start()
+
+    import torch
+    torch.set_num_threads(torch_threads)
+    reader = EasyOcrService().reader
+
+    pages = 0
+    busy = 0.0
+    while True:
+        batch = [requests.get()]
+        deadline = time.monotonic() + max_wait
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        started = time.perf_counter()
+        _read_batch(reader, batch, batch_size)
+        busy += time.perf_counter() - started
+        pages += len(batch)
+        logger.info(
+            f"EasyOCR par lots: {len(batch)} page(s), "
+            f"{pages} au total, {pages / busy:.2f} pages/s"
+        )
+
+
+def _accept(listener: Listener, requests: queue.Queue) -> None:
+    """Accepte les connexions des workers (un thread de réception par connexion)."""
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=_receive, args=(conn, requests), daemon=True).start()
+
+
+def _receive(conn: Connection, requests: queue.Queue) -> None:
+    """Met en file les pages envoyées sur une connexion."""
+    try:
+        while True:
+            requests.put((conn, conn.recv()))
+    except (EOFError, OSError):
+        conn.close()
+
+
+def _read_batch(reader, batch: list, batch_size: int) -> None:
+    """
+    Lit un lot de pages et répond à chaque demandeur.
+
+    ``readtext_batched`` exige des images de même taille: les pages sont
+    regroupées par dimensions (les pages rendues au même DPI le sont).
+    """
+    import cv2
+
+    groups: dict[tuple, list] = {}
+    for conn, path in batch:
+        image = cv2.imread(path)
+        if image is None:
+            _reply(conn, 'error', f"Image illisible: {path}")
+            continue
+        groups.setdefault(image.shape, []).append((conn, image))
+
+    for items in groups.values():
+        try:
+            results = reader.readtext_batched(
+                [image for _, image in items], detail=0, batch_size=batch_size
+            )
+        except Exception as e:
+            for conn, _ in items:
+                _reply(conn, 'error', str(e))
+            continue
+        for (conn, _), lines in zip(items, results):
+            _reply(conn, 'ok', "\n".join(lines))
+
+
+def _reply(conn: Connection, status: str, payload: str) -> None:
+    """Envoie la réponse d'une page (le demandeur a pu se déconnecter)."""
+    try:
+        conn.send((status, payload))
+    except (EOFError, OSError):
+        pass
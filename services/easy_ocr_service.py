@@ -1,10 +1,63 @@
+import os
+import threading
+from typing import Optional
+
+from services.logger import Logger
+
+logger = Logger.get_logger()
 
-import easyocr
 
 class EasyOcrService:
-    def __init__(self):
-        self.reader = easyocr.Reader(['fr'], gpu=True)
+    """
+    Lecture OCR via EasyOCR.
+
+    Le modèle (PyTorch) n'est chargé qu'à la première extraction, une seule
+    fois par processus (``get_instance``), et en mode CPU lorsqu'aucun GPU
+    n'est disponible. La variable ``AI_EASYOCR_GPU`` (``auto`` par défaut,
+    ``0`` ou ``1``) permet de forcer le mode.
+    """
+
+    _instance: Optional["EasyOcrService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, gpu: Optional[bool] = None):
+        self.gpu = gpu
+        self._reader = None
+        self._reader_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "EasyOcrService":
+        """Retourne l'instance du processus courant."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @property
+    def reader(self):
+        """Lecteur EasyOCR, chargé au premier accès."""
+        if self._reader is None:
+            with self._reader_lock:
+                if self._reader is None:
+                    import easyocr
+
+                    gpu = self.gpu if self.gpu is not None else self._gpu_available()
+                    logger.info(f"Chargement du modèle EasyOCR ({'GPU' if gpu else 'CPU'})")
+                    self._reader = easyocr.Reader(['fr'], gpu=gpu)
+        return self._reader
 
     def extract_text(self, image_path: str) -> str:
         result = self.reader.readtext(image_path, detail=0)
         return "\n".join(result)
+
+    @staticmethod
+    def _gpu_available() -> bool:
+        """Indique si un GPU CUDA est utilisable."""
+        setting = os.getenv('AI_EASYOCR_GPU', 'auto')
+        if setting in ('0', '1'):
+            return setting == '1'
+        try:
+            import torch
+            return torch.cuda.is_available()
+        except Exception:
+            return False
@@ -0,0 +1,351 @@
+"""
+Service de mise à disposition des fichiers à traiter.
+
+Ce module limite les transferts avec le NAS:
+- Lecture directe de la source, ou copie unique dans un cache local
+- Publication vers les destinations depuis la source, par copie côté
+  serveur (copy_file_range) ou lien physique quand c'est possible
+- Copie octet par octet en dernier recours, depuis la copie locale
+  lorsqu'elle existe
+- Comptage des octets transférés par méthode
+"""
+
+import errno
+import os
+import shutil
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from services.logger import Logger
+from services.path_resolver_service import PathResolverService
+
+logger = Logger.get_logger()
+
+
+@dataclass
+class StagedFile:
+    """Fichier préparé pour le traitement."""
+    source: Path
+    path: Path
+    name: str
+    work_dir: str
+    is_local: bool
+
+
+class FileStagingService:
+    """
+    Préparation et publication des fichiers traités.
+
+    Modes de préparation (variable ``AI_STAGING_MODE``):
+        - ``local`` (défaut): la source est copiée une fois dans le
+          répertoire de travail local.
+        - ``direct``: la source est lue sur place, seuls les fichiers
+          dérivés (image convertie) sont écrits localement.
+
+    La publication copie depuis la source: lorsque source et destination
+    sont sur le même partage, la copie est faite côté serveur (ou par lien
+    physique si ``AI_STAGING_HARDLINK=1``) sans faire transiter les octets
+    par le conteneur. Sinon, la copie locale (si elle existe) est envoyée,
+    pour ne pas relire la source sur le NAS.
+
+    Attributes:
+        mode: Mode de préparation.
+        use_hardlink: Autorise les liens physiques à la publication.
+        metrics: Octets transférés par méthode depuis le démarrage.
+    """
+
+    MODE_LOCAL: str = "local"
+    MODE_DIRECT: str = "direct"
+
+    # Paramètres de retry pour les opérations fichiers
+    MAX_COPY_ATTEMPTS: int = 5
+    COPY_RETRY_DELAY: float = 0.6
+
+    # Taille maximale d'un appel copy_file_range
+    COPY_CHUNK_SIZE: int = 64 * 1024 * 1024
+
+    def __init__(self, mode: Optional[str] = None, use_hardlink: Optional[bool] = None):
+        """
+        Initialise le service.
+
+        Args:
+            mode: Mode de préparation (``AI_STAGING_MODE`` par défaut).
+            use_hardlink: Liens physiques autorisés (``AI_STAGING_HARDLINK`` par défaut).
+        """
+        self.mode = mode or os.getenv('AI_STAGING_MODE', self.MODE_LOCAL)
+        self.use_hardlink = (
+            use_hardlink
+            if use_hardlink is not None
+            else os.getenv('AI_STAGING_HARDLINK', '0') == '1'
+        )
+        self.metrics: dict[str, int] = defaultdict(int)
+
+    def stage(
+        self,
+        source: Path,
+        work_dir: str,
+        filename: Optional[str] = None,
+        prefetched: Optional[Path] = None
+    ) -> StagedFile:
+        """
+        Prépare un fichier source pour le traitement.
+
+        Args:
+            source: Chemin du fichier source (NAS).
+            work_dir: Répertoire de travail local.
+            filename: Nom du fichier local (nom de la source par défaut).
+            prefetched: Copie locale déjà préchargée de la source (optionnel),
+                déplacée dans le répertoire de travail.
+
+        Returns:
+            Le fichier préparé.
+        """
+        source = Path(source)
+        name = filename or source.name
+        os.makedirs(work_dir, exist_ok=True)
+
+        if prefetched is not None:
+            dest = Path(work_dir) / name
+            try:
+                size = Path(prefetched).stat().st_size
+                os.replace(prefetched, dest)
+                self.metrics['prefetched_bytes'] += size
+                self.metrics['prefetched_files'] += 1
+                return StagedFile(source=source, path=dest, name=name, work_dir=work_dir, is_local=True)
+            except OSError as e:
+                logger.debug(f"Fichier préchargé inutilisable {prefetched}: {e}")
+
+        if self.mode == self.MODE_DIRECT:
+            return StagedFile(source=source, path=source, name=name, work_dir=work_dir, is_local=False)
+
+        dest = Path(work_dir) / name
+        if self._copy_with_retry(source, dest, metric='staged'):
+            return StagedFile(source=source, path=dest, name=name, work_dir=work_dir, is_local=True)
+
+        logger.warning(f"Copie locale impossible, lecture directe de {source}")
+        return StagedFile(source=source, path=source, name=name, work_dir=work_dir, is_local=False)
+
+    def publish(self, staged: StagedFile, destinations: list[str]) -> bool:
+        """
+        Publie le fichier source dans chaque répertoire de destination,
+        sous le nom ``staged.name``.
+
+        Args:
+            staged: Fichier préparé.
+            destinations: Répertoires de destination.
+
+        Returns:
+            True si toutes les copies ont réussi.
+        """
+        return self.publish_file(
+            staged.source,
+            staged.name,
+            destinations,
+            local_source=staged.path if staged.is_local else None
+        )
+
+    def publish_file(
+        self,
+        source: Path,
+        name: str,
+        destinations: list[str],
+        max_attempts: Optional[int] = None,
+        local_source: Optional[Path] = None
+    ) -> bool:
+        """
+        Copie un fichier dans chaque répertoire de destination.
+
+        Args:
+            source: Fichier à publier.
+            name: Nom du fichier dans les destinations.
+            destinations: Répertoires de destination.
+            max_attempts: Nombre de tentatives par copie
+                (``MAX_COPY_ATTEMPTS`` par défaut).
+            local_source: Copie locale identique à ``source``, envoyée
+                lorsque la copie côté serveur est impossible.
+
+        Returns:
+            True si toutes les copies ont réussi.
+        """
+        return self.publish_files(
+            [(source, name, local_source)], destinations, max_attempts=max_attempts
+        )[0]
+
+    def publish_files(
+        self,
+        files: list[tuple[Path, str, Optional[Path]]],
+        destinations: list[str],
+        max_attempts: Optional[int] = None
+    ) -> list[bool]:
+        """
+        Copie plusieurs fichiers dans les mêmes répertoires de destination.
+
+        Chaque répertoire est créé et son listing en cache invalidé une
+        seule fois pour l'ensemble des fichiers.
+
+        Args:
+            files: Fichiers à publier (source, nom dans les destinations,
+                copie locale identique à la source ou None).
+            destinations: Répertoires de destination.
+            max_attempts: Nombre de tentatives par copie
+                (``MAX_COPY_ATTEMPTS`` par défaut).
+
+        Returns:
+            Pour chaque fichier, True si toutes ses copies ont réussi.
+        """
+        results = [True] * len(files)
+
+        for destination in destinations:
+            os.makedirs(destination, exist_ok=True)
+            for index, (source, name, local_source) in enumerate(files):
+                source = Path(source)
+                dest = Path(destination) / name
+                if self._is_same_file(source, dest):
+                    continue
+                try:
+                    if not self._copy_with_retry(
+                        source, dest, metric=None, max_attempts=max_attempts, local_source=local_source
+                    ):
+                        results[index] = False
+                except OSError as e:
+                    logger.error(f"Échec de copie {source} -> {dest}: {e}")
+                    results[index] = False
+            # Le listing en cache de la destination n'est plus à jour
+            PathResolverService.get_instance().invalidate(Path(destination))
+
+        logger.info(
+            "Transferts cumulés: "
+            + ", ".join(f"{key}={value}" for key, value in sorted(self.metrics.items()))
+        )
+        return results
+
+    def cleanup(self, staged: StagedFile) -> None:
+        """Supprime la copie locale et l'image convertie associée."""
+        try:
+            if staged.is_local and staged.path.exists():
+                os.remove(staged.path)
+
+            # Image convertie nommée d'après le fichier lu (la source en mode direct)
+            converted_path = Path(staged.work_dir) / f"{staged.path.stem}.ia.jpeg"
+            if converted_path.exists():
+                os.remove(converted_path)
+        except Exception as e:
+            logger.warning(f"Erreur lors du nettoyage: {e}")
+
+    def _copy_with_retry(
+        self,
+        source: Path,
+        dest: Path,
+        metric: Optional[str],
+        max_attempts: Optional[int] = None,
+        local_source: Optional[Path] = None
+    ) -> bool:
+        """
+        Copie un fichier en réessayant si la source est verrouillée.
+
+        Args:
+            metric: Compteur à utiliser pour les octets copiés
+                (méthode de copie effective par défaut).
+            max_attempts: Nombre de tentatives (``MAX_COPY_ATTEMPTS`` par défaut).
+            local_source: Copie locale de ``source`` pour la copie octet par octet.
+
+        Returns:
+            True si la copie a réussi.
+        """
+        last_error: Optional[Exception] = None
+        max_attempts = max_attempts or self.MAX_COPY_ATTEMPTS
+
+        for attempt in range(max_attempts):
+            try:
+                method, size = self._copy(
+                    source, dest, allow_link=metric is None, local_source=local_source
+                )
+                self.metrics[f"{metric or method}_bytes"] += size
+                self.metrics[f"{metric or method}_files"] += 1
+                logger.debug(f"Fichier copié ({method}, {size} octets): {dest}")
+                return True
+
+            except PermissionError as e:
+                last_error = e
+            except OSError as e:
+                if getattr(e, 'winerror', None) == 32 or "used by another process" in str(e):
+                    last_error = e
+                else:
+                    raise
+
+            logger.warning(
+                f"Tentative {attempt + 1}/{max_attempts}: "
+                f"fichier verrouillé ou inaccessible {source}"
+            )
+            if attempt + 1 < max_attempts:
+                time.sleep(self.COPY_RETRY_DELAY)
+
+        logger.error(f"Échec de copie après {max_attempts} tentatives: {last_error}")
+        return False
+
+    def _copy(
+        self,
+        source: Path,
+        dest: Path,
+        allow_link: bool,
+        local_source: Optional[Path] = None
+    ) -> tuple[str, int]:
+        """
+        Copie un fichier avec la méthode la moins coûteuse disponible.
+
+        Returns:
+            La méthode utilisée (``hardlink``, ``server_side``,
+            ``local_copy``, ``byte_copy``) et la taille du fichier.
+        """
+        size = source.stat().st_size
+
+        if allow_link and self.use_hardlink:
+            try:
+                if dest.exists():
+                    dest.unlink()
+                os.link(source, dest)
+                return "hardlink", size
+            except OSError:
+                pass
+
+        if hasattr(os, 'copy_file_range'):
+            try:
+                self._copy_file_range(source, dest, size)
+                shutil.copystat(source, dest)
+                return "server_side", size
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL, errno.EBADF):
+                    raise
+
+        if local_source is not None and Path(local_source).exists():
+            # Un seul transfert (local -> NAS) au lieu de NAS -> conteneur -> NAS
+            shutil.copy2(local_source, dest)
+            return "local_copy", size
+
+        shutil.copy2(source, dest)
+        return "byte_copy", size
+
+    def _copy_file_range(self, source: Path, dest: Path, size: int) -> None:
+        """Copie par copy_file_range (copie côté serveur NFS/SMB ou reflink local)."""
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            copied = 0
+            while copied < size:
+                count = os.copy_file_range(
+                    src.fileno(), dst.fileno(), min(self.COPY_CHUNK_SIZE, size - copied)
+                )
+                if count == 0:
+                    break
+                copied += count
+            if copied < size:
+                raise OSError(errno.EINVAL, f"copy_file_range incomplet: {copied}/{size}")
+
+    @staticmethod
+    def _is_same_file(source: Path, dest: Path) -> bool:
+        """Indique si la destination est déjà le fichier source."""
+        try:
+            return os.path.samefile(source, dest)
+        except OSError:
+            return False
@@ -0,0 +1,190 @@
+"""
+Service de budget des images envoyées à OpenAI Vision.
+
+Les pages rendues à 300 DPI (~2480x3508) sont redimensionnées côté API:
+en détail ``high``, l'image est ramenée dans un carré de 2048 px puis son
+petit côté à 768 px, et facturée 85 tokens plus 170 par tuile de 512 px.
+Envoyer une image plus grande n'apporte donc rien et alourdit l'envoi.
+
+Ce module ramène l'image à la taille utile (celle que l'API retiendrait),
+éventuellement dans la limite d'un nombre de tuiles et d'une longueur
+maximale, choisit le niveau de détail et journalise la taille envoyée et
+l'estimation des tokens image.
+"""
+
+import base64
+import io
+import math
+import os
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+
+from PIL import Image
+
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+@dataclass
+class BudgetedImage:
+    """
+    Image prête à être envoyée à l'API Vision.
+
+    Préparée une fois par document, elle peut être réutilisée pour tous
+    les appels Vision de ce document (l'encodage base64 est conservé).
+    """
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    detail: str
+    original_bytes: int
+    estimated_tokens: int
+
+    @cached_property
+    def base64(self) -> str:
+        """Contenu encodé en base64."""
+        return base64.b64encode(self.data).decode('utf-8')
+
+    @cached_property
+    def data_url(self) -> str:
+        """URL ``data:`` à placer dans le message."""
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+
+class ImageBudgetService:
+    """
+    Redimensionnement des images selon un budget de tuiles.
+
+    Attributes:
+        max_long_edge: Longueur maximale du grand côté en pixels.
+        max_tiles: Nombre maximal de tuiles de 512 px (détail ``high``), ou
+            None pour s'en tenir aux règles de l'API: un plafond réduit
+            une image haute (première et dernière pages) sous la taille
+            que l'API utiliserait.
+        detail: Niveau de détail (``high``, ``low`` ou ``auto``: ``low``
+            pour les petites images, ``high`` sinon).
+    """
+
+    DEFAULT_MAX_LONG_EDGE: int = 2048
+    DEFAULT_DETAIL: str = "high"
+    JPEG_QUALITY: int = 85
+
+    # Règles de redimensionnement et de facturation de l'API
+    TILE_SIZE: int = 512
+    BASE_TOKENS: int = 85
+    TILE_TOKENS: int = 170
+    HIGH_DETAIL_MAX_EDGE: int = 2048
+    HIGH_DETAIL_SHORT_EDGE: int = 768
+    LOW_DETAIL_EDGE: int = 512
+
+    def __init__(
+        self,
+        max_long_edge: Optional[int] = None,
+        max_tiles: Optional[int] = None,
+        detail: Optional[str] = None
+    ):
+        """
+        Initialise le service.
+
+        Args:
+            max_long_edge: Grand côté maximal (``AI_VISION_MAX_EDGE`` par défaut).
+            max_tiles: Tuiles maximales (``AI_VISION_MAX_TILES`` par défaut,
+                sans plafond si la variable n'est pas définie).
+            detail: Niveau de détail (``AI_VISION_DETAIL`` par défaut).
+        """
+        self.max_long_edge = max_long_edge or int(
+            os.getenv('AI_VISION_MAX_EDGE', self.DEFAULT_MAX_LONG_EDGE)
+        )
+        env_max_tiles = os.getenv('AI_VISION_MAX_TILES')
+        self.max_tiles = max_tiles or (int(env_max_tiles) if env_max_tiles else None)
+        self.detail = detail or os.getenv('AI_VISION_DETAIL', self.DEFAULT_DETAIL)
+
+    def prepare(self, image_path: str) -> BudgetedImage:
+        """
+        Charge une image et la ramène au budget.
+
+        Args:
+            image_path: Chemin de l'image.
+
+        Returns:
+            L'image encodée en JPEG avec ses métriques.
+        """
+        original_bytes = os.path.getsize(image_path)
+        with Image.open(image_path) as image:
+            resized, detail = self.fit(image)
+
+        buffer = io.BytesIO()
+        resized.save(buffer, 'JPEG', quality=self.JPEG_QUALITY, optimize=True)
+        data = buffer.getvalue()
+
+        budgeted = BudgetedImage(
+            data=data,
+            mime_type='image/jpeg',
+            width=resized.width,
+            height=resized.height,
+            detail=detail,
+            original_bytes=original_bytes,
+            estimated_tokens=self.estimate_tokens(resized.width, resized.height, detail)
+        )
+        logger.info(
+            f"Image Vision: {budgeted.width}x{budgeted.height} ({detail}), "
+            f"{original_bytes} -> {len(data)} octets, "
+            f"~{budgeted.estimated_tokens} tokens image"
+        )
+        return budgeted
+
+    def fit(self, image: Image.Image) -> tuple[Image.Image, str]:
+        """
+        Redimensionne une image au budget.
+
+        Returns:
+            L'image redimensionnée (convertie en RGB) et le niveau de détail.
+        """
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        detail = self.select_detail(image.width, image.height)
+        width, height = self.target_size(image.width, image.height, detail)
+        if (width, height) != image.size:
+            image = image.resize((width, height), Image.LANCZOS)
+        return image, detail
+
+    def select_detail(self, width: int, height: int) -> str:
+        """Choisit le niveau de détail pour une image."""
+        if self.detail != "auto":
+            return self.detail
+        return "low" if max(width, height) <= self.LOW_DETAIL_EDGE else "high"
+
+    def target_size(self, width: int, height: int, detail: str) -> tuple[int, int]:
+        """Calcule la taille utile d'une image (jamais agrandie)."""
+        long_edge = max(width, height)
+        short_edge = min(width, height)
+
+        if detail == "low":
+            scale = min(1.0, self.LOW_DETAIL_EDGE / long_edge)
+        else:
+            scale = min(
+                1.0,
+                self.HIGH_DETAIL_MAX_EDGE / long_edge,
+                self.max_long_edge / long_edge
+            )
+            scale = min(scale, self.HIGH_DETAIL_SHORT_EDGE / short_edge)
+            while self.max_tiles and scale > 0.1 and self.count_tiles(
+                round(width * scale), round(height * scale)
+            ) > self.max_tiles:
+                scale *= 0.9
+
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def count_tiles(self, width: int, height: int) -> int:
+        """Nombre de tuiles de 512 px couvrant l'image."""
+        return math.ceil(width / self.TILE_SIZE) * math.ceil(height / self.TILE_SIZE)
+
+    def estimate_tokens(self, width: int, height: int, detail: str) -> int:
+        """Estimation des tokens facturés pour une image à cette taille."""
+        if detail == "low":
+            return self.BASE_TOKENS
+        return self.BASE_TOKENS + self.TILE_TOKENS * self.count_tiles(width, height)
@@ -17,6 +17,7 @@ from typing import Optional
 
 from dotenv import load_dotenv
 from services.logger import Logger
+from services.path_resolver_service import PathResolverService
 
 load_dotenv()
 logger = Logger.get_logger()
@@ -56,6 +57,7 @@ class ImageService:
         )
         self.NAS_BASE = os.getenv('NAS_BASE', r'//NAS/intranet images')
         self.allowed_extensions = self.DEFAULT_ALLOWED_EXTENSIONS
+        self.path_resolver = PathResolverService.get_instance()
 
     def get_image_path(
         self,
@@ -72,6 +74,9 @@ class ImageService:
         2. Ancien répertoire (OLD_IMAGE_A_TRAITER)
         3. Chemin de sortie spécifié
         
+        Les répertoires sont listés une fois et mis en cache
+        (voir PathResolverService) au lieu d'un accès réseau par candidat.
+        
         Args:
             img: Dictionnaire contenant les métadonnées de l'image:
                 - date_scan: Date de scan du document
@@ -116,39 +121,23 @@ class ImageService:
         filename = f"{img['name']}.{ext}"
         original_filename = f"{img['originale']}.{ext}"
 
-        # Tentative dans le répertoire principal
         if img.get('parent_name', ''):
             relative_path = Path(relative_path, img.get('parent_name', ''))
 
-        source_path = Path(self.IMAGE_A_TRAITER) / relative_path / filename
-        if self._file_exists(source_path):
-            logger.debug(f"fichier trouver dans : {source_path}")
-            return source_path
-        
-        logger.debug(f"fichier non trouver dans : {source_path}")
-        # Tentative dans l'ancien répertoire
-        source_path = Path(self.OLD_IMAGE_A_TRAITER) / relative_path / filename
-        if self._file_exists(source_path):
-            logger.debug(f"fichier trouver dans : {source_path}")
-            return source_path
-
-        logger.debug(f"fichier non trouver dans : {source_path}")
-        # Tentative dans le répertoire de sortie
+        # Emplacements candidats, par ordre de priorité
+        candidates = [
+            Path(self.IMAGE_A_TRAITER) / relative_path / filename,
+            Path(self.OLD_IMAGE_A_TRAITER) / relative_path / filename,
+        ]
         if output_path:
-            source_path = Path(output_path) / filename
-            if self._file_exists(source_path):
-                return source_path
-                
-        logger.debug(f"fichier non trouver dans : {source_path}")
-
+            candidates.append(Path(output_path) / filename)
         if old_output_path:
-            source_path = Path(old_output_path) / filename
-            if self._file_exists(source_path):
-                return source_path
+            candidates.append(Path(old_output_path) / filename)
+        candidates.append(Path(self.OLD_IMAGE_A_TRAITER) / relative_path / original_filename)
 
-        logger.debug(f"fichier non trouver dans : {source_path}")
-        source_path = Path(self.OLD_IMAGE_A_TRAITER) / relative_path / original_filename
-        if self._file_exists(source_path):
+        # Résolution depuis les listings de répertoires en cache
+        source_path = self.path_resolver.resolve(candidates)
+        if source_path:
             logger.debug(f"fichier trouver dans : {source_path}")
             return source_path
 
@@ -278,20 +267,3 @@ class ImageService:
         if isinstance(date_scan, str):
             return datetime.fromisoformat(date_scan.replace('Z', '+00:00'))
         return date_scan
-
-    @staticmethod
-    def _file_exists(path: Path) -> bool:
-        """
-        Vérifie si un fichier existe.
-        
-        Args:
-            path: Chemin du fichier à vérifier.
-            
-        Returns:
-            True si le fichier existe et est accessible.
-        """
-        try:
-            path.stat()
-            return True
-        except (FileNotFoundError, OSError):
-            return False
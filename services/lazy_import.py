@@ -0,0 +1,56 @@
+"""
+Import différé des bibliothèques lourdes.
+
+Les bibliothèques comme OpenCV, NumPy, Tesseract, PyPDF2 ou OpenAI
+coûtent plusieurs centaines de millisecondes à l'import. Avec la méthode
+de démarrage ``spawn``, chaque worker les réimporte: elles ne sont donc
+chargées qu'au premier accès à un de leurs attributs.
+
+``importlib.util.LazyLoader`` n'est pas sûr entre threads avant Python
+3.12 (premier accès simultané depuis les threads OCR): le module est
+donc représenté par un substitut qui importe le vrai module sous verrou.
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+
+_import_lock = threading.RLock()
+
+
+class _LazyModule(ModuleType):
+    """Substitut d'un module, importé au premier accès à un attribut."""
+
+    def __getattr__(self, attr: str):
+        with _import_lock:
+            module = importlib.import_module(self.__name__)
+            # Attributs recopiés: les accès suivants ne passent plus par ici
+            self.__dict__.update(
+                (key, value) for key, value in module.__dict__.items() if key not in ('__name__',)
+            )
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Retourne le module ``name``, chargé au premier accès à un attribut.
+
+    Args:
+        name: Nom complet du module.
+
+    Returns:
+        Le module s'il est déjà chargé, sinon son substitut.
+
+    Raises:
+        ModuleNotFoundError: Si le module n'est pas installé.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    return _LazyModule(name)
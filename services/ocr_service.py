@@ -1,21 +1,138 @@
-import cv2
-import numpy as np
-import pytesseract
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import logging
+import tempfile
 import uuid
 
+from services.lazy_import import lazy_import
 from services.logger import Logger
 
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+pytesseract = lazy_import("pytesseract")
+
 logger = Logger.get_logger()
 
 
 class OCRService:
     
+    # Strategies from cheapest to heaviest
+    STRATEGIES = ['light', 'balanced', 'aggressive']
+    
+    # Mean word confidence (0-100) under which the next strategy is tried
+    DEFAULT_MIN_CONFIDENCE = 60.0
+    
+    # Width of the downscaled copy used for quality estimation
+    QUALITY_SAMPLE_WIDTH = 800
+    
+    # Quality thresholds (measured on the downscaled copy)
+    NOISE_THRESHOLD = 8.0
+    HIGH_NOISE_THRESHOLD = 18.0
+    LOW_CONTRAST_THRESHOLD = 40.0
+    BLUR_THRESHOLD = 150.0
+    
+    # Configurations run concurrently by the multi-strategy mode, most likely first
+    MULTI_STRATEGY_CONFIGS = [
+        {'name': 'light_psm3', 'strategy': 'light', 'psm': 3},
+        {'name': 'light_psm6', 'strategy': 'light', 'psm': 6},
+        {'name': 'balanced_psm3', 'strategy': 'balanced', 'psm': 3},
+        {'name': 'balanced_psm6', 'strategy': 'balanced', 'psm': 6},
+        {'name': 'aggressive_psm6', 'strategy': 'aggressive', 'psm': 6},
+    ]
+    
+    DEFAULT_PARALLEL_THREADS = 3
+    
+    def __init__(self, worker_processes: int = 1):
+        """
+        Args:
+            worker_processes: Number of processes running OCR at the same
+                time; the multi-strategy mode only uses their share of the cores.
+        """
+        self.min_confidence = float(os.getenv('AI_OCR_MIN_CONFIDENCE', self.DEFAULT_MIN_CONFIDENCE))
+        self.parallel_threads = min(
+            int(os.getenv('AI_OCR_PARALLEL_THREADS', self.DEFAULT_PARALLEL_THREADS)),
+            self.available_cores(worker_processes)
+        )
+    
+    @staticmethod
+    def available_cores(worker_processes: int = 1) -> int:
+        """Cores available to one worker process (at least 1)"""
+        try:
+            cores = len(os.sched_getaffinity(0))
+        except AttributeError:
+            cores = os.cpu_count() or 1
+        return max(1, cores // max(1, worker_processes))
+    
     @staticmethod
     def denoise(image: np.ndarray) -> np.ndarray:
         """Apply denoising to reduce image noise"""
         return cv2.fastNlMeansDenoising(image, None, 10, 7, 21)
     
+    @staticmethod
+    def denoise_roi(image: np.ndarray, search_window: int = 11) -> np.ndarray:
+        """
+        Denoise only the region containing ink
+        
+        The bounding box of the content is located on a downscaled copy.
+        An 11px search window is about 3.5x cheaper than the 21px default.
+        """
+        h, w = image.shape[:2]
+        scale = min(1.0, OCRService.QUALITY_SAMPLE_WIDTH / w)
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+        
+        _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        coords = cv2.findNonZero(ink)
+        if coords is None:
+            return image
+        
+        x, y, bw, bh = cv2.boundingRect(coords)
+        margin = 10
+        x0 = max(0, int(x / scale) - margin)
+        y0 = max(0, int(y / scale) - margin)
+        x1 = min(w, int((x + bw) / scale) + margin)
+        y1 = min(h, int((y + bh) / scale) + margin)
+        
+        result = image.copy()
+        result[y0:y1, x0:x1] = cv2.fastNlMeansDenoising(image[y0:y1, x0:x1], None, 10, 7, search_window)
+        return result
+    
+    @staticmethod
+    def estimate_quality(gray: np.ndarray) -> dict:
+        """
+        Estimate noise, contrast and blur on a downscaled copy of the page
+        
+        Returns:
+            Dictionary with 'noise' (std of the residual after a median blur),
+            'contrast' (spread between the 5th and 95th percentiles) and
+            'sharpness' (variance of the Laplacian)
+        """
+        h, w = gray.shape[:2]
+        scale = min(1.0, OCRService.QUALITY_SAMPLE_WIDTH / w)
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+        
+        residual = small.astype(np.int16) - cv2.medianBlur(small, 3).astype(np.int16)
+        low, high = np.percentile(small, [5, 95])
+        
+        return {
+            'noise': float(np.std(residual)),
+            'contrast': float(high - low),
+            'sharpness': float(cv2.Laplacian(small, cv2.CV_64F).var()),
+        }
+    
+    def select_strategy(self, quality: dict) -> str:
+        """Pick the cheapest strategy likely to succeed for the measured quality"""
+        if quality['noise'] >= self.HIGH_NOISE_THRESHOLD:
+            return 'aggressive'
+        if (
+            quality['noise'] >= self.NOISE_THRESHOLD
+            or quality['contrast'] < self.LOW_CONTRAST_THRESHOLD
+            or quality['sharpness'] < self.BLUR_THRESHOLD
+        ):
+            return 'balanced'
+        return 'light'
+    
     @staticmethod
     def deskew(image: np.ndarray) -> np.ndarray:
         """Deskew image to correct rotation"""
@@ -67,7 +184,7 @@ class OCRService:
             image, 255, 
             cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
             cv2.THRESH_BINARY, 
-            10, 1
+            11, 1
         )
     
     @staticmethod
@@ -95,14 +212,14 @@ class OCRService:
             
         elif strategy == 'balanced':
             # Standard processing for most documents
-            gray = self.denoise(gray)
+            gray = self.denoise_roi(gray)
             gray = self.enhance_contrast(gray)
             gray = self.sharpen_image(gray)
             return self.adaptive_threshold(gray)
             
         elif strategy == 'aggressive':
             # Heavy processing for degraded documents
-            gray = self.denoise(gray)
+            gray = self.denoise_roi(gray, search_window=21)
             gray = self.remove_borders(gray)
             gray = self.enhance_contrast(gray)
             gray = self.sharpen_image(gray)
@@ -131,6 +248,156 @@ class OCRService:
         config = f'--oem {oem} --psm {psm}'
         return pytesseract.image_to_string(image, lang=lang, config=config)
     
+    def extract_data_with_config(self, image: np.ndarray | str, lang: str = 'eng+fra',
+                                 psm: int = 6, oem: int = 3) -> tuple[str, float]:
+        """
+        Extract text and mean word confidence in a single Tesseract run
+        
+        The text is Tesseract's plain-text output (the same as
+        ``image_to_string``); the confidence comes from the TSV output
+        written by the same run. ``image`` is an array or a file path.
+        
+        Returns:
+            Tuple (text, mean confidence of recognised words, 0-100)
+        """
+        config = f'--oem {oem} --psm {psm} -c tessedit_create_tsv=1'
+        with tempfile.TemporaryDirectory(prefix='ocr_') as tmp_dir:
+            if isinstance(image, str):
+                input_path = image
+            else:
+                input_path = os.path.join(tmp_dir, 'input.png')
+                cv2.imwrite(input_path, image)
+            output_base = os.path.join(tmp_dir, 'output')
+            pytesseract.pytesseract.run_tesseract(
+                input_path, output_base, extension='txt', lang=lang, config=config
+            )
+            with open(f'{output_base}.txt', encoding='utf-8') as f:
+                text = f.read()
+            with open(f'{output_base}.tsv', encoding='utf-8') as f:
+                tsv = f.read()
+        
+        return text, self.mean_confidence(tsv)
+    
+    @staticmethod
+    def mean_confidence(tsv: str) -> float:
+        """
+        Mean confidence of the recognised words of a Tesseract TSV output
+        
+        Returns:
+            Mean confidence (0-100), 0 when no word was recognised
+        """
+        rows = [row.split('\t') for row in tsv.splitlines()]
+        if not rows:
+            return 0.0
+        header = rows[0]
+        conf_index, text_index = header.index('conf'), header.index('text')
+        
+        confidences = []
+        for row in rows[1:]:
+            if len(row) <= text_index or not row[text_index].strip():
+                continue
+            conf = float(row[conf_index])
+            if conf >= 0:
+                confidences.append(conf)
+        
+        return sum(confidences) / len(confidences) if confidences else 0.0
+    
+    def ocr_extraction_adaptive(self, image, config) -> tuple[str, float]:
+        """
+        OCR with the cheapest suitable strategy, escalating on low confidence
+        
+        The starting strategy comes from the quality estimate; heavier
+        strategies are only tried while the mean word confidence stays
+        below ``min_confidence`` and some words were recognised (a blank
+        page stops after one pass). The most confident result is returned.
+        
+        Returns:
+            Tuple (text, mean word confidence)
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        quality = self.estimate_quality(gray)
+        strategy = self.select_strategy(quality)
+        logger.info(
+            f"OCR quality: noise={quality['noise']:.1f} contrast={quality['contrast']:.0f} "
+            f"sharpness={quality['sharpness']:.0f} -> {strategy}"
+        )
+        
+        best_text, best_confidence = '', -1.0
+        for strategy in self.STRATEGIES[self.STRATEGIES.index(strategy):]:
+            preprocessed = self.preprocess_pipeline(gray, strategy)
+            text, confidence = self.extract_data_with_config(
+                preprocessed,
+                lang=config.get('lang', 'eng+fra'),
+                psm=config.get('psm', 6),
+                oem=config.get('oem', 3)
+            )
+            logger.info(f"OCR strategy {strategy}: confidence {confidence:.1f}")
+            
+            if confidence > best_confidence:
+                best_text, best_confidence = text, confidence
+            if confidence >= self.min_confidence:
+                break
+            if not text.strip():
+                # Blank page: no recognised word, heavier preprocessing will not find any
+                break
+        
+        return best_text, best_confidence
+    
+    def ocr_extraction_parallel(self, image, configs: list[dict] = None) -> tuple[str, float, str]:
+        """
+        Run several (strategy, psm) configurations concurrently and keep the best
+        
+        Tesseract runs in a subprocess, so configurations really run in
+        parallel on the thread pool, bounded to this worker's share of the
+        cores. As soon as one result reaches ``min_confidence``,
+        configurations not yet started are cancelled and that result is
+        returned once the running ones have finished (no Tesseract process
+        is left running behind the next page); otherwise the most confident
+        one is.
+        
+        Returns:
+            Tuple (text, mean word confidence, configuration name)
+        """
+        configs = configs or self.MULTI_STRATEGY_CONFIGS
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        
+        def run(config: dict) -> tuple[str, float, str]:
+            preprocessed = self.preprocess_pipeline(gray, config['strategy'])
+            text, confidence = self.extract_data_with_config(
+                preprocessed,
+                lang=config.get('lang', 'eng+fra'),
+                psm=config.get('psm', 6),
+                oem=config.get('oem', 3)
+            )
+            return text, confidence, config['name']
+        
+        best = ('', -1.0, '')
+        executor = ThreadPoolExecutor(max_workers=self.parallel_threads, thread_name_prefix="ocr")
+        try:
+            pending = {executor.submit(run, config) for config in configs}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning(f"OCR configuration failed: {e}")
+                        continue
+                    logger.info(f"OCR {result[2]}: confidence {result[1]:.1f}")
+                    if result[1] > best[1]:
+                        best = result
+                
+                if best[1] >= self.min_confidence:
+                    for future in pending:
+                        future.cancel()
+                    break
+        finally:
+            # Running Tesseract calls (at most one per core) are waited for, their results ignored
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        logger.info(f"OCR best configuration: {best[2]} (confidence {best[1]:.1f})")
+        return best
+    
     def ocr_extraction(self, image, config):
         preprocessed = self.preprocess_pipeline(image, config['strategy'])
         text = self.extract_text_with_config(
@@ -160,17 +427,48 @@ class OCRService:
         if image is None:
             raise ValueError(f"Failed to load image: {image_path}")
         
-        # Define multiple extraction strategies
+        # Starting strategy is chosen from the page quality
         config = {
-                'name': 'light_psm3',
-                'strategy': 'light',
-                'psm': 3,  # Uniform block of text
+                'name': 'adaptive_psm3',
+                'psm': 3,  # Fully automatic page segmentation
                 'oem': 3,
                 'lang': 'eng+fra'
         }
         
         
+        logger.info("Running adaptive OCR extraction...")
+        text, _ = self.ocr_extraction_adaptive(image, config)
+        
+        return text
+    
+    def extract_from_image_with_confidence(self, image_path: str) -> tuple[str, float]:
+        """
+        Same as extract_from_image, also returning the mean word confidence
+        
+        Returns:
+            Tuple (text, mean word confidence)
+        """
+        image = cv2.imread(image_path)
+        
+        if image is None:
+            raise ValueError(f"Failed to load image: {image_path}")
+        
+        return self.ocr_extraction_adaptive(image, {'psm': 3, 'oem': 3, 'lang': 'eng+fra'})
+    
+    def extract_from_image_multi(self, image_path: str) -> tuple[str, float]:
+        """
+        Multi-strategy extraction: several configurations in parallel, early stop
+        
+        Returns:
+            Tuple (best text, its mean word confidence)
+        """
+        logger.info(f"Reading image: {image_path}")
+        image = cv2.imread(image_path)
+        
+        if image is None:
+            raise ValueError(f"Failed to load image: {image_path}")
+        
         logger.info("Running parallel OCR extraction...")
-        text = self.ocr_extraction(image, config)
+        text, confidence, _ = self.ocr_extraction_parallel(image)
         
-        return text
\ No newline at end of file
+        return text, confidence
\ No newline at end of file
@@ -11,16 +11,20 @@ import json
 import os
 from typing import Any, Optional
 
-from openai import OpenAI
-
 from repositories.ai_separation_context_repository import AiSeparationContextRepository
 from services import constant
 from services.constant import CategorieId, OpenAIModel
+from services.lazy_import import lazy_import
 from services.logger import Logger
+from services.prompt_assembler import log_usage
+from services.prompt_registry import PromptRegistry
+from services.response_schemas import CLASSIFICATION, VALIDATION, ResponseSchema
 from services.utils_service import UtilsService
 
 logger = Logger.get_logger()
 
+openai = lazy_import("openai")
+
 
 class OpenAIService:
     """
@@ -33,6 +37,7 @@ class OpenAIService:
     Attributes:
         client: Client OpenAI configuré avec la clé API.
         model: Modèle par défaut à utiliser.
+        prompt_registry: Templates compilés et prompts système rendus par dossier.
     """
     
     # Placeholders supportés dans les prompts
@@ -54,8 +59,9 @@ class OpenAIService:
         Args:
             model: Modèle par défaut à utiliser pour les requêtes.
         """
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = model
+        self.prompt_registry = PromptRegistry.get_instance()
 
     def response_parse(self, response: str) -> dict[str, Any]:
         """
@@ -94,7 +100,8 @@ class OpenAIService:
         self,
         system_prompt: str,
         user_prompt: str,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        response_schema: Optional[ResponseSchema] = None
     ) -> str:
         """
         Appelle l'API OpenAI avec les prompts spécifiés.
@@ -103,6 +110,8 @@ class OpenAIService:
             system_prompt: Instructions système pour le modèle.
             user_prompt: Message utilisateur à traiter.
             model: Modèle à utiliser (utilise le modèle par défaut si None).
+            response_schema: Format de réponse imposé et plafond de tokens (optionnel);
+                une réponse coupée par le plafond est redemandée sans plafond.
             
         Returns:
             Contenu de la réponse du modèle.
@@ -117,15 +126,54 @@ class OpenAIService:
         effective_model = model or self.model
         logger.info(f"Appel API OpenAI avec le modèle: {effective_model}")
         
+        options = {}
+        if response_schema is not None:
+            options = {
+                "response_format": response_schema.response_format(),
+                "max_completion_tokens": response_schema.max_tokens,
+            }
+            if response_schema.schema is None:
+                # Le mode json_object exige la mention de JSON dans les messages
+                system_prompt += "\n\nRéponds uniquement avec un objet JSON."
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
         completion = self.client.chat.completions.create(
             model=effective_model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
+            messages=messages,
+            **options
         )
+        if completion.choices[0].finish_reason == "length" and "max_completion_tokens" in options:
+            # Réponse coupée par le plafond: conservée au prix d'un nouvel appel sans plafond
+            log_usage(completion)
+            logger.warning(
+                f"Réponse {response_schema.name} tronquée à {options['max_completion_tokens']} tokens, "
+                f"nouvel appel sans plafond (AI_OPENAI_MAX_TOKENS_{response_schema.name.upper()})"
+            )
+            del options["max_completion_tokens"]
+            completion = self.client.chat.completions.create(
+                model=effective_model,
+                messages=messages,
+                **options
+            )
         
-        return completion.choices[0].message.content
+        return self.completion_content(completion)
+
+    @staticmethod
+    def completion_content(completion) -> str:
+        """
+        Retourne le contenu d'une réponse, en erreur si le modèle a refusé
+        de répondre ou si la réponse est incomplète.
+        """
+        log_usage(completion)
+        choice = completion.choices[0]
+        if getattr(choice.message, 'refusal', None):
+            raise ValueError(f"Refus du modèle: {choice.message.refusal}")
+        if choice.finish_reason == "length":
+            raise ValueError("Réponse tronquée (limite de tokens du modèle atteinte)")
+        return choice.message.content
 
     def categorisation(
         self,
@@ -174,19 +222,20 @@ class OpenAIService:
             # Récupération des contextes personnalisés
             self._add_custom_contexts(replacements, image)
 
-            # Application des remplacements au prompt
+            # Assemblage du prompt: règles, puis contexte du dossier
             if prompt_system:
-                prompt_system = self._apply_replacements(prompt_system, replacements)
+                prompt_system = self.prompt_registry.system_prompt(prompt_system, replacements)
 
             # Appel à l'API
             response = self.call_agent(
                 system_prompt=prompt_system,
                 user_prompt=f"voici le contenu de la première page du document : {user_prompt}",
-                model=model
+                model=model,
+                response_schema=CLASSIFICATION
             )
             
             logger.info(f"Réponse brute OpenAI: {response}")
-            return self.response_parse(response)
+            return CLASSIFICATION.parse(response)
 
         except Exception as e:
             logger.error(f"Erreur de catégorisation: {e}")
@@ -221,10 +270,10 @@ class OpenAIService:
                 image.get('dossier_id')
             )
 
-            # Chargement du template de prompt
-            system_prompt = self._load_prompt_template('services/prompts/validation.md')
+            # Template de prompt (lu une fois par processus)
+            template = self.prompt_registry.load('services/prompts/validation.md')
             
-            # Application des remplacements
+            # Assemblage du prompt: règles, puis contexte du dossier
             replacements = {
                 '{{dossier_nom}}': image.get('dossier_nom', ''),
                 '{{dossier_ape}}': image.get('ape', ''),
@@ -238,15 +287,16 @@ class OpenAIService:
                 '{{recepteur}}': image.get('Recepeutteur', ''),
             }
             
-            system_prompt = self._apply_replacements(system_prompt, replacements)
+            system_prompt = self.prompt_registry.system_prompt(template, replacements)
 
             response = self.call_agent(
                 system_prompt=system_prompt,
                 user_prompt=f"voici le contenu de la première page du document : {user_prompt}",
-                model=model
+                model=model,
+                response_schema=VALIDATION
             )
 
-            return self.response_parse(response)
+            return VALIDATION.parse(response)
 
         except Exception as e:
             logger.error(f"Erreur de validation: {e}")
@@ -327,37 +377,6 @@ class OpenAIService:
             placeholder = category_placeholder_map.get(categorie_id, '{{autre_remarque}}')
             replacements[placeholder] += f"{contexte_text}, "
 
-    @staticmethod
-    def _apply_replacements(template: str, replacements: dict[str, str]) -> str:
-        """
-        Applique les remplacements de placeholders dans un template.
-        
-        Args:
-            template: Template avec placeholders.
-            replacements: Dictionnaire placeholder -> valeur.
-            
-        Returns:
-            Template avec les placeholders remplacés.
-        """
-        result = template
-        for placeholder, value in replacements.items():
-            result = result.replace(placeholder, str(value))
-        return result
-
-    @staticmethod
-    def _load_prompt_template(path: str) -> str:
-        """
-        Charge un template de prompt depuis un fichier.
-        
-        Args:
-            path: Chemin vers le fichier template.
-            
-        Returns:
-            Contenu du fichier template.
-        """
-        with open(path, 'r', encoding='utf-8') as f:
-            return f.read()
-
     @staticmethod
     def _create_error_response(error_message: str) -> dict[str, Any]:
         """
@@ -13,16 +13,21 @@ import os
 from pathlib import Path
 from typing import Any, Optional
 
-from openai import OpenAI
-
 from repositories.ai_separation_context_repository import AiSeparationContextRepository
 from services import constant
 from services.constant import CategorieId, OpenAIModel
+from services.image_budget_service import BudgetedImage, ImageBudgetService
+from services.lazy_import import lazy_import
 from services.logger import Logger
+from services.prompt_assembler import log_usage
+from services.prompt_registry import PromptRegistry
+from services.response_schemas import ANALYSE, CLASSIFICATION, COMBINED, EXTRACTION, VALIDATION, ResponseSchema
 from services.utils_service import UtilsService
 
 logger = Logger.get_logger()
 
+openai = lazy_import("openai")
+
 
 class OpenAIServiceVision:
     """
@@ -35,6 +40,7 @@ class OpenAIServiceVision:
     Attributes:
         client: Client OpenAI configuré avec la clé API.
         model: Modèle par défaut à utiliser.
+        prompt_registry: Templates compilés et prompts système rendus par dossier.
     """
     
     # Placeholders supportés dans les prompts
@@ -48,6 +54,22 @@ class OpenAIServiceVision:
         '{{activite_com_cat_2}}': 'activite_2',
         '{{activite_com_cat_3}}': 'activite_3',
     }
+    
+    # Consignes du mode combiné (classification et extraction en un appel)
+    COMBINED_PROMPT_TEMPLATE: str = """{{classification}}
+
+===============
+EXTRACTION DU CONTENU
+Si et seulement si le document relève de la catégorie ID {{categorie_id}},
+extrais également son contenu selon les instructions suivantes:
+
+{{extraction}}
+===============
+FORMAT DE RÉPONSE
+Réponds avec un objet JSON de la forme:
+{"classification": <réponse de classification au format demandé ci-dessus>,
+ "extraction": <contenu extrait au format demandé ci-dessus, ou null si la catégorie n'est pas {{categorie_id}}>}
+"""
 
     def __init__(self, model: str = OpenAIModel.GPT_4O_MINI.value):
         """
@@ -56,8 +78,10 @@ class OpenAIServiceVision:
         Args:
             model: Modèle par défaut à utiliser pour les requêtes (doit supporter la vision).
         """
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = model
+        self.image_budget_service = ImageBudgetService()
+        self.prompt_registry = PromptRegistry.get_instance()
 
     def response_parse(self, response: str) -> dict[str, Any]:
         """
@@ -167,12 +191,32 @@ class OpenAIServiceVision:
         # Sinon, c'est déjà une image
         return file_path, self._get_image_mime_type(file_path), False
 
+    def prepare_image(self, file_path: str) -> BudgetedImage:
+        """
+        Prépare un fichier (PDF ou image) pour les appels Vision.
+        
+        Le PDF est rendu, l'image ramenée au budget et encodée une seule
+        fois: le résultat peut être passé à chaque appel Vision du document
+        (paramètre ``vision_image``).
+        
+        Args:
+            file_path: Chemin vers le fichier (PDF ou image).
+            
+        Returns:
+            L'image prête à l'envoi.
+        """
+        prepared_image_path, _, _ = self._prepare_image_for_vision(file_path)
+        logger.info(f"Image préparée pour Vision ")
+        return self.image_budget_service.prepare(prepared_image_path)
+
     def call_agent_vision(
         self,
         system_prompt: str,
         image_path: str,
         user_prompt: Optional[str] = None,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        vision_image: Optional[BudgetedImage] = None,
+        response_schema: Optional[ResponseSchema] = None
     ) -> str:
         """
         Appelle l'API OpenAI Vision avec une image.
@@ -182,6 +226,10 @@ class OpenAIServiceVision:
             image_path: Chemin vers l'image à analyser.
             user_prompt: Message utilisateur optionnel à ajouter.
             model: Modèle à utiliser (utilise le modèle par défaut si None).
+            vision_image: Image déjà préparée (``prepare_image``); si None,
+                l'image est préparée depuis ``image_path``.
+            response_schema: Format de réponse imposé et plafond de tokens (optionnel);
+                une réponse coupée par le plafond est redemandée sans plafond.
             
         Returns:
             Contenu de la réponse du modèle.
@@ -189,12 +237,8 @@ class OpenAIServiceVision:
         effective_model = model or self.model
         logger.info(f"Appel API OpenAI Vision avec le modèle: {effective_model}")
         
-        # Préparation de l'image
-        prepared_image_path, mime_type, _ = self._prepare_image_for_vision(image_path)
-        logger.info(f"Image préparée pour Vision ")
-        # Encodage en base64
-        base64_image = self._encode_image_to_base64(prepared_image_path)
-        logger.info(f"Image encodée en base64 ")
+        # Préparation de l'image (rendu, budget et encodage)
+        image = vision_image or self.prepare_image(image_path)
         # Construction du message avec l'image
         content = [
             {
@@ -204,37 +248,67 @@ class OpenAIServiceVision:
             {
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:{mime_type};base64,{base64_image}"
+                    "url": image.data_url,
+                    "detail": image.detail
                 }
             }
         ]
-        system_prompt = system_prompt + """
-            ===============
-            Notez et c'est vraiment important que tous les reponse doit obligatoirement en json valide sans text suplementaire.
-            Contraintes de formatage STRICTES :
-                1 - Réponds UNIQUEMENT avec un objet JSON brut.
-                2 - Ne commence PAS par une phrase d'introduction.
-                3 - Ne termine PAS par une conclusion ou des explications.
-                4 - N'utilise PAS de blocs de code Markdown (pas de ```json).
-                5 - Le contenu doit commencer par { et finir par }.
-            ===============
-        """
+        options = {}
+        if response_schema is not None:
+            options = {
+                "response_format": response_schema.response_format(),
+                "max_completion_tokens": response_schema.max_tokens,
+            }
+            if response_schema.schema is None:
+                # Le mode json_object exige la mention de JSON dans les messages
+                system_prompt += "\n\nRéponds uniquement avec un objet JSON."
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content}
+        ]
         completion = self.client.chat.completions.create(
             model=effective_model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content}
-            ]
+            messages=messages,
+            **options
         )
+        if completion.choices[0].finish_reason == "length" and "max_completion_tokens" in options:
+            # Réponse coupée par le plafond: conservée au prix d'un nouvel appel sans plafond
+            log_usage(completion)
+            logger.warning(
+                f"Réponse {response_schema.name} tronquée à {options['max_completion_tokens']} tokens, "
+                f"nouvel appel sans plafond (AI_OPENAI_MAX_TOKENS_{response_schema.name.upper()})"
+            )
+            del options["max_completion_tokens"]
+            completion = self.client.chat.completions.create(
+                model=effective_model,
+                messages=messages,
+                **options
+            )
         
-        return completion.choices[0].message.content
+        return self.completion_content(completion)
+
+    @staticmethod
+    def completion_content(completion) -> str:
+        """
+        Retourne le contenu d'une réponse, en erreur si le modèle a refusé
+        de répondre ou si la réponse est incomplète.
+        """
+        log_usage(completion)
+        choice = completion.choices[0]
+        if getattr(choice.message, 'refusal', None):
+            raise ValueError(f"Refus du modèle: {choice.message.refusal}")
+        if choice.finish_reason == "length":
+            raise ValueError("Réponse tronquée (limite de tokens du modèle atteinte)")
+        return choice.message.content
 
     def categorisation(
         self,
         image_path: str,
         image: dict,
         model: str,
-        prompt_system: Optional[str]
+        prompt_system: Optional[str],
+        vision_image: Optional[BudgetedImage] = None
     ) -> dict[str, Any]:
         """
         Catégorise un document comptable via l'IA Vision.
@@ -246,6 +320,7 @@ class OpenAIServiceVision:
             image: Métadonnées de l'image contenant les infos du dossier.
             model: Modèle OpenAI à utiliser (doit supporter la vision).
             prompt_system: Template du prompt système avec placeholders.
+            vision_image: Image déjà préparée pour ce document (optionnel).
             
         Returns:
             Dictionnaire contenant:
@@ -276,9 +351,9 @@ class OpenAIServiceVision:
             # Récupération des contextes personnalisés
             self._add_custom_contexts(replacements, image)
 
-            # Application des remplacements au prompt
+            # Assemblage du prompt: règles, puis contexte du dossier
             if prompt_system:
-                prompt_system = self._apply_replacements(prompt_system, replacements)
+                prompt_system = self.prompt_registry.system_prompt(prompt_system, replacements)
 
             # Message utilisateur pour la vision
             user_prompt = "Analyse ce document comptable et classe-le selon les catégories disponibles. Extrais toutes les informations pertinentes du document."
@@ -288,11 +363,13 @@ class OpenAIServiceVision:
                 system_prompt=prompt_system or "",
                 image_path=image_path,
                 user_prompt=user_prompt,
-                model=model
+                model=model,
+                vision_image=vision_image,
+                response_schema=CLASSIFICATION
             )
             
             logger.info(f"Réponse brute OpenAI Vision: {response}")
-            return self.response_parse(response)
+            return CLASSIFICATION.parse(response)
 
         except Exception as e:
             logger.error(f"Erreur de catégorisation Vision: {e}")
@@ -313,22 +390,92 @@ class OpenAIServiceVision:
             # Note: pas de document_text car on utilise la vision
             replacements = self._build_replacements(image, [], [])
             
-            # Chargement du template de prompt
-            system_prompt = self._load_prompt_template('services/prompts/analyse.md')
-            system_prompt = self._apply_replacements(system_prompt, replacements)
+            # Template de prompt (lu une fois par processus)
+            template = self.prompt_registry.load('services/prompts/analyse.md')
+            system_prompt = self.prompt_registry.system_prompt(template, replacements)
             
             user_prompt = "Analyse ce document comptable et classe-le selon les catégories disponibles. Extrais toutes les informations pertinentes du document."
             response = self.call_agent_vision(
                 system_prompt=system_prompt,
                 image_path=image_path,
                 user_prompt=user_prompt,
-                model=model
+                model=model,
+                response_schema=ANALYSE
             )
-            return self.response_parse(response)
+            return ANALYSE.parse(response)
         except Exception as e:
             logger.error(f"Erreur d'analyse du document Vision: {e}")
             return self._create_error_response(str(e))
 
+    def categorisation_with_extraction(
+        self,
+        image_path: str,
+        image: dict,
+        model: str,
+        prompt_classification: str,
+        prompt_extraction: str,
+        expected_categorie_id: int,
+        vision_image: Optional[BudgetedImage] = None
+    ) -> tuple[dict[str, Any], Optional[dict[str, Any]]]:
+        """
+        Catégorise un document et extrait son contenu en un seul appel Vision.
+        
+        L'extraction n'est demandée que pour la catégorie supposée (celle
+        dont le prompt d'extraction est fourni): si le modèle retient une
+        autre catégorie, l'extraction est nulle et doit être faite à part.
+        
+        Args:
+            image_path: Chemin vers le fichier image/PDF à analyser.
+            image: Métadonnées de l'image contenant les infos du dossier.
+            model: Modèle OpenAI à utiliser (doit supporter la vision).
+            prompt_classification: Template du prompt de classification.
+            prompt_extraction: Template du prompt d'extraction de la catégorie supposée.
+            expected_categorie_id: Catégorie supposée.
+            vision_image: Image déjà préparée pour ce document (optionnel).
+            
+        Returns:
+            Tuple (classification, extraction ou None).
+        """
+        try:
+            utils_service = UtilsService()
+            fournisseurs, clients = utils_service.getFournisseurAndClientsList(
+                image.get('dossier_id')
+            )
+            replacements = self._build_replacements(image, fournisseurs, clients)
+            self._add_custom_contexts(replacements, image)
+            
+            # Consignes des deux prompts d'abord, contexte du dossier une seule fois à la fin
+            system_prompt = self.prompt_registry.system_prompt(
+                self.prompt_registry.compile(self.COMBINED_PROMPT_TEMPLATE).render({
+                    '{{classification}}': prompt_classification or "",
+                    '{{extraction}}': prompt_extraction or "",
+                    '{{categorie_id}}': str(expected_categorie_id),
+                }),
+                replacements
+            )
+            
+            user_prompt = "Analyse ce document comptable, classe-le selon les catégories disponibles et extrais son contenu si demandé."
+            response = self.call_agent_vision(
+                system_prompt=system_prompt,
+                image_path=image_path,
+                user_prompt=user_prompt,
+                model=model,
+                vision_image=vision_image,
+                response_schema=COMBINED
+            )
+            logger.info(f"Réponse brute OpenAI Vision (mode combiné): {response}")
+            
+            result = COMBINED.parse(response)
+            classification = result.get('classification')
+            if not isinstance(classification, dict):
+                raise ValueError("Classification absente de la réponse combinée")
+            extraction = result.get('extraction')
+            return classification, extraction if isinstance(extraction, dict) else None
+        
+        except Exception as e:
+            logger.error(f"Erreur de catégorisation Vision (mode combiné): {e}")
+            return self._create_error_response(str(e)), None
+
     def validation(
         self,
         image_path: str,
@@ -358,10 +505,10 @@ class OpenAIServiceVision:
                 image.get('dossier_id')
             )
 
-            # Chargement du template de prompt
-            system_prompt = self._load_prompt_template('services/prompts/validation.md')
+            # Template de prompt (lu une fois par processus)
+            template = self.prompt_registry.load('services/prompts/validation.md')
             
-            # Application des remplacements (sans document_text car vision)
+            # Assemblage du prompt (document_text fourni par l'image)
             replacements = {
                 '{{dossier_nom}}': image.get('dossier_nom', ''),
                 '{{dossier_ape}}': image.get('ape', ''),
@@ -375,7 +522,7 @@ class OpenAIServiceVision:
                 '{{recepteur}}': image.get('Recepeutteur', ''),
             }
             
-            system_prompt = self._apply_replacements(system_prompt, replacements)
+            system_prompt = self.prompt_registry.system_prompt(template, replacements)
 
             user_prompt = "Valide la classification de ce document comptable en analysant directement l'image."
 
@@ -383,10 +530,11 @@ class OpenAIServiceVision:
                 system_prompt=system_prompt,
                 image_path=image_path,
                 user_prompt=user_prompt,
-                model=model
+                model=model,
+                response_schema=VALIDATION
             )
 
-            return self.response_parse(response)
+            return VALIDATION.parse(response)
 
         except Exception as e:
             logger.error(f"Erreur de validation Vision: {e}")
@@ -465,37 +613,6 @@ class OpenAIServiceVision:
             placeholder = category_placeholder_map.get(categorie_id, '{{autre_remarque}}')
             replacements[placeholder] += f"{contexte_text}, "
 
-    @staticmethod
-    def _apply_replacements(template: str, replacements: dict[str, str]) -> str:
-        """
-        Applique les remplacements de placeholders dans un template.
-        
-        Args:
-            template: Template avec placeholders.
-            replacements: Dictionnaire placeholder -> valeur.
-            
-        Returns:
-            Template avec les placeholders remplacés.
-        """
-        result = template
-        for placeholder, value in replacements.items():
-            result = result.replace(placeholder, str(value))
-        return result
-
-    @staticmethod
-    def _load_prompt_template(path: str) -> str:
-        """
-        Charge un template de prompt depuis un fichier.
-        
-        Args:
-            path: Chemin vers le fichier template.
-            
-        Returns:
-            Contenu du fichier template.
-        """
-        with open(path, 'r', encoding='utf-8') as f:
-            return f.read()
-
     @staticmethod
     def _create_error_response(error_message: str) -> dict[str, Any]:
         """
@@ -518,7 +635,8 @@ class OpenAIServiceVision:
         image_path: str,
         image: dict,
         prompt_system: str,
-        model: str = OpenAIModel.GPT_4O_MINI.value
+        model: str = OpenAIModel.GPT_4O_MINI.value,
+        vision_image: Optional[BudgetedImage] = None
     ) -> dict[str, Any]:
         """
         Extrait le contenu d'un document comptable via l'IA Vision.
@@ -538,18 +656,20 @@ class OpenAIServiceVision:
             # Récupération des contextes personnalisés
             self._add_custom_contexts(replacements, image)
 
-            # Application des remplacements au prompt
+            # Assemblage du prompt: règles, puis contexte du dossier
             if prompt_system:
-                prompt_system = self._apply_replacements(prompt_system, replacements)
+                prompt_system = self.prompt_registry.system_prompt(prompt_system, replacements)
 
             user_prompt = "Extrait le contenu de la facture"
             response = self.call_agent_vision(
                 system_prompt=prompt_system,
                 image_path=image_path,
                 user_prompt=user_prompt,
-                model=model
+                model=model,
+                vision_image=vision_image,
+                response_schema=EXTRACTION
             )
-            return self.response_parse(response)
+            return EXTRACTION.parse(response)
         except Exception as e:
             logger.error(f"Erreur de extraction de contenu: {e}")
             return self._create_error_response(str(e))
\ No newline at end of file
@@ -6,16 +6,18 @@ OpenCV, notamment la détection et la correction de l'orientation des
 documents scannés.
 """
 
-from typing import Optional
+from __future__ import annotations
 
-import cv2
-import imutils
-import numpy as np
-import pytesseract
-from pytesseract import Output
+from typing import Optional
 
+from services.lazy_import import lazy_import
 from services.logger import Logger
 
+cv2 = lazy_import("cv2")
+imutils = lazy_import("imutils")
+np = lazy_import("numpy")
+pytesseract = lazy_import("pytesseract")
+
 logger = Logger.get_logger()
 
 
@@ -67,7 +69,7 @@ class OpenCvService:
             rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
             
             # Analyse de l'orientation via OSD (Orientation and Script Detection)
-            results = pytesseract.image_to_osd(rgb, output_type=Output.DICT)
+            results = pytesseract.image_to_osd(rgb, output_type=pytesseract.Output.DICT)
             
             return results, image
             
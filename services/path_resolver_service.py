@@ -0,0 +1,142 @@
+"""
+Service de résolution des chemins de fichiers sur le NAS.
+
+Les images d'un même lot sont dans le même répertoire: plutôt que de
+tester chaque chemin candidat par un ``stat`` réseau, chaque répertoire
+est listé une fois et son contenu conservé en mémoire pour une courte
+durée, y compris lorsque le répertoire n'existe pas (cache négatif).
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class _DirectoryListing:
+    """Contenu d'un répertoire à un instant donné."""
+
+    def __init__(self, names: Optional[list[str]]):
+        self.exists = names is not None
+        self.names = set(names or [])
+        # Recherche insensible à la casse (partages SMB)
+        self.lower_names = {name.lower(): name for name in self.names}
+        self.loaded_at = time.monotonic()
+
+    def find(self, filename: str) -> Optional[str]:
+        """Retourne le nom réel du fichier dans le répertoire, ou None."""
+        if filename in self.names:
+            return filename
+        return self.lower_names.get(filename.lower())
+
+
+class PathResolverService:
+    """
+    Cache des listings de répertoires partagé au sein d'un processus.
+
+    Attributes:
+        ttl: Durée de validité d'un listing en secondes.
+    """
+
+    DEFAULT_TTL: float = 30.0
+
+    _instance: Optional["PathResolverService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Initialise le cache.
+
+        Args:
+            ttl: Durée de validité en secondes (variable ``AI_PATH_CACHE_TTL`` par défaut).
+        """
+        self.ttl = ttl if ttl is not None else float(os.getenv('AI_PATH_CACHE_TTL', self.DEFAULT_TTL))
+        self._listings: dict[str, _DirectoryListing] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.listings = 0
+
+    @classmethod
+    def get_instance(cls) -> "PathResolverService":
+        """Retourne l'instance du processus courant."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def resolve(self, candidates: list[Path]) -> Optional[Path]:
+        """
+        Retourne le premier chemin candidat existant.
+
+        Args:
+            candidates: Chemins de fichiers, par ordre de priorité.
+
+        Returns:
+            Le chemin trouvé (avec la casse réelle du fichier), ou None.
+        """
+        for candidate in candidates:
+            listing = self._get_listing(candidate.parent)
+            if listing is None:
+                # Répertoire illisible: vérification directe
+                if self._stat(candidate):
+                    return candidate
+                continue
+
+            name = listing.find(candidate.name)
+            if name:
+                return candidate.parent / name
+            logger.debug(f"fichier non trouver dans : {candidate}")
+
+        return None
+
+    def invalidate(self, directory: Optional[Path] = None) -> None:
+        """Vide le cache d'un répertoire, ou tout le cache."""
+        with self._lock:
+            if directory is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(str(directory), None)
+
+    def _get_listing(self, directory: Path) -> Optional[_DirectoryListing]:
+        """Retourne le listing du répertoire, relu s'il a expiré."""
+        key = str(directory)
+        with self._lock:
+            listing = self._listings.get(key)
+            if listing is not None and time.monotonic() - listing.loaded_at < self.ttl:
+                self.hits += 1
+                return listing
+
+        try:
+            names = os.listdir(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            names = None
+        except OSError as e:
+            logger.debug(f"Listing impossible de {directory}: {e}")
+            return None
+
+        listing = _DirectoryListing(names)
+        with self._lock:
+            self._listings[key] = listing
+            self.listings += 1
+            # Purge des listings expirés pour borner la mémoire
+            if len(self._listings) > 1024:
+                now = time.monotonic()
+                self._listings = {
+                    path: entry for path, entry in self._listings.items()
+                    if now - entry.loaded_at < self.ttl
+                }
+        return listing
+
+    @staticmethod
+    def _stat(path: Path) -> bool:
+        """Vérifie l'existence d'un fichier par un appel système."""
+        try:
+            path.stat()
+            return True
+        except (FileNotFoundError, OSError):
+            return False
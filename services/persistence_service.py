@@ -0,0 +1,140 @@
+"""
+Service de persistance des résultats de classification.
+
+Ce module regroupe les écritures de plusieurs images afin de réduire le
+nombre d'allers-retours avec la base de données:
+- Écriture immédiate d'une image dans une seule transaction
+- Mise en tampon de plusieurs images, vidé toutes les N images ou T ms
+"""
+
+import os
+import time
+from typing import Optional
+
+from repositories.image_result_repository import ImageResultRepository, ImageResultWrite
+from services.constant import StatusNew
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class PersistenceService:
+    """
+    Tampon d'écriture des résultats d'images.
+
+    Avec une taille de lot de 1 (par défaut), chaque résultat est écrit
+    immédiatement. Au-delà, les résultats sont accumulés puis écrits en
+    une transaction lorsque ``batch_size`` résultats sont en attente ou
+    que le plus ancien attend depuis ``flush_interval_ms``.
+
+    Attributes:
+        batch_size: Nombre de résultats déclenchant l'écriture.
+        flush_interval_ms: Délai maximal d'attente d'un résultat.
+    """
+
+    DEFAULT_BATCH_SIZE: int = 1
+    DEFAULT_FLUSH_INTERVAL_MS: int = 500
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None
+    ):
+        """
+        Initialise le tampon.
+
+        Args:
+            batch_size: Taille de lot (variable ``AI_PERSIST_BATCH_SIZE`` par défaut).
+            flush_interval_ms: Délai maximal en millisecondes
+                (variable ``AI_PERSIST_FLUSH_MS`` par défaut).
+        """
+        self.batch_size = batch_size or int(
+            os.getenv('AI_PERSIST_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)
+        )
+        self.flush_interval_ms = flush_interval_ms or int(
+            os.getenv('AI_PERSIST_FLUSH_MS', self.DEFAULT_FLUSH_INTERVAL_MS)
+        )
+        self._repository: Optional[ImageResultRepository] = None
+        self._pending: list[tuple[ImageResultWrite, dict]] = []
+        self._oldest: Optional[float] = None
+
+    @property
+    def buffered(self) -> bool:
+        """Indique si les écritures sont mises en tampon."""
+        return self.batch_size > 1
+
+    @property
+    def repository(self) -> ImageResultRepository:
+        """Repository créé à la première écriture."""
+        if self._repository is None:
+            self._repository = ImageResultRepository()
+        return self._repository
+
+    def save(self, write: ImageResultWrite) -> dict:
+        """
+        Écrit immédiatement le résultat d'une image.
+
+        Returns:
+            L'image mise à jour.
+        """
+        return self.repository.save_result(write)
+
+    def add(self, write: ImageResultWrite, result: dict) -> None:
+        """
+        Ajoute un résultat au tampon.
+
+        Le dictionnaire ``result`` est mis à jour (``status_new``,
+        ``categorie_id``) lors de l'écriture effective.
+
+        Args:
+            write: Écritures de l'image.
+            result: Résultat de traitement associé.
+        """
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._pending.append((write, result))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def seconds_until_flush(self) -> Optional[float]:
+        """Délai avant la prochaine écriture programmée (None si tampon vide)."""
+        if self._oldest is None:
+            return None
+        elapsed = time.monotonic() - self._oldest
+        return max(0.0, self.flush_interval_ms / 1000 - elapsed)
+
+    def flush_if_due(self) -> None:
+        """Écrit le tampon si le délai maximal est atteint."""
+        if self.seconds_until_flush() == 0.0:
+            self.flush()
+
+    def flush(self) -> None:
+        """Écrit tous les résultats en attente."""
+        if not self._pending:
+            return
+
+        pending, self._pending, self._oldest = self._pending, [], None
+
+        try:
+            images = self.repository.save_results([write for write, _ in pending])
+            for (_, result), image in zip(pending, images):
+                self._apply(result, image)
+            return
+        except Exception as e:
+            logger.warning(f"Échec de l'écriture groupée ({len(pending)} images), reprise unitaire: {e}")
+
+        # Une image en erreur ne doit pas faire échouer les autres
+        for write, result in pending:
+            try:
+                self._apply(result, self.repository.save_result(write))
+            except Exception as e:
+                logger.critical(f"Erreur critique pour {write.name}: {e}")
+                result['status_new'] = StatusNew.ERROR
+                result['categorie_id'] = None
+
+    @staticmethod
+    def _apply(result: dict, image: dict) -> None:
+        """Reporte l'état de l'image écrite sur le résultat de traitement."""
+        result['status_new'] = image['status_new']
+        result['categorie_id'] = image['categorie_id']
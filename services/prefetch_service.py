@@ -0,0 +1,175 @@
+"""
+Service de préchargement des images depuis le NAS.
+
+Exécuté dans le processus principal, il copie en arrière-plan les
+fichiers des prochaines images à traiter dans un répertoire local, afin
+que les workers trouvent le fichier déjà présent au moment de l'OCR.
+Le préchargement est borné en nombre de fichiers et en octets.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class PrefetchService:
+    """
+    Préchargement borné des fichiers des prochaines images.
+
+    Les fichiers préchargés sont nommés d'après l'identifiant de l'image
+    (voir ``prefetched_path``) et consommés (déplacés) par les workers;
+    ``release`` libère la place d'une image terminée.
+
+    Attributes:
+        max_files: Nombre maximal d'images préchargées (0 = désactivé).
+        max_bytes: Volume maximal préchargé en octets.
+        directory: Répertoire local des fichiers préchargés.
+    """
+
+    DEFAULT_MAX_FILES: int = 4
+    DEFAULT_MAX_BYTES: int = 256 * 1024 * 1024
+    DEFAULT_DIRECTORY: str = "./outputs/prefetch"
+    # Un seul flux de copie: les images sont préchargées dans l'ordre de traitement
+    DEFAULT_THREADS: int = 1
+
+    def __init__(
+        self,
+        resolve_source: Callable[[dict], Path],
+        max_files: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        Initialise le préchargement.
+
+        Args:
+            resolve_source: Fonction retournant le chemin source d'une image.
+            max_files: Nombre d'images préchargées (``AI_PREFETCH_COUNT`` par défaut).
+            max_bytes: Volume maximal (``AI_PREFETCH_MAX_BYTES`` par défaut).
+        """
+        self.resolve_source = resolve_source
+        self.max_files = max_files if max_files is not None else int(
+            os.getenv('AI_PREFETCH_COUNT', self.DEFAULT_MAX_FILES)
+        )
+        self.max_bytes = max_bytes or int(
+            os.getenv('AI_PREFETCH_MAX_BYTES', self.DEFAULT_MAX_BYTES)
+        )
+        self.directory = self.get_directory()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: dict[int, Future] = {}
+        self._sizes: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.prefetched_files = 0
+        self.prefetched_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Indique si le préchargement est actif."""
+        return self.max_files > 0
+
+    @classmethod
+    def get_directory(cls) -> Path:
+        """Répertoire des fichiers préchargés (``AI_PREFETCH_DIR``)."""
+        return Path(os.getenv('AI_PREFETCH_DIR', cls.DEFAULT_DIRECTORY))
+
+    @classmethod
+    def prefetched_path(cls, image_id: int) -> Optional[Path]:
+        """
+        Retourne le fichier préchargé d'une image s'il est disponible.
+
+        Utilisable depuis les workers: seul le répertoire est partagé.
+        """
+        path = cls.get_directory() / f"{image_id}.pdf"
+        return path if path.exists() else None
+
+    def schedule(self, upcoming: list[dict]) -> None:
+        """
+        Précharge les prochaines images dans la limite du budget.
+
+        Args:
+            upcoming: Prochaines images à traiter, dans l'ordre.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._executor is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.DEFAULT_THREADS, thread_name_prefix="prefetch"
+                )
+
+            for image_data in upcoming:
+                if len(self._futures) >= self.max_files:
+                    break
+                image_id = image_data['id']
+                if image_id in self._futures:
+                    continue
+                self._futures[image_id] = self._executor.submit(self._fetch, image_data)
+
+    def release(self, image_id: int) -> None:
+        """Libère le préchargement d'une image terminée ou abandonnée."""
+        with self._lock:
+            future = self._futures.pop(image_id, None)
+            self._sizes.pop(image_id, None)
+        if future is None:
+            return
+        future.cancel()
+        # Fichier non consommé par le worker (arrivé trop tard ou inutile)
+        if future.done() and not future.cancelled():
+            (self.directory / f"{image_id}.pdf").unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Arrête le préchargement et supprime les fichiers non consommés."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            image_ids = list(self._futures.keys())
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for image_id in image_ids:
+            self.release(image_id)
+        if self.prefetched_files:
+            logger.info(
+                f"Préchargement: {self.prefetched_files} fichier(s), "
+                f"{self.prefetched_bytes} octets"
+            )
+
+    def _fetch(self, image_data: dict) -> None:
+        """Copie le fichier d'une image dans le répertoire local."""
+        image_id = image_data['id']
+        try:
+            source = Path(self.resolve_source(image_data))
+            size = source.stat().st_size
+
+            with self._lock:
+                if image_id not in self._futures:
+                    return
+                if sum(self._sizes.values()) + size > self.max_bytes:
+                    logger.debug(f"Préchargement ignoré (budget atteint): {image_id}")
+                    return
+                self._sizes[image_id] = size
+
+            dest = self.directory / f"{image_id}.pdf"
+            tmp_path = self.directory / f".{image_id}.pdf.tmp"
+            with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+                while chunk := src.read(1024 * 1024):
+                    dst.write(chunk)
+            os.replace(tmp_path, dest)
+
+            with self._lock:
+                if image_id not in self._futures:
+                    # Image terminée pendant la copie
+                    dest.unlink(missing_ok=True)
+                    return
+                self.prefetched_files += 1
+                self.prefetched_bytes += size
+            logger.debug(f"Image préchargée: {image_id} ({size} octets)")
+
+        except Exception as e:
+            (self.directory / f".{image_id}.pdf.tmp").unlink(missing_ok=True)
+            logger.debug(f"Préchargement impossible pour {image_id}: {e}")
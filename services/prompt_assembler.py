@@ -0,0 +1,80 @@
+"""
+Assemblage des prompts pour le cache de préfixe du fournisseur.
+
+Le fournisseur applique une remise (et une latence réduite) sur le début
+d'un prompt déjà vu à l'identique. Les templates mêlant règles et
+données du dossier (``{{dossier_nom}}`` dès la première ligne) changent
+dès les premiers tokens et ne profitent jamais de ce cache.
+
+Le prompt est donc réordonné:
+1. Règles statiques: le template, où chaque placeholder est remplacé par
+   une référence fixe ``[nom]`` (identique pour tous les dossiers)
+2. Contexte du dossier: la valeur de chaque référence (identique pour
+   tous les documents d'un dossier, ordre d'apparition dans le template)
+3. Document: fourni dans le message utilisateur, après le prompt système
+"""
+
+from typing import TYPE_CHECKING
+
+from services.logger import Logger
+
+if TYPE_CHECKING:
+    from services.prompt_registry import PromptTemplate
+
+logger = Logger.get_logger()
+
+
+class PromptAssembler:
+    """Construit des prompts système ordonnés du plus statique au plus variable."""
+
+    # Placeholders propres au document: jamais dans le prompt système
+    DOCUMENT_PLACEHOLDERS: frozenset[str] = frozenset({'{{document_text}}'})
+    DOCUMENT_REFERENCE: str = "(document fourni dans le message utilisateur)"
+
+    CONTEXT_HEADER: str = "### Contexte du dossier (valeurs des références entre crochets)"
+    EMPTY_VALUE: str = "(aucun)"
+
+    def assemble(self, template: "PromptTemplate", replacements: dict[str, str]) -> str:
+        """
+        Assemble un prompt système.
+
+        Args:
+            template: Template compilé (``PromptRegistry``).
+            replacements: Dictionnaire placeholder -> valeur.
+
+        Returns:
+            Les règles (préfixe stable), suivies du contexte du dossier.
+        """
+        references = {}
+        context_lines = []
+
+        for name in template.placeholders:
+            placeholder = f"{{{{{name}}}}}"
+            if placeholder not in replacements:
+                continue
+            if placeholder in self.DOCUMENT_PLACEHOLDERS:
+                references[placeholder] = self.DOCUMENT_REFERENCE
+                continue
+
+            references[placeholder] = f"[{name}]"
+            value = replacements[placeholder]
+            value = str(value).strip().rstrip(',') if value else ""
+            context_lines.append(f"- {name}: {value or self.EMPTY_VALUE}")
+
+        static_part = template.render(references)
+        if not context_lines:
+            return static_part
+        return f"{static_part.rstrip()}\n\n{self.CONTEXT_HEADER}\n" + "\n".join(context_lines)
+
+
+def log_usage(completion) -> None:
+    """Journalise les tokens d'un appel, dont la part servie par le cache de préfixe."""
+    usage = getattr(completion, 'usage', None)
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+    logger.info(
+        f"Tokens: prompt {usage.prompt_tokens} (cache {cached_tokens}), "
+        f"sortie {usage.completion_tokens}"
+    )
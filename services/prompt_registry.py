@@ -0,0 +1,153 @@
+"""
+Registre des templates de prompts.
+
+Les templates sont lus et découpés une seule fois (texte fixe et
+placeholders ``{{...}}``); le rendu substitue tous les placeholders en
+une passe, sans relire les valeurs insérées: un ``{{...}}`` présent dans
+une valeur (texte de document, contexte saisi) n'est jamais réécrit.
+
+Le prompt système assemblé (règles puis contexte du dossier, voir
+``PromptAssembler``) est conservé par dossier: les documents suivants du
+même dossier le réutilisent, seul le document change d'un appel à l'autre.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+from services.prompt_assembler import PromptAssembler
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+class PromptTemplate:
+    """
+    Template compilé.
+
+    Attributes:
+        text: Texte source du template.
+        placeholders: Noms des placeholders, dans l'ordre d'apparition.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        # Alternance texte fixe / nom de placeholder
+        self._parts = PLACEHOLDER_PATTERN.split(text)
+        self.placeholders: tuple[str, ...] = tuple(dict.fromkeys(self._parts[1::2]))
+
+    def render(self, replacements: dict[str, str]) -> str:
+        """
+        Substitue les placeholders en une passe.
+
+        Args:
+            replacements: Dictionnaire placeholder (``{{nom}}``) -> valeur.
+
+        Returns:
+            Le texte rendu; les placeholders sans valeur sont conservés.
+        """
+        parts = self._parts.copy()
+        for index in range(1, len(parts), 2):
+            placeholder = f"{{{{{parts[index]}}}}}"
+            parts[index] = str(replacements[placeholder]) if placeholder in replacements else placeholder
+        return "".join(parts)
+
+
+class PromptRegistry:
+    """
+    Templates compilés et prompts système rendus, partagés par les
+    services du processus.
+
+    Attributes:
+        max_rendered: Nombre de prompts système rendus conservés.
+    """
+
+    DEFAULT_MAX_RENDERED: int = 256
+
+    _instance: Optional["PromptRegistry"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_rendered: int = DEFAULT_MAX_RENDERED):
+        self.max_rendered = max_rendered
+        self.assembler = PromptAssembler()
+        self._files: dict[str, PromptTemplate] = {}
+        self._compiled: dict[str, PromptTemplate] = {}
+        self._rendered: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "PromptRegistry":
+        """Retourne l'instance du processus courant."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def load(self, path: str) -> PromptTemplate:
+        """
+        Retourne le template d'un fichier, lu au premier appel.
+
+        Args:
+            path: Chemin vers le fichier template.
+        """
+        with self._lock:
+            template = self._files.get(path)
+        if template is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                template = PromptTemplate(f.read())
+            with self._lock:
+                template = self._files.setdefault(path, template)
+        return template
+
+    def compile(self, text: str) -> PromptTemplate:
+        """
+        Retourne le template compilé d'un texte (prompts des paramètres IA).
+
+        Args:
+            text: Texte du template.
+        """
+        with self._lock:
+            template = self._compiled.get(text)
+            if template is None:
+                template = self._compiled[text] = PromptTemplate(text)
+            return template
+
+    def system_prompt(
+        self,
+        template: Union[str, PromptTemplate],
+        replacements: dict[str, str]
+    ) -> str:
+        """
+        Retourne le prompt système assemblé pour un dossier.
+
+        Le rendu est conservé par template et par valeurs du dossier
+        (seuls les placeholders du template comptent, hors document): il
+        est recalculé si le contexte du dossier change.
+
+        Args:
+            template: Template compilé, ou texte à compiler.
+            replacements: Dictionnaire placeholder -> valeur du dossier.
+
+        Returns:
+            Les règles suivies du contexte du dossier.
+        """
+        if isinstance(template, str):
+            template = self.compile(template)
+
+        key = (template,) + tuple(
+            replacements.get(placeholder)
+            for placeholder in (f"{{{{{name}}}}}" for name in template.placeholders)
+            if placeholder not in PromptAssembler.DOCUMENT_PLACEHOLDERS
+        )
+        with self._lock:
+            prompt = self._rendered.get(key)
+            if prompt is not None:
+                self._rendered.move_to_end(key)
+                return prompt
+
+        prompt = self.assembler.assemble(template, replacements)
+        with self._lock:
+            self._rendered[key] = prompt
+            while len(self._rendered) > self.max_rendered:
+                self._rendered.popitem(last=False)
+        return prompt
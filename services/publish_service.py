@@ -0,0 +1,433 @@
+"""
+Service de publication asynchrone des fichiers vers le NAS.
+
+Les workers déposent une demande de publication ("copier le fichier X
+dans les répertoires A et B") dans une boîte d'envoi locale et durable,
+puis passent à l'image suivante. Un thread de publication exécute les
+demandes par lots, groupées par répertoires de destination, réessaie avec
+un délai croissant et isole les demandes en échec définitif dans
+``failed/``.
+
+Organisation de la boîte d'envoi (``AI_PUBLISH_OUTBOX``):
+- ``pending/``: demandes en attente (un fichier JSON par demande)
+- ``processing/``: demandes en cours, réservées par un processus
+- ``payloads/``: contenus générés à publier (fichiers OCR) et copies
+  locales des fichiers source
+- ``failed/``: demandes abandonnées après ``max_attempts`` tentatives
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from services.file_staging_service import FileStagingService
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class PublishService:
+    """
+    Boîte d'envoi durable et thread de publication du processus courant.
+
+    Attributes:
+        enabled: Publication asynchrone active (``AI_PUBLISH_ASYNC``).
+        outbox: Répertoire de la boîte d'envoi.
+        max_attempts: Nombre de tentatives avant abandon.
+        stale_seconds: Durée après laquelle une demande en cours est
+            reprise (``AI_PUBLISH_STALE_SECONDS``).
+        batch_size: Nombre de demandes publiées ensemble
+            (``AI_PUBLISH_BATCH_SIZE``).
+    """
+
+    DEFAULT_OUTBOX: str = "./outputs/outbox"
+    DEFAULT_MAX_ATTEMPTS: int = 8
+
+    # Délai de base entre deux tentatives (doublé à chaque échec)
+    RETRY_BASE_DELAY: float = 1.0
+    RETRY_MAX_DELAY: float = 300.0
+
+    # Délai d'attente du thread lorsque la boîte d'envoi est vide
+    POLL_INTERVAL: float = 0.5
+
+    # Nombre de demandes réservées et publiées ensemble
+    DEFAULT_BATCH_SIZE: int = 50
+
+    # Durée au-delà de laquelle une demande en cours est considérée
+    # abandonnée, même si l'identifiant de son processus a été réattribué
+    DEFAULT_STALE_SECONDS: int = 900
+
+    _instance: Optional["PublishService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        outbox: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        max_attempts: Optional[int] = None
+    ):
+        """
+        Initialise la boîte d'envoi.
+
+        Args:
+            outbox: Répertoire de la boîte d'envoi (``AI_PUBLISH_OUTBOX`` par défaut).
+            enabled: Publication asynchrone (``AI_PUBLISH_ASYNC``, actif par défaut).
+            max_attempts: Tentatives par demande (``AI_PUBLISH_MAX_ATTEMPTS`` par défaut).
+        """
+        self.enabled = (
+            enabled
+            if enabled is not None
+            else os.getenv('AI_PUBLISH_ASYNC', '1') == '1'
+        )
+        self.outbox = Path(outbox or os.getenv('AI_PUBLISH_OUTBOX', self.DEFAULT_OUTBOX))
+        self.max_attempts = max_attempts or int(
+            os.getenv('AI_PUBLISH_MAX_ATTEMPTS', self.DEFAULT_MAX_ATTEMPTS)
+        )
+        self.stale_seconds = int(os.getenv('AI_PUBLISH_STALE_SECONDS', self.DEFAULT_STALE_SECONDS))
+        self.batch_size = max(1, int(os.getenv('AI_PUBLISH_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)))
+        self.file_staging_service = FileStagingService()
+
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        for folder in ("pending", "processing", "payloads", "failed"):
+            (self.outbox / folder).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def get_instance(cls) -> "PublishService":
+        """Retourne l'instance du processus courant."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def publish_file(
+        self,
+        source: Path,
+        name: str,
+        destinations: list[str],
+        local_copy: Optional[Path] = None
+    ) -> None:
+        """
+        Publie un fichier existant dans les répertoires de destination.
+
+        Args:
+            source: Fichier à publier.
+            name: Nom du fichier dans les destinations.
+            destinations: Répertoires de destination.
+            local_copy: Copie locale de ``source`` (fichier préparé), reprise
+                par la boîte d'envoi et envoyée si la copie côté serveur
+                est impossible.
+        """
+        if not self.enabled:
+            self.file_staging_service.publish_file(
+                source, name, destinations, local_source=local_copy
+            )
+            return
+
+        local_payload = None
+        if local_copy is not None:
+            # Copie conservée jusqu'à publication (le répertoire de travail est nettoyé)
+            local_payload = self.outbox / "payloads" / f"{uuid.uuid4().hex}_{name}"
+            try:
+                shutil.move(str(local_copy), local_payload)
+            except OSError as e:
+                logger.debug(f"Copie locale non reprise {local_copy}: {e}")
+                local_payload = None
+
+        self._enqueue({
+            'source': str(source),
+            'name': name,
+            'destinations': destinations,
+            'delete_source': False,
+            'local_copy': str(local_payload) if local_payload else None,
+        })
+
+    def publish_text(self, content: str, name: str, destinations: list[str]) -> None:
+        """
+        Publie un contenu texte (fichier OCR) dans les répertoires de destination.
+
+        Args:
+            content: Contenu du fichier.
+            name: Nom du fichier dans les destinations.
+            destinations: Répertoires de destination.
+        """
+        if not self.enabled:
+            for destination in destinations:
+                with open(Path(destination) / name, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            return
+
+        # Contenu conservé localement jusqu'à publication
+        payload = self.outbox / "payloads" / f"{uuid.uuid4().hex}_{name}"
+        self._write_atomic(payload, content)
+
+        self._enqueue({
+            'source': str(payload),
+            'name': name,
+            'destinations': destinations,
+            'delete_source': True,
+        })
+
+    def recover(self, stale_only: bool = False) -> int:
+        """
+        Remet en attente les demandes restées en cours.
+
+        Sans ``stale_only``, à appeler lorsqu'aucun autre processus ne
+        publie (démarrage ou fin de traitement). Avec ``stale_only``, seules
+        les demandes abandonnées sont reprises (processus arrêté
+        brutalement, ou réservation plus ancienne que ``stale_seconds``):
+        utilisable pendant que les workers du pool persistant publient.
+
+        Args:
+            stale_only: Ne reprend que les demandes abandonnées.
+
+        Returns:
+            Le nombre de demandes remises en attente.
+        """
+        count = 0
+        for job_path in (self.outbox / "processing").glob("*.json"):
+            if stale_only and not self._is_stale(job_path):
+                continue
+            original_name = job_path.name.split(".", 1)[1]
+            try:
+                os.replace(job_path, self.outbox / "pending" / original_name)
+                count += 1
+            except OSError as e:
+                logger.warning(f"Reprise impossible de {job_path}: {e}")
+        if count:
+            logger.info(f"{count} publication(s) interrompue(s) remise(s) en attente")
+        return count
+
+    def _is_stale(self, job_path: Path) -> bool:
+        """Indique si une demande en cours a été abandonnée par son processus."""
+        try:
+            claimed_at = job_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if time.time() - claimed_at > self.stale_seconds:
+            return True
+
+        try:
+            pid = int(job_path.name.split("-", 1)[0])
+        except ValueError:
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Exécute les demandes en attente dans le thread courant.
+
+        Les demandes dont le délai de nouvelle tentative n'est pas écoulé,
+        et celles en cours dans d'autres processus (workers du pool
+        persistant), sont attendues, dans la limite de ``timeout`` secondes;
+        celles d'un processus arrêté brutalement sont reprises.
+
+        Returns:
+            Le nombre de demandes restant en attente ou en cours.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            self.recover(stale_only=True)
+            self._process_due_jobs()
+            remaining = self.pending_count() + self.in_progress_count()
+            if remaining == 0:
+                return 0
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"{remaining} publication(s) toujours en attente")
+                return remaining
+            time.sleep(self.POLL_INTERVAL)
+
+    def pending_count(self) -> int:
+        """Nombre de demandes en attente."""
+        return sum(1 for _ in (self.outbox / "pending").glob("*.json"))
+
+    def in_progress_count(self) -> int:
+        """Nombre de demandes en cours, tous processus confondus."""
+        return sum(1 for _ in (self.outbox / "processing").glob("*.json"))
+
+    def failed_count(self) -> int:
+        """Nombre de demandes abandonnées."""
+        return sum(1 for _ in (self.outbox / "failed").glob("*.json"))
+
+    def _enqueue(self, job: dict) -> None:
+        """Enregistre une demande dans la boîte d'envoi et réveille le thread."""
+        job.update({
+            'id': uuid.uuid4().hex,
+            'attempts': 0,
+            'next_attempt_at': 0.0,
+            'last_error': None,
+            'created_at': time.time(),
+        })
+        filename = f"{int(job['created_at'] * 1000):015d}_{job['id']}.json"
+        self._write_atomic(self.outbox / "pending" / filename, json.dumps(job))
+
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def _ensure_thread(self) -> None:
+        """Démarre le thread de publication s'il ne tourne pas."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="nas-publisher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Boucle du thread de publication."""
+        while True:
+            self._wakeup.wait(self.POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self._process_due_jobs()
+            except Exception as e:
+                logger.error(f"Erreur du thread de publication: {e}")
+
+    def _process_due_jobs(self) -> None:
+        """
+        Exécute les demandes dont l'échéance est atteinte.
+
+        Les demandes sont réservées par lots de ``batch_size`` et celles
+        d'un même lot vers les mêmes répertoires (fichier source et fichier
+        OCR d'une image, images d'un même dossier) sont publiées ensemble.
+        """
+        while True:
+            entries = self._claim_due_jobs()
+            if not entries:
+                return
+
+            groups: dict[tuple[str, ...], list[tuple[dict, Path, str]]] = {}
+            for entry in entries:
+                groups.setdefault(tuple(entry[0]['destinations']), []).append(entry)
+            for destinations, group in groups.items():
+                self._execute_group(list(destinations), group)
+
+    def _claim_due_jobs(self) -> list[tuple[dict, Path, str]]:
+        """
+        Réserve au plus ``batch_size`` demandes dont l'échéance est atteinte.
+
+        Returns:
+            Les demandes réservées (contenu, fichier réservé, nom d'origine).
+        """
+        now = time.time()
+        entries = []
+        for job_path in sorted((self.outbox / "pending").glob("*.json")):
+            if len(entries) >= self.batch_size:
+                break
+            # Échéance lue avant réservation: une demande à réessayer plus
+            # tard n'est pas déplacée à chaque passage
+            try:
+                job = json.loads(job_path.read_text(encoding='utf-8'))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                job = None
+            if job is not None and job.get('next_attempt_at', 0.0) > now:
+                continue
+
+            claimed = self._claim(job_path)
+            if claimed is None:
+                continue
+
+            try:
+                job = json.loads(claimed.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.error(f"Demande de publication illisible {claimed}: {e}")
+                os.replace(claimed, self.outbox / "failed" / job_path.name)
+                continue
+
+            if job.get('next_attempt_at', 0.0) > now:
+                # Demande réécrite par un autre processus depuis la lecture
+                os.replace(claimed, job_path)
+                continue
+
+            entries.append((job, claimed, job_path.name))
+
+        return entries
+
+    def _claim(self, job_path: Path) -> Optional[Path]:
+        """Réserve une demande par renommage atomique (un seul processus l'obtient)."""
+        claimed = self.outbox / "processing" / f"{self._owner}.{job_path.name}"
+        try:
+            # Date de réservation (voir ``recover``), conservée par le renommage
+            os.utime(job_path)
+            os.replace(job_path, claimed)
+            return claimed
+        except FileNotFoundError:
+            return None
+
+    def _execute_group(self, destinations: list[str], entries: list[tuple[dict, Path, str]]) -> None:
+        """Exécute des demandes de mêmes destinations et gère l'issue de chacune."""
+        for job, _, _ in entries:
+            job['attempts'] += 1
+        try:
+            results = self.file_staging_service.publish_files(
+                [
+                    (
+                        Path(job['source']),
+                        job['name'],
+                        Path(job['local_copy']) if job.get('local_copy') else None,
+                    )
+                    for job, _, _ in entries
+                ],
+                destinations,
+                max_attempts=1
+            )
+            errors = [None if success else "copie en échec" for success in results]
+        except Exception as e:
+            errors = [str(e)] * len(entries)
+
+        for (job, claimed, filename), error in zip(entries, errors):
+            self._finish(job, claimed, filename, error)
+
+    def _finish(self, job: dict, claimed: Path, filename: str, error: Optional[str]) -> None:
+        """Gère l'issue d'une demande (succès, nouvelle tentative, abandon)."""
+        if error is None:
+            if job.get('delete_source'):
+                Path(job['source']).unlink(missing_ok=True)
+            if job.get('local_copy'):
+                Path(job['local_copy']).unlink(missing_ok=True)
+            claimed.unlink(missing_ok=True)
+            logger.debug(f"Publication terminée: {job['name']} -> {job['destinations']}")
+            return
+
+        job['last_error'] = error
+        if job['attempts'] >= self.max_attempts:
+            self._write_atomic(self.outbox / "failed" / filename, json.dumps(job))
+            claimed.unlink(missing_ok=True)
+            logger.error(
+                f"Publication abandonnée après {job['attempts']} tentatives: "
+                f"{job['name']} -> {job['destinations']} ({error})"
+            )
+            return
+
+        delay = min(self.RETRY_BASE_DELAY * 2 ** (job['attempts'] - 1), self.RETRY_MAX_DELAY)
+        job['next_attempt_at'] = time.time() + delay
+        self._write_atomic(self.outbox / "pending" / filename, json.dumps(job))
+        claimed.unlink(missing_ok=True)
+        logger.warning(
+            f"Publication de {job['name']} en échec (tentative {job['attempts']}), "
+            f"nouvel essai dans {delay:.0f}s: {error}"
+        )
+
+    @staticmethod
+    def _write_atomic(path: Path, content: str) -> None:
+        """Écrit un fichier via un fichier temporaire et un renommage atomique."""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -0,0 +1,109 @@
+"""
+Schémas des réponses attendues des appels OpenAI.
+
+Chaque appel déclare son format de réponse (mode ``json_schema`` strict
+ou ``json_object`` lorsque le contenu dépend du prompt en base) et un
+plafond de tokens de sortie. Les schémas utilisent des noms de champs
+courts, renommés à la lecture vers les clés historiques (``ID``,
+``Explanation``...) attendues par le reste du code.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+@dataclass(frozen=True)
+class ResponseSchema:
+    """
+    Format de réponse d'un appel OpenAI.
+
+    Attributes:
+        name: Nom du schéma (transmis à l'API).
+        schema: Schéma JSON strict, ou None pour le mode ``json_object``.
+        aliases: Nom court -> clé historique.
+        default_max_tokens: Plafond de tokens de sortie par défaut
+            (variable ``AI_OPENAI_MAX_TOKENS_<NAME>``).
+    """
+    name: str
+    schema: Optional[dict] = None
+    aliases: dict[str, str] = field(default_factory=dict)
+    default_max_tokens: int = 1000
+
+    @property
+    def max_tokens(self) -> int:
+        """Plafond de tokens de sortie."""
+        return int(os.getenv(f"AI_OPENAI_MAX_TOKENS_{self.name.upper()}", self.default_max_tokens))
+
+    def response_format(self) -> dict[str, Any]:
+        """Paramètre ``response_format`` de l'API."""
+        if self.schema is None:
+            return {"type": "json_object"}
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": self.name, "strict": True, "schema": self.schema},
+        }
+
+    def parse(self, content: str) -> dict[str, Any]:
+        """
+        Lit une réponse et renomme les champs courts.
+
+        Raises:
+            ValueError: Si la réponse n'est pas un objet JSON.
+        """
+        data = json.loads(content)
+        if not isinstance(data, dict):
+            raise ValueError(f"Réponse {self.name} inattendue: {content[:100]}")
+        return self.rename(data)
+
+    def rename(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Renomme les champs courts d'un objet vers les clés historiques."""
+        return {self.aliases.get(key, key): value for key, value in data.items()}
+
+
+def _nullable(type_name: str, description: str) -> dict:
+    return {"type": [type_name, "null"], "description": description}
+
+
+def _object(properties: dict) -> dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+# Classification d'un document: champs définis par le prompt en base
+# (clés historiques, ``data`` structuré, ``ratio`` selon les consignes)
+CLASSIFICATION = ResponseSchema(name="classification", default_max_tokens=1500)
+
+# Validation d'une classification (validation.md)
+VALIDATION = ResponseSchema(
+    name="validation",
+    schema=_object({
+        "id": {"type": "integer", "description": "ID numérique de la catégorie"},
+        "cat": {"type": "string", "description": "Nom de la catégorie"},
+    }),
+    aliases={"id": "ID", "cat": "Categorie"},
+    default_max_tokens=200,
+)
+
+# Analyse de contrôle d'une pièce (analyse.md)
+ANALYSE = ResponseSchema(
+    name="analyse",
+    schema=_object({
+        "data": {"type": "string", "description": "Compte rendu de contrôle en markdown"},
+        "categorie": {"type": "integer", "description": "ID de la catégorie de la pièce"},
+        "num_facture": _nullable("string", "Numéro de facture"),
+        "status": {"type": "string", "enum": ["green", "yellow", "red"]},
+    }),
+    default_max_tokens=3000,
+)
+
+# Extraction du contenu: champs définis par le prompt de la catégorie
+EXTRACTION = ResponseSchema(name="extraction", default_max_tokens=2000)
+
+# Classification et extraction en un appel (extraction libre)
+COMBINED = ResponseSchema(name="combined", default_max_tokens=2400)
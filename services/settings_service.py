@@ -0,0 +1,145 @@
+"""
+Service de lecture des paramètres de séparation IA.
+
+Ce module fournit un cache par processus de la table ``ai_separation_setting``
+rafraîchi périodiquement, afin d'éviter une requête SQL (et un nouveau pool
+de connexions) pour chaque image traitée, tout en permettant au
+coupe-circuit ``power`` de réagir en quelques secondes.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from repositories.ai_separation_setting_repository import AiSeparationSettingRepository
+from services.logger import Logger
+
+logger = Logger.get_logger()
+
+
+class SettingsService:
+    """
+    Cache des paramètres IA partagé au sein d'un processus.
+
+    Une instance est partagée par identifiant de paramétrage
+    (voir ``get_instance``). Les paramètres sont relus en base lorsque
+    le cache est plus ancien que ``refresh_interval`` secondes.
+
+    Attributes:
+        setting_id: Identifiant de la ligne ``ai_separation_setting``.
+        refresh_interval: Durée de validité du cache en secondes.
+    """
+
+    # Durée de validité par défaut du cache (secondes)
+    DEFAULT_REFRESH_INTERVAL: float = 5.0
+
+    _instances: dict[int, "SettingsService"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, setting_id: int = 1, refresh_interval: Optional[float] = None):
+        """
+        Initialise le cache des paramètres.
+
+        Args:
+            setting_id: Identifiant de la ligne de paramétrage.
+            refresh_interval: Durée de validité du cache en secondes
+                (variable ``AI_SETTINGS_REFRESH_SECONDS`` par défaut).
+        """
+        self.setting_id = setting_id
+        self.refresh_interval = (
+            refresh_interval
+            if refresh_interval is not None
+            else float(os.getenv('AI_SETTINGS_REFRESH_SECONDS', self.DEFAULT_REFRESH_INTERVAL))
+        )
+        self._repository: Optional[AiSeparationSettingRepository] = None
+        self._settings: Optional[dict] = None
+        self._loaded_at: float = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, setting_id: int = 1) -> "SettingsService":
+        """
+        Récupère l'instance partagée pour un identifiant de paramétrage.
+
+        Args:
+            setting_id: Identifiant de la ligne de paramétrage.
+
+        Returns:
+            L'instance du processus courant.
+        """
+        with cls._instances_lock:
+            if setting_id not in cls._instances:
+                cls._instances[setting_id] = cls(setting_id)
+            return cls._instances[setting_id]
+
+    def get_settings(self, force_refresh: bool = False) -> Optional[dict]:
+        """
+        Retourne les paramètres courants, relus en base si nécessaire.
+
+        Args:
+            force_refresh: Force la relecture en base.
+
+        Returns:
+            Dictionnaire des paramètres, ou None s'ils n'ont jamais pu être lus.
+        """
+        with self._lock:
+            expired = time.monotonic() - self._loaded_at >= self.refresh_interval
+            if force_refresh or self._settings is None or expired:
+                self._refresh()
+            return self._settings
+
+    def _refresh(self) -> None:
+        """Relit les paramètres en base en conservant la dernière valeur connue en cas d'échec."""
+        try:
+            if self._repository is None:
+                self._repository = AiSeparationSettingRepository()
+            # Fin de la transaction précédente: sans cela, la connexion
+            # (REPEATABLE READ, sans autocommit) relirait le même instantané
+            self._repository.connection.commit()
+            settings = self._repository.get_ai_separation_setting(setting_id=self.setting_id)
+        except Exception as e:
+            logger.error(f"Erreur de lecture des paramètres IA: {e}")
+            settings = None
+
+        if settings is None:
+            # Nouvelle connexion à la prochaine lecture
+            self._repository = None
+        else:
+            self._settings = settings
+
+        self._loaded_at = time.monotonic()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retourne un paramètre donné."""
+        settings = self.get_settings() or {}
+        return settings.get(key, default)
+
+    @property
+    def power(self) -> int:
+        """Coupe-circuit du service (1 = actif)."""
+        return self.get('power', 1)
+
+    @property
+    def model(self) -> str:
+        """Modèle OpenAI configuré."""
+        return self.get('model', 'gpt-4o-mini')
+
+    @property
+    def ocr_library(self) -> str:
+        """Bibliothèque OCR configurée."""
+        return self.get('ocr_library', 'pytesseract')
+
+    @property
+    def thread_number(self) -> int:
+        """Nombre de processus de traitement."""
+        return self.get('thread_number', 1)
+
+    @property
+    def prompt_systeme(self) -> Optional[str]:
+        """Prompt système de classification."""
+        return self.get('prompt_systeme')
+
+    def is_active(self) -> bool:
+        """Indique si le service est actif."""
+        return self.power == 1
@@ -71,7 +71,8 @@ class UtilsService:
         Returns:
             Tuple contenant:
                 - str: Chemin de l'image générée (ou chaîne vide si échec)
-                - int: Nombre total de pages dans le PDF (ou 0 si échec)
+                - int: Nombre de pages rendues, soit 1 (ou 0 si échec);
+                  le nombre de pages du PDF n'est pas calculé
                 
         Example:
             >>> utils = UtilsService()
@@ -98,8 +99,10 @@ class UtilsService:
 
             base_name = Path(pdf_path).stem
 
-            # Conversion PDF vers images en mémoire
-            images = convert_from_path(pdf_path, dpi=density, size=(width, height))
+            # Rendu de la première page uniquement (seule page utilisée)
+            images = convert_from_path(
+                pdf_path, dpi=density, size=(width, height), first_page=1, last_page=1
+            )
 
             if not images:
                 logger.warning(f"Aucune image extraite du PDF: {pdf_path}")
@@ -116,13 +119,40 @@ class UtilsService:
             opencv_service = OpenCvService()
             opencv_service.rotate_image(new_path)
 
-            logger.info(f"PDF converti avec succès: {new_path} ({len(images)} pages)")
+            logger.info(f"PDF converti avec succès: {new_path} ({density} DPI)")
             return new_path, len(images)
 
         except Exception as e:
             logger.error(f"Erreur lors de la conversion PDF en images: {e}")
             return "", 0
 
+    def crop_top(
+        self,
+        image_path: str,
+        fraction: float,
+        suffix: str = "header"
+    ) -> str:
+        """
+        Extrait la partie haute d'une image (en-tête du document).
+        
+        Args:
+            image_path: Chemin de l'image source.
+            fraction: Proportion de la hauteur conservée (0-1).
+            suffix: Suffixe ajouté au nom de l'image générée.
+            
+        Returns:
+            Chemin de l'image recadrée, à côté de l'image source.
+        """
+        source = Path(image_path)
+        output_path = source.with_name(f"{source.stem}.{suffix}{source.suffix}")
+        
+        with Image.open(source) as image:
+            width, height = image.size
+            header = image.crop((0, 0, width, max(1, round(height * fraction))))
+            header.save(output_path)
+        
+        return str(output_path)
+
     def get_images_from_directory(
         self,
         directory: str,
@@ -11,17 +11,18 @@ les classifications effectuées par l'IA, en utilisant:
 import re
 from typing import Optional
 
-import Levenshtein
-
 from repositories.ai_separation_context_repository import AiSeparationContextRepository
 from services import constant
 from services.constant import CategorieId
+from services.lazy_import import lazy_import
 from services.logger import Logger
 from services.utils_service import UtilsService
 from services.human import Humain
 
 logger = Logger.get_logger()
 
+Levenshtein = lazy_import("Levenshtein")
+
 
 class ValidationService:
     """
@@ -30,6 +31,7 @@ class ValidationService:
     Fournit des méthodes pour:
     - Valider les classifications fournisseur/client
     - Détecter les pages blanches
+    - Évaluer la couche texte des PDF natifs
     - Appliquer des règles de contexte personnalisées
     - Détecter les documents de gestion
     """
@@ -46,6 +48,17 @@ class ValidationService:
         "RELEVE COMPTE CLIENT",
         "RELEVE DE FACTURES"
     ]
+    
+    # Seuils d'utilisation de la couche texte d'un PDF (sans OCR)
+    TEXT_LAYER_MIN_CHARS: int = 200
+    TEXT_LAYER_MIN_PRINTABLE_RATIO: float = 0.95
+    TEXT_LAYER_MIN_WORD_RATIO: float = 0.6
+    
+    # Mot plausible: lettres avec au moins une voyelle, ou nombre/montant/date
+    VALID_WORD_PATTERN = re.compile(
+        r"(?=.*[aeiouyàâäéèêëîïôöùûüÿAEIOUYÀÂÄÉÈÊËÎÏÔÖÙÛÜŸ])[A-Za-zÀ-ÖØ-öø-ÿ'’-]{2,25}"
+        r"|[+-]?\d[\d.,/:-]*[€%]?"
+    )
 
     def contains_exact_word_case_insensitive(
         self,
@@ -239,6 +252,41 @@ class ValidationService:
             return True
         return False
 
+    def is_text_layer_usable(self, text: str) -> bool:
+        """
+        Indique si la couche texte d'un PDF peut remplacer l'OCR.
+        
+        Le texte doit être assez long, composé de caractères imprimables
+        (pas de glyphes non mappés) et de mots plausibles (pas de texte
+        encodé ou de polices sans table de caractères).
+        
+        Args:
+            text: Texte extrait de la couche texte du PDF.
+            
+        Returns:
+            True si le texte est jugé exploitable.
+        """
+        characters = [c for c in text if not c.isspace()]
+        if len(characters) < self.TEXT_LAYER_MIN_CHARS:
+            return False
+        
+        printable = sum(1 for c in characters if c.isprintable() and c != '\ufffd')
+        printable_ratio = printable / len(characters)
+        
+        words = [word.strip('.,;:!?()[]«»"') for word in text.split()]
+        words = [word for word in words if word]
+        valid = sum(1 for word in words if self.VALID_WORD_PATTERN.fullmatch(word))
+        word_ratio = valid / len(words) if words else 0.0
+        
+        logger.info(
+            f"Couche texte: {len(characters)} caractères, "
+            f"imprimables {printable_ratio:.2f}, mots valides {word_ratio:.2f}"
+        )
+        return (
+            printable_ratio >= self.TEXT_LAYER_MIN_PRINTABLE_RATIO
+            and word_ratio >= self.TEXT_LAYER_MIN_WORD_RATIO
+        )
+
     def validation_with_custom_error(
         self,
         image: dict,
@@ -0,0 +1,9 @@
+-- Résolution de rendu et confiance OCR retenues pour chaque classification.
+--
+-- Renseignées par ImageResultRepository lorsque AI_STORE_OCR_METRICS=1,
+-- elles permettent d'ajuster le seuil de nouveau rendu
+-- (AI_OCR_RERENDER_CONFIDENCE) à partir des données.
+
+ALTER TABLE ai_separation
+    ADD COLUMN ocr_dpi SMALLINT NULL,
+    ADD COLUMN ocr_confidence DECIMAL(5, 2) NULL;
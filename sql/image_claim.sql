@@ -0,0 +1,16 @@
+-- Réservation des images entre les différents workers (ClaimService).
+--
+-- Une ligne par image et par traitement (scope): separation, validation,
+-- analyse. Une réservation expirée (claimed_until dépassé) peut être
+-- reprise par un autre worker.
+
+CREATE TABLE IF NOT EXISTS image_claim (
+    image_id INT NOT NULL,
+    scope VARCHAR(32) NOT NULL,
+    claimed_by VARCHAR(128) NOT NULL,
+    claimed_until DATETIME NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (image_id, scope),
+    KEY idx_image_claim_owner (claimed_by, scope),
+    KEY idx_image_claim_until (scope, claimed_until)
+);
@@ -0,0 +1,28 @@
+-- Index utilisés par ImageRepositorie.get_image_to_process.
+--
+-- Sélection des images à séparer:
+--   lot filtré sur status_new / date_scan puis images du lot,
+--   anti-jointure sur ai_separation.
+-- Validation / analyse:
+--   images filtrées sur source_image_id / supprimer,
+--   anti-jointure sur ai_ocr_content / ai_ocr_content_docs.
+-- Chargement du contexte:
+--   image_image parcourue par image_id_autre.
+--
+-- À vérifier avec EXPLAIN avant application: certains index peuvent déjà
+-- exister sous un autre nom (SHOW INDEX FROM <table>).
+
+CREATE INDEX idx_lot_status_new_date_scan ON lot (status_new, date_scan);
+CREATE INDEX idx_lot_dossier ON lot (dossier_id);
+
+CREATE INDEX idx_image_lot_decouper ON image (lot_id, decouper, categorie_id);
+CREATE INDEX idx_image_source_supprimer ON image (source_image_id, supprimer);
+
+CREATE INDEX idx_ai_separation_image ON ai_separation (image_id);
+CREATE INDEX idx_ai_ocr_content_image ON ai_ocr_content (image_id);
+CREATE INDEX idx_ai_ocr_content_docs_image ON ai_ocr_content_docs (image_id);
+
+CREATE INDEX idx_image_image_autre ON image_image (image_id_autre);
+
+CREATE INDEX idx_dossier_site ON dossier (site_id);
+CREATE INDEX idx_site_client ON site (client_id);
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Les modules de l'application sont importés depuis la racine du dépôt
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,125 @@
+"""
+Écritures concurrentes de deux images enfants d'une même mère.
+
+Les enfants partagent la ligne ``decoupage_niveau2`` de leur mère: deux
+workers qui lisent « aucun découpage » avant que l'autre n'ait validé
+insèreraient chacun la ligne. La base en mémoire reproduit les verrous
+de ligne (``FOR UPDATE``, tenus jusqu'au commit) et ralentit la lecture
+du découpage pour forcer l'entrelacement.
+"""
+
+import threading
+import time
+
+from repositories.image_result_repository import ImageResultRepository, ImageResultWrite
+
+PARENT_ID = 100
+
+
+class MemoryDatabase:
+    def __init__(self, image_ids: list[int]):
+        self.images = {image_id: {'id': image_id, 'categorie_id': None, 'status_new': 0} for image_id in image_ids}
+        self.decoupages: list[dict] = []
+        self.controles: list[dict] = []
+        self.row_locks = {image_id: threading.Lock() for image_id in image_ids}
+
+
+class MemoryCursor:
+    DECOUPAGE_COLUMNS = ('image_id', 'nomdecoupee', 'lot_id', 'categorie_id', 'nbpage', 'mere')
+
+    def __init__(self, connection: "MemoryConnection"):
+        self.connection = connection
+        self.database = connection.database
+        self.rows: list[dict] = []
+
+    def execute(self, query: str, params=()) -> None:
+        self.rows = []
+        if query.startswith("select * from image"):
+            if "for update" in query:
+                for image_id in params:
+                    self.database.row_locks[image_id].acquire()
+                    self.connection.locked.append(image_id)
+            self.rows = [dict(self.database.images[image_id]) for image_id in params]
+        elif query.startswith("select * from decoupage_niveau2"):
+            rows = [dict(row) for row in self.database.decoupages if row['image_id'] in params]
+            # Laisse à l'autre écriture le temps de lire à son tour
+            time.sleep(0.05)
+            self.rows = rows
+        elif "from decoupage_niveau2_controle" in query:
+            counts: dict[int, int] = {}
+            for row in self.database.controles:
+                if row['image_id'] in params:
+                    counts[row['image_id']] = counts.get(row['image_id'], 0) + 1
+            self.rows = [{'image_id': image_id, 'nb': nb} for image_id, nb in counts.items()]
+
+    def executemany(self, query: str, rows: list) -> None:
+        if query.startswith("INSERT INTO `decoupage_niveau2` "):
+            self.connection.pending.append((self.database.decoupages, rows))
+        elif query.startswith("INSERT INTO `decoupage_niveau2_controle` (`image_id`, `nomdecoupee`, `lot_id`"):
+            self.connection.pending.append((self.database.controles, rows))
+
+    def fetchall(self) -> list[dict]:
+        return self.rows
+
+
+class MemoryConnection:
+    def __init__(self, database: MemoryDatabase):
+        self.database = database
+        self.pending: list = []
+        self.locked: list[int] = []
+
+    def cursor(self, dictionary: bool = True) -> MemoryCursor:
+        return MemoryCursor(self)
+
+    def commit(self) -> None:
+        for table, rows in self.pending:
+            table.extend(dict(zip(MemoryCursor.DECOUPAGE_COLUMNS, row)) for row in rows)
+        self._end()
+
+    def rollback(self) -> None:
+        self._end()
+
+    def _end(self) -> None:
+        self.pending = []
+        for image_id in self.locked:
+            self.database.row_locks[image_id].release()
+        self.locked = []
+
+
+def _repository(database: MemoryDatabase) -> ImageResultRepository:
+    repository = ImageResultRepository.__new__(ImageResultRepository)
+    repository.connection = MemoryConnection(database)
+    repository.cursor = repository.connection.cursor(dictionary=True)
+    repository.store_ocr_metrics = False
+    return repository
+
+
+def _child_write(image_id: int) -> ImageResultWrite:
+    return ImageResultWrite(
+        image_id=image_id,
+        name=f"enfant_{image_id}",
+        decoupage_image_id=PARENT_ID,
+        decoupage={'nomdecoupee': 'mere', 'lot_id': 1, 'categorie_id': 10, 'num_page': 2, 'mere': 1},
+        separation={'categorie_id': 10, 'explication': ''},
+    )
+
+
+def test_sibling_writes_insert_the_parent_decoupage_once():
+    database = MemoryDatabase([PARENT_ID, 101, 102])
+    errors: list[Exception] = []
+
+    def save(image_id: int) -> None:
+        try:
+            _repository(database).save_result(_child_write(image_id))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(image_id,)) for image_id in (101, 102)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert [row['image_id'] for row in database.decoupages] == [PARENT_ID]
+    assert [row['image_id'] for row in database.controles] == [PARENT_ID]
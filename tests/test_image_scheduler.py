@@ -0,0 +1,96 @@
+"""
+Répartition d'un même arriéré entre deux workers de séparation.
+
+Chaque worker réserve ses images par tranches au fil de la distribution:
+un worker démarré pendant le traitement d'un autre obtient les images que
+celui-ci n'a pas encore réservées.
+"""
+
+import threading
+import time
+
+import pytest
+
+from main import ImageScheduler
+from services.claim_service import ClaimScope, ClaimService
+
+
+class MemoryClaimRepository:
+    """Table ``image_claim`` en mémoire (``INSERT IGNORE`` sur la clé primaire)."""
+
+    def __init__(self):
+        self.claims: dict[tuple[int, str], str] = {}
+        self.calls: list[tuple[str, int]] = []
+        self._lock = threading.Lock()
+
+    def claim(self, image_ids, scope, owner, lease_seconds):
+        with self._lock:
+            self.calls.append((owner, len(image_ids)))
+            for image_id in image_ids:
+                self.claims.setdefault((image_id, scope), owner)
+            return [image_id for image_id in image_ids if self.claims[(image_id, scope)] == owner]
+
+    def release(self, scope, owner, image_ids=None):
+        with self._lock:
+            for key in [key for key, claimed_by in self.claims.items() if claimed_by == owner]:
+                if key[1] == scope and (not image_ids or key[0] in image_ids):
+                    del self.claims[key]
+        return True
+
+
+class ThreadPool:
+    """Pool exécutant chaque image dans un thread après un court délai."""
+
+    def apply_async(self, func, args, callback, error_callback):
+        def run():
+            time.sleep(0.005)
+            callback(func(*args))
+        threading.Thread(target=run, daemon=True).start()
+
+
+def _process(image_data: dict) -> dict:
+    return {"image_id": image_data['id'], "lot_id": 1}
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    monkeypatch.setattr(ClaimService, "_schema_checked", True)
+    return MemoryClaimRepository()
+
+
+def _claims(repository: MemoryClaimRepository) -> ClaimService:
+    claims = ClaimService(ClaimScope.SEPARATION)
+    claims._repository = repository
+    return claims
+
+
+def test_two_workers_split_one_backlog(repository):
+    backlog = [{"id": image_id} for image_id in range(60)]
+    workers = [_claims(repository), _claims(repository)]
+    results: dict[str, list[dict]] = {}
+
+    def run(claims: ClaimService) -> None:
+        scheduler = ImageScheduler(ThreadPool(), _process, num_processes=2, claims=claims)
+        results[claims.owner] = scheduler.run(list(backlog))
+
+    threads = [threading.Thread(target=run, args=(claims,)) for claims in workers]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    processed = [{result['image_id'] for result in results[claims.owner]} for claims in workers]
+    assert processed[0] and processed[1]
+    assert not processed[0] & processed[1]
+    assert processed[0] | processed[1] == set(range(60))
+
+
+def test_claims_are_bounded_by_the_dispatch_window(repository):
+    claims = _claims(repository)
+    scheduler = ImageScheduler(ThreadPool(), _process, num_processes=2, claims=claims)
+
+    results = scheduler.run([{"id": image_id} for image_id in range(20)])
+
+    assert len(results) == 20
+    assert max(size for _, size in repository.calls) <= scheduler.max_in_flight
@@ -0,0 +1,63 @@
+"""
+Durée d'import des points d'entrée.
+
+Les bibliothèques lourdes sont importées à la première utilisation
+(``services.lazy_import``): un import direct ajouté par mégarde rallonge
+le démarrage de chaque worker.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bibliothèques qui ne doivent pas être chargées à l'import des points d'entrée
+HEAVY_MODULES = (
+    "cv2", "numpy", "torch", "easyocr", "imutils",
+    "pytesseract", "PyPDF2", "openai", "Levenshtein",
+)
+
+# Durée d'import maximale de main (secondes), à ajuster à la machine de test
+MAX_IMPORT_SECONDS = float(os.getenv("AI_TEST_MAX_IMPORT_SECONDS", 1.5))
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """
+    Importe un module dans un nouvel interpréteur (``-X importtime``).
+
+    Returns:
+        Durée cumulée d'import (µs) par module effectivement exécuté.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        pytest.fail(f"Import de {module} en échec:\n{result.stderr[-2000:]}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["main", "api"])
+def test_heavy_libraries_are_not_imported(module):
+    times = _import_times(module)
+
+    assert [name for name in HEAVY_MODULES if name in times] == []
+
+
+def test_main_import_time():
+    times = _import_times("main")
+
+    assert times["main"] / 1e6 < MAX_IMPORT_SECONDS
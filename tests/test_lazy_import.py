@@ -0,0 +1,50 @@
+"""
+Import différé des bibliothèques lourdes depuis plusieurs threads.
+"""
+
+import sys
+import threading
+
+from services.lazy_import import lazy_import
+
+SLOW_MODULE = """
+import time
+
+LOADS = globals().get('LOADS', 0) + 1
+time.sleep(0.1)
+VALUE = 42
+"""
+
+
+def test_module_is_loaded_on_first_attribute_access(tmp_path, monkeypatch):
+    (tmp_path / "lazy_demo_first.py").write_text("VALUE = 1\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    module = lazy_import("lazy_demo_first")
+    assert "lazy_demo_first" not in sys.modules
+
+    assert module.VALUE == 1
+    assert "lazy_demo_first" in sys.modules
+
+
+def test_concurrent_first_access_sees_the_loaded_module(tmp_path, monkeypatch):
+    (tmp_path / "lazy_demo_slow.py").write_text(SLOW_MODULE, encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = lazy_import("lazy_demo_slow")
+    values, errors = [], []
+
+    def read() -> None:
+        try:
+            values.append(module.VALUE)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert values == [42] * 8
+    assert module.LOADS == 1
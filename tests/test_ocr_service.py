@@ -0,0 +1,48 @@
+"""
+Texte et confiance OCR d'une même exécution de Tesseract.
+
+La comparaison avec ``image_to_string`` nécessite pytesseract, OpenCV
+et l'exécutable ``tesseract``: elle est ignorée sinon.
+"""
+
+import shutil
+
+import pytest
+
+from services.ocr_service import OCRService
+
+TSV = "\n".join([
+    "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+    "1\t1\t0\t0\t0\t0\t0\t0\t800\t600\t-1\t",
+    "5\t1\t1\t1\t1\t1\t10\t10\t80\t20\t90.5\tFacture",
+    "5\t1\t1\t1\t1\t2\t100\t10\t40\t20\t70.5\tN°",
+    "5\t1\t1\t1\t1\t3\t150\t10\t40\t20\t95\t ",
+])
+
+
+def test_mean_confidence_ignores_layout_rows_and_empty_words():
+    assert OCRService.mean_confidence(TSV) == 80.5
+
+
+def test_mean_confidence_of_blank_page():
+    assert OCRService.mean_confidence(TSV.splitlines()[0]) == 0.0
+    assert OCRService.mean_confidence("") == 0.0
+
+
+def test_text_matches_image_to_string(tmp_path):
+    pytesseract = pytest.importorskip("pytesseract")
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    if shutil.which("tesseract") is None:
+        pytest.skip("tesseract absent")
+
+    image = np.full((400, 1200), 255, dtype=np.uint8)
+    cv2.putText(image, "FACTURE 2024-001", (40, 120), cv2.FONT_HERSHEY_SIMPLEX, 2, 0, 4)
+    cv2.putText(image, "Total TTC 1 250,00 EUR", (40, 300), cv2.FONT_HERSHEY_SIMPLEX, 2, 0, 4)
+    path = str(tmp_path / "page.png")
+    cv2.imwrite(path, image)
+
+    text, confidence = OCRService().extract_data_with_config(path, lang='eng', psm=3, oem=3)
+
+    assert text == pytesseract.image_to_string(path, lang='eng', config='--oem 3 --psm 3')
+    assert confidence > 0
@@ -0,0 +1,73 @@
+"""
+Requête de sélection des images à traiter.
+
+Les vérifications EXPLAIN nécessitent une base (variables ``DB_*``) où
+``sql/indexes.sql`` a été appliqué: elles ne s'exécutent qu'avec
+``AI_TEST_DATABASE=1``.
+"""
+
+import os
+
+import pytest
+
+from repositories.image_repository import (
+    DEFAULT_DATE_SCAN_FROM,
+    ImageRepositorie,
+)
+
+# Alias des tables qui ne doivent jamais être lues en entier
+INDEXED_ALIASES = ("l", "ai_s", "ai_ocr", "ic")
+
+
+def _build(**filters) -> tuple[str, list]:
+    # Construction seule, sans connexion
+    repository = ImageRepositorie.__new__(ImageRepositorie)
+    return repository._build_pending_query(**filters)
+
+
+def test_separation_query_is_parameterised():
+    query, params = _build(client_id=12, claim_scope="separation")
+
+    assert DEFAULT_DATE_SCAN_FROM not in query
+    assert "12" not in query
+    assert query.count("%s") == len(params)
+    assert params[-2:] == [12, "separation"]
+
+
+def test_joins_only_when_filtered():
+    query, _ = _build(image_id=5)
+
+    assert "JOIN" not in query
+    assert "image_claim" not in query
+
+
+def test_dossier_filter_does_not_join_dossier():
+    query, params = _build(dossier_id=7)
+
+    assert "JOIN lot l" in query
+    assert "JOIN dossier d" not in query
+    assert 7 in params
+
+
+@pytest.fixture
+def cursor():
+    if os.getenv("AI_TEST_DATABASE") != "1":
+        pytest.skip("AI_TEST_DATABASE=1 requis (base de test)")
+    repository = ImageRepositorie()
+    yield repository.cursor
+    repository.connection.rollback()
+
+
+@pytest.mark.parametrize("filters", [
+    {"claim_scope": "separation"},
+    {"for_validation": True, "claim_scope": "validation"},
+    {"for_analyse": True, "claim_scope": "analyse"},
+])
+def test_pending_query_uses_indexes(cursor, filters):
+    query, params = _build(**filters)
+
+    cursor.execute(f"EXPLAIN {query}", params)
+    plan = cursor.fetchall()
+
+    full_scans = [row for row in plan if row['table'] in INDEXED_ALIASES and row['type'] == 'ALL']
+    assert full_scans == [], plan
@@ -0,0 +1,63 @@
+"""Ordre des prompts système: préfixe statique identique d'un dossier à l'autre."""
+
+import os
+
+from services.prompt_assembler import PromptAssembler
+from services.prompt_registry import PromptTemplate
+
+VALIDATION_PROMPT = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'services', 'prompts', 'validation.md'
+)
+
+TEMPLATE = (
+    "Tu classes les pièces du dossier {{dossier_nom}} (APE {{dossier_ape}}).\n"
+    "Clients connus: {{dossier_tiers_list}}\n"
+    "Texte: {{document_text}}\n"
+)
+
+
+def _replacements(nom: str, ape: str, tiers: str, document: str = "") -> dict[str, str]:
+    return {
+        '{{dossier_nom}}': nom,
+        '{{dossier_ape}}': ape,
+        '{{dossier_tiers_list}}': tiers,
+        '{{document_text}}': document,
+    }
+
+
+def test_static_prefix_is_byte_identical_across_dossiers():
+    assembler = PromptAssembler()
+    template = PromptTemplate(TEMPLATE)
+
+    first = assembler.assemble(template, _replacements("ACME", "6201Z", "Client A"))
+    second = assembler.assemble(template, _replacements("Boulangerie", "1071C", "Client B, Client C"))
+
+    header = PromptAssembler.CONTEXT_HEADER
+    assert first.index(header) == second.index(header)
+    assert first[:first.index(header)] == second[:second.index(header)]
+    assert "ACME" not in first[:first.index(header)]
+
+
+def test_document_text_is_not_in_system_prompt():
+    assembler = PromptAssembler()
+    template = PromptTemplate(TEMPLATE)
+
+    prompt = assembler.assemble(template, _replacements("ACME", "6201Z", "", "FACTURE 42 {{dossier_nom}}"))
+
+    assert "FACTURE 42" not in prompt
+    assert PromptAssembler.DOCUMENT_REFERENCE in prompt
+    assert "- dossier_tiers_list: (aucun)" in prompt
+
+
+def test_shipped_validation_prompt_prefix_is_stable():
+    assembler = PromptAssembler()
+    with open(VALIDATION_PROMPT, 'r', encoding='utf-8') as f:
+        template = PromptTemplate(f.read())
+
+    prompts = [
+        assembler.assemble(template, _replacements(nom, ape, tiers))
+        for nom, ape, tiers in (("ACME", "6201Z", "A"), ("SCI Dupont", "6820A", "B, C"))
+    ]
+
+    prefixes = {prompt[:prompt.index(PromptAssembler.CONTEXT_HEADER)] for prompt in prompts}
+    assert len(prefixes) == 1
@@ -0,0 +1,73 @@
+"""Templates compilés (rendu en une passe) et cache des prompts par dossier."""
+
+from services.prompt_registry import PromptRegistry, PromptTemplate
+
+TEMPLATE = (
+    "Tu classes les pièces du dossier {{dossier_nom}} (APE {{dossier_ape}}).\n"
+    "Clients connus: {{dossier_tiers_list}}\n"
+    "Texte: {{document_text}}\n"
+)
+
+
+def _replacements(nom: str, ape: str, tiers: str, document: str = "") -> dict[str, str]:
+    return {
+        '{{dossier_nom}}': nom,
+        '{{dossier_ape}}': ape,
+        '{{dossier_tiers_list}}': tiers,
+        '{{document_text}}': document,
+    }
+
+
+def test_render_does_not_rewrite_placeholders_inside_values():
+    template = PromptTemplate("A {{x}} B {{y}}")
+
+    rendered = template.render({'{{x}}': "{{y}}", '{{y}}': "{{x}}"})
+
+    assert rendered == "A {{y}} B {{x}}"
+
+
+def test_render_keeps_unknown_placeholders():
+    template = PromptTemplate("{{known}} {{unknown}}")
+
+    assert template.render({'{{known}}': "ok"}) == "ok {{unknown}}"
+
+
+def test_placeholders_in_order_of_appearance():
+    template = PromptTemplate("{{b}} {{a}} {{b}}")
+
+    assert template.placeholders == ('b', 'a')
+
+
+def test_system_prompt_is_cached_per_dossier():
+    registry = PromptRegistry()
+    template = registry.compile(TEMPLATE)
+
+    first = registry.system_prompt(template, _replacements("ACME", "6201Z", "A", "document 1"))
+    second = registry.system_prompt(template, _replacements("ACME", "6201Z", "A", "document 2"))
+    other = registry.system_prompt(template, _replacements("ACME", "6201Z", "A, B", "document 3"))
+
+    assert second is first
+    assert other is not first
+    assert "- dossier_tiers_list: A, B" in other
+
+
+def test_rendered_cache_is_bounded():
+    registry = PromptRegistry(max_rendered=2)
+    template = registry.compile(TEMPLATE)
+
+    for nom in ("A", "B", "C"):
+        registry.system_prompt(template, _replacements(nom, "", ""))
+
+    assert len(registry._rendered) == 2
+
+
+def test_template_file_is_read_once(tmp_path):
+    path = tmp_path / "prompt.md"
+    path.write_text("Dossier {{dossier_nom}}", encoding='utf-8')
+    registry = PromptRegistry()
+
+    first = registry.load(str(path))
+    path.write_text("modifié", encoding='utf-8')
+
+    assert registry.load(str(path)) is first
+    assert first.text == "Dossier {{dossier_nom}}"
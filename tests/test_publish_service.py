@@ -0,0 +1,84 @@
+"""
+Reprise des publications abandonnées par un worker du pool persistant.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from services.publish_service import PublishService
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _processing_job(publisher: PublishService, pid: int, name: str):
+    path = publisher.outbox / "processing" / f"{pid}-abcd1234.{name}"
+    path.write_text(json.dumps({'name': name}), encoding='utf-8')
+    return path
+
+
+def test_stale_only_recovers_jobs_of_dead_processes(tmp_path):
+    publisher = PublishService(outbox=str(tmp_path), enabled=True)
+    _processing_job(publisher, _dead_pid(), "0001_dead.json")
+    alive = _processing_job(publisher, os.getpid(), "0002_alive.json")
+
+    assert publisher.recover(stale_only=True) == 1
+    assert (tmp_path / "pending" / "0001_dead.json").exists()
+    assert alive.exists()
+
+
+def test_stale_only_recovers_old_claims(tmp_path):
+    publisher = PublishService(outbox=str(tmp_path), enabled=True)
+    old = _processing_job(publisher, os.getpid(), "0001_old.json")
+    claimed_at = time.time() - publisher.stale_seconds - 1
+    os.utime(old, (claimed_at, claimed_at))
+
+    assert publisher.recover(stale_only=True) == 1
+    assert (tmp_path / "pending" / "0001_old.json").exists()
+
+
+def test_drain_does_not_wait_for_dead_workers(tmp_path, monkeypatch):
+    publisher = PublishService(outbox=str(tmp_path), enabled=True)
+    calls = []
+    monkeypatch.setattr(
+        publisher.file_staging_service, "publish_files",
+        lambda files, destinations, max_attempts=None: calls.append(files) or [True] * len(files)
+    )
+    payload = tmp_path / "payloads" / "page.ocr"
+    payload.write_text("texte", encoding='utf-8')
+    job = {
+        'id': 'x', 'source': str(payload), 'name': 'page.ocr', 'destinations': [str(tmp_path)],
+        'delete_source': True, 'attempts': 0, 'next_attempt_at': 0.0,
+    }
+    path = publisher.outbox / "processing" / f"{_dead_pid()}-abcd1234.0001_x.json"
+    path.write_text(json.dumps(job), encoding='utf-8')
+
+    assert publisher.drain(timeout=5) == 0
+    assert len(calls) == 1
+
+
+def test_due_jobs_are_published_per_destination(tmp_path, monkeypatch):
+    publisher = PublishService(outbox=str(tmp_path / "outbox"), enabled=True)
+    monkeypatch.setattr(publisher, "_ensure_thread", lambda: None)
+    groups = []
+    monkeypatch.setattr(
+        publisher.file_staging_service, "publish_files",
+        lambda files, destinations, max_attempts=None: groups.append(
+            (destinations, sorted(name for _, name, _ in files))
+        ) or [True] * len(files)
+    )
+    dossier_a = [str(tmp_path / "a" / "ocr"), str(tmp_path / "a" / "images")]
+    dossier_b = [str(tmp_path / "b" / "images")]
+    publisher.publish_text("texte 1", "1.ocr", dossier_a)
+    publisher.publish_text("texte 2", "2.ocr", dossier_b)
+    publisher.publish_text("texte 3", "3.ocr", dossier_a)
+
+    assert publisher.drain(timeout=5) == 0
+    assert sorted(groups) == sorted([(dossier_a, ["1.ocr", "3.ocr"]), (dossier_b, ["2.ocr"])])
+    assert not list((tmp_path / "outbox" / "payloads").iterdir())
@@ -29,10 +29,13 @@ class ProcessWorker(QtCore.QThread):
         self.images = images
 
     def run(self):
-        for img in self.images:
+        pending = list(self.images)
+        while pending:
+            img = pending.pop(0)
             try:
                 img.setdefault("is_child", False)
                 res = self.processor.process(img)
+                pending.extend(res.child_images)
                 self.done.emit(
                     {
                         "id": res.image_id,